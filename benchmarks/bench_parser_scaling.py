@@ -0,0 +1,60 @@
+#Benchmark de escalabilidade do front-end (léxico + sintático + semântico).
+#Gera programas Rascal sintéticos com N comandos, N variáveis e N sub-rotinas
+#e mede o tempo de compilação. Com a construção linear das listas no parser,
+#o tempo por elemento deve ficar aproximadamente constante ao variar N.
+#
+#Uso: python benchmarks/bench_parser_scaling.py [N1 N2 ...]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import rascal_parser
+from rascal_lexer import lexer
+from rascal_parser import parser
+from rascal_semantic import SemanticAnalyzer
+
+DEFAULT_SIZES = [100000, 200000, 500000, 1000000]
+
+#Bloco com N comandos de atribuição
+def gen_statements(n: int) -> str:
+    body = ";\n".join("x := x + 1" for _ in range(n))
+    return f"program s;\nvar x : integer;\nbegin\n{body}\nend.\n"
+
+#Seção de variáveis com N identificadores em N declarações
+def gen_variables(n: int) -> str:
+    decls = "\n".join(f"v{i} : integer;" for i in range(n))
+    return f"program v;\nvar\n{decls}\nbegin\nv0 := 1\nend.\n"
+
+#N procedimentos declarados no mesmo bloco
+def gen_subroutines(n: int) -> str:
+    subs = "\n".join(f"procedure p{i}; begin x := {i} end;" for i in range(n))
+    return f"program p;\nvar x : integer;\n{subs}\nbegin\np0()\nend.\n"
+
+def compile_time(source: str) -> float:
+    start = time.perf_counter()
+    rascal_parser.SYNTACTIC_ERROR = False
+    lexer.lineno = 1
+    ast = parser.parse(source, lexer=lexer)
+    if rascal_parser.SYNTACTIC_ERROR or not ast:
+        raise RuntimeError("programa gerado não foi reconhecido")
+    sem = SemanticAnalyzer()
+    sem.visit(ast)
+    if sem.has_error:
+        raise RuntimeError("programa gerado possui erro semântico")
+    return time.perf_counter() - start
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or DEFAULT_SIZES
+    for name, gen in [("comandos", gen_statements), ("variaveis", gen_variables), ("subrotinas", gen_subroutines)]:
+        print(f"--- {name} ---")
+        per_item = []
+        for n in sizes:
+            t = compile_time(gen(n))
+            per_item.append(t / n)
+            print(f"N={n:>8}  {t:8.2f}s  {t / n * 1e6:7.2f} us/elemento")
+        print(f"razão us/elemento (maior N / menor N): {per_item[-1] / per_item[0]:.2f}")
+
+if __name__ == "__main__":
+    main()
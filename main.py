@@ -1,95 +1,381 @@
+import argparse
+import contextlib
+import io
+import os
 import sys
-import rascal_lexer 
-import rascal_parser 
-from rascal_lexer import lexer
-from rascal_parser import parser
-from rascal_semantic import SemanticAnalyzer
-from rascal_codegen import CodeGenerator
-from rascal_ast import PrintAST
+from types import CodeType
+from typing import List, Optional, Tuple, Union
 
-def main():
-    if len(sys.argv) < 3:
-        print("Uso: python main.py <entrada.ras> <saida.mepa> [-pp]")
-        print("  -pp : opcional, imprime a AST gerada")
-        return
+from mepa_code import Instr, format_mepa, parse_mepa
+from rascal_cache import CompilationCache, DEFAULT_MAX_BYTES
+from rascal_passes import DEFAULT_OPT_LEVEL, MAX_OPT_LEVEL, InvariantError, PassManager, count_mepa
 
-    infile = sys.argv[1]
-    outfile = sys.argv[2]
-    
-    print_ast = len(sys.argv) > 3 and sys.argv[3] == '-pp'
+#Mesmos valores de rascal_inline.DEFAULT_INLINE_SIZE,
+#rascal_peval.DEFAULT_PEVAL_STEPS, rascal_unroll.DEFAULT_UNROLL_SIZE e
+#rascal_specialize.DEFAULT_SPECIALIZE_SIZE, repetidos para não importar o compilador só para montar a linha de comando
+DEFAULT_INLINE_SIZE = 40
+DEFAULT_PEVAL_STEPS = 100000
+DEFAULT_UNROLL_SIZE = 60
+DEFAULT_SPECIALIZE_SIZE = 200
 
-    try:
-        with open(infile, 'r', encoding='utf-8') as f:
-            source = f.read()
-    except Exception:
-        print("Erro ao abrir arquivo de entrada.")
-        return
+#Geradores de código: MEPA (padrão) ou funções Python executadas direto
+BACKENDS = ("mepa", "python")
+
+#Opções de uma compilação. As que alteram o código gerado entram na chave do
+#cache; as de diagnóstico (tempos, verificação) não. O backend Python não
+#passa pelo cache (o resultado não é texto).
+class CompileOptions:
+    def __init__(self, print_ast: bool = False, opt_level: int = DEFAULT_OPT_LEVEL,
+                 inline_size: int = DEFAULT_INLINE_SIZE, peval_steps: int = DEFAULT_PEVAL_STEPS, use_ir: bool = False,
+                 time_passes: bool = False, check_passes: bool = False, backend: str = "mepa", memoize: bool = False,
+                 unroll_size: int = DEFAULT_UNROLL_SIZE, specialize_size: int = DEFAULT_SPECIALIZE_SIZE):
+        self.print_ast = print_ast
+        self.opt_level = opt_level
+        self.inline_size = inline_size
+        self.peval_steps = peval_steps
+        self.use_ir = use_ir
+        self.time_passes = time_passes
+        self.check_passes = check_passes
+        self.backend = backend
+        self.memoize = memoize
+        self.unroll_size = unroll_size
+        self.specialize_size = specialize_size
+
+    def cache_key(self) -> str:
+        return ("pp" if self.print_ast else "") + f";O{self.opt_level};inline={self.inline_size};peval={self.peval_steps};unroll={self.unroll_size}" + \
+               f";specialize={self.specialize_size}" + \
+               (";ir" if self.use_ir else "") + (";memo" if self.memoize else "")
+
+#Os módulos do compilador são importados sob demanda: importar o parser
+#constrói as tabelas LALR do PLY, o que é desnecessário num acerto de cache.
+def load_compiler():
+    import rascal_lexer
+    import rascal_parser
+    import rascal_semantic
+    import rascal_codegen
+    import rascal_ast
+    import rascal_constfold
+    import rascal_deadcode
+    import rascal_inline
+    import rascal_licm
+    import rascal_cse
+    import rascal_peval
+    import rascal_loopsum
+    import rascal_unroll
+    import rascal_specialize
+    import rascal_ir
+    import rascal_pygen
+    import mepa_opt
+    return rascal_lexer, rascal_parser, rascal_semantic, rascal_codegen, rascal_ast, rascal_constfold, rascal_deadcode, rascal_inline, rascal_licm, rascal_cse, rascal_peval, rascal_loopsum, rascal_unroll, rascal_specialize, rascal_ir, rascal_pygen, mepa_opt
+
+#Passagens de otimização e geração de código, na ordem em que executam, com
+#o nível mínimo de otimização de cada uma:
+#  -O0: só a geração de código
+#  -O1: + propagação de constantes, código morto e peephole MEPA (baratas)
+#  -O2: + avaliação parcial, especialização, laços em forma fechada,
+#        desenrolamento de laços, movimentação de invariantes, expansão em
+#        linha e subexpressões comuns
+#Com o backend Python, a geração de código MEPA e o peephole dão lugar à
+#tradução da AST para Python. --memoize marca as funções puras recursivas
+#logo antes da geração de código, sobre a AST já otimizada.
+def build_pass_manager(options: CompileOptions) -> PassManager:
+    rascal_lexer, rascal_parser, rascal_semantic, rascal_codegen, rascal_ast, rascal_constfold, rascal_deadcode, rascal_inline, rascal_licm, rascal_cse, rascal_peval, rascal_loopsum, rascal_unroll, rascal_specialize, rascal_ir, rascal_pygen, mepa_opt = load_compiler()
+
+    def generate(ast):
+        if options.use_ir:
+            # via representação intermediária em SSA
+            return rascal_ir.generate_mepa(ast)
+        cg = rascal_codegen.CodeGenerator()
+        cg.visit(ast)
+        return cg.code
+
+    pm = PassManager(options.opt_level, check=options.check_passes, timing=options.time_passes,
+                     count_ast=lambda ast: count_mepa(generate(ast)))
+    pm.register("propagação de constantes", 'ast', lambda ast: rascal_constfold.ConstantFolder().visit(ast), 1)
+    pm.register("avaliação parcial", 'ast', lambda ast: rascal_peval.PartialEvaluator(options.peval_steps).visit(ast), 2)
+    pm.register("especialização", 'ast', lambda ast: rascal_specialize.Specializer(options.specialize_size).visit(ast), 2)
+    pm.register("laços em forma fechada", 'ast', lambda ast: rascal_loopsum.LoopSummarizer().visit(ast), 2)
+    pm.register("desenrolamento de laços", 'ast', lambda ast: rascal_unroll.LoopUnroller(options.unroll_size).visit(ast), 2)
+    pm.register("invariantes de laço", 'ast', lambda ast: rascal_licm.LoopInvariantMotion().visit(ast), 2)
+    pm.register("expansão em linha", 'ast', lambda ast: rascal_inline.Inliner(options.inline_size).visit(ast), 2)
+    pm.register("código morto", 'ast', lambda ast: rascal_deadcode.DeadCodeEliminator().visit(ast), 1)
+    pm.register("subexpressões comuns", 'ast', lambda ast: rascal_cse.CommonSubexpressionEliminator().visit(ast), 2)
+    if options.memoize:
+        pm.register("memoização", 'ast', rascal_semantic.mark_memoized, 0)
+    if options.backend == "python":
+        pm.register("geração de código (Python)", 'python', rascal_pygen.generate_python, 0)
+        return pm
+    pm.register("geração de código" + (" (IR)" if options.use_ir else ""), 'codegen', generate, 0)
+    pm.register("peephole MEPA", 'mepa', mepa_opt.optimize, 1)
+    return pm
+
+#Executa todas as fases sobre o texto-fonte. Devolve o programa (código MEPA,
+#ou bytecode Python com o backend Python; None se houve erro) e as mensagens
+#produzidas.
+def compile_program(source: str, options: Optional[CompileOptions] = None) -> Tuple[Optional[Union[List[Instr], CodeType]], str]:
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        program = run_phases(source, options or CompileOptions())
+    return program, out.getvalue()
+
+#Como compile_program, mas com o código já em texto .mep
+def compile_source(source: str, options: Optional[CompileOptions] = None) -> Tuple[Optional[str], str]:
+    program, diagnostics = compile_program(source, options)
+    return (None if program is None else format_mepa(program)), diagnostics
+
+def run_phases(source: str, options: CompileOptions) -> Optional[Union[List[Instr], CodeType]]:
+    rascal_lexer, rascal_parser, rascal_semantic, rascal_codegen, rascal_ast, rascal_constfold, rascal_deadcode, rascal_inline, rascal_licm, rascal_cse, rascal_peval, rascal_loopsum, rascal_unroll, rascal_specialize, rascal_ir, rascal_pygen, mepa_opt = load_compiler()
+    lexer = rascal_lexer.lexer
+    parser = rascal_parser.parser
+    pm = build_pass_manager(options)
 
     # ---------------------------------------------------------
     # 1. Análise Léxica
     # ---------------------------------------------------------
     # Reinicia a flag do módulo lexer
     rascal_lexer.LEXICAL_ERROR = False
-    
-    lexer.lineno = 1
-    lexer.input(source)
-    try:
-        for _ in lexer: pass
-    except:
-        rascal_lexer.LEXICAL_ERROR = True
-    
+
+    def scan():
+        lexer.lineno = 1
+        lexer.input(source)
+        try:
+            for _ in lexer: pass
+        except:
+            rascal_lexer.LEXICAL_ERROR = True
+
+    pm.phase("análise léxica", scan)
     if rascal_lexer.LEXICAL_ERROR:
         print("Erro Léxico detectado. Compilação abortada.")
-        return
+        return None
 
     # ---------------------------------------------------------
     # 2. Análise Sintática
     # ---------------------------------------------------------
     # Reinicia a flag do módulo parser
     rascal_parser.SYNTACTIC_ERROR = False
-    
+
     lexer.lineno = 1
     lexer.input(source)
-    ast = parser.parse(source, lexer=lexer)
-    
+    ast = pm.phase("análise sintática", lambda: parser.parse(source, lexer=lexer))
+
     # Verifica se houve erro sintático (flag) ou se a AST veio vazia
     if rascal_parser.SYNTACTIC_ERROR or not ast:
         print("Erro Sintático detectado. Compilação abortada.")
-        return
+        return None
 
     # ---------------------------------------------------------
     # 3. Análise Semântica
     # ---------------------------------------------------------
-    sem = SemanticAnalyzer()
-    sem.visit(ast)
-    
+    sem = rascal_semantic.SemanticAnalyzer()
+    pm.phase("análise semântica", sem.visit, ast)
+
     if sem.has_error:
         print("Erro Semântico detectado. Compilação abortada.")
-        return
+        return None
 
     # ---------------------------------------------------------
     # 4. Impressão da AST
     # ---------------------------------------------------------
-    
+
     # Só imprime se passou por léxico, sintático e semântico sem erros
-    if print_ast:
+    if options.print_ast:
         print("\n--- AST ---")
-        printer = PrintAST()
+        printer = rascal_ast.PrintAST()
         printer.visit(ast)
         print("-----------\n")
 
     # ---------------------------------------------------------
-    # 5. Geração de Código
+    # 5. Otimização da AST, geração de código e otimização MEPA
     # ---------------------------------------------------------
-    cg = CodeGenerator()
-    cg.visit(ast)
+    try:
+        program = pm.run(ast)
+    except InvariantError as e:
+        print(f"Erro interno do compilador após a passagem {e}. Compilação abortada.")
+        return None
+    except rascal_pygen.NestingError as e:
+        print(f"Programa aninhado demais para o backend Python ({e}). Compilação abortada.")
+        return None
+
+    if options.time_passes:
+        print(pm.report())
+    return program
+
+#Compila usando o cache, se houver. Devolve (código, diagnósticos, acerto?).
+#As opções que alteram o resultado fazem parte da chave do cache.
+def compile_cached(source: str, cache: Optional[CompilationCache], options: Optional[CompileOptions] = None,
+                   evict: bool = True) -> Tuple[Optional[str], str, bool]:
+    options = options or CompileOptions()
+    if cache is None:
+        return compile_source(source, options) + (False,)
+    key = cache.key(source, options.cache_key())
+    entry = cache.get(key)
+    if entry is not None:
+        return entry["code"], entry["diagnostics"], True
+    code, diagnostics = compile_source(source, options)
+    cache.put(key, {"code": code, "diagnostics": diagnostics}, evict=evict)
+    return code, diagnostics, False
+
+def open_cache(cache_dir: Optional[str], cache_size: int) -> Optional[CompilationCache]:
+    if not cache_dir:
+        return None
+    return CompilationCache(cache_dir, cache_size * 1024 * 1024)
+
+#Opções de cache comuns ao modo arquivo único e ao modo lote
+def add_cache_arguments(ap: argparse.ArgumentParser):
+    ap.add_argument("--cache-dir", default=os.environ.get("RASCAL_CACHE_DIR"),
+                    help="diretório do cache de compilação (padrão: $RASCAL_CACHE_DIR; sem cache se ausente)")
+    ap.add_argument("--cache-size", type=int,
+                    default=int(os.environ.get("RASCAL_CACHE_SIZE", DEFAULT_MAX_BYTES // (1024 * 1024))),
+                    help="tamanho máximo do cache em MB (padrão: $RASCAL_CACHE_SIZE ou 64)")
+
+#Opções de otimização comuns ao modo arquivo único e ao modo lote
+def add_optimization_arguments(ap: argparse.ArgumentParser):
+    ap.add_argument("-O", dest="opt_level", type=int, choices=range(MAX_OPT_LEVEL + 1), default=DEFAULT_OPT_LEVEL,
+                    help=f"nível de otimização: -O0 nenhuma, -O1 só as baratas, -O2 todas (padrão: -O{DEFAULT_OPT_LEVEL})")
+    ap.add_argument("--inline-size", type=int, default=DEFAULT_INLINE_SIZE,
+                    help=f"tamanho máximo (nós da AST) de sub-rotina expandida em linha; 0 desativa (padrão: {DEFAULT_INLINE_SIZE})")
+    ap.add_argument("--peval-steps", type=int, default=DEFAULT_PEVAL_STEPS,
+                    help=f"passos de interpretação em tempo de compilação do trecho que não depende da entrada; 0 desativa (padrão: {DEFAULT_PEVAL_STEPS})")
+    ap.add_argument("--unroll-size", type=int, default=DEFAULT_UNROLL_SIZE,
+                    help=f"tamanho máximo (nós da AST) do corpo de um laço contado depois de desenrolado; 0 desativa (padrão: {DEFAULT_UNROLL_SIZE})")
+    ap.add_argument("--specialize-size", type=int, default=DEFAULT_SPECIALIZE_SIZE,
+                    help=f"crescimento máximo (nós da AST) com cópias de sub-rotinas especializadas para argumentos constantes; 0 desativa (padrão: {DEFAULT_SPECIALIZE_SIZE})")
+    ap.add_argument("--ir", dest="use_ir", action="store_true",
+                    help="gera o código a partir da representação intermediária em SSA")
+    ap.add_argument("--memoize", action="store_true",
+                    help="guarda os resultados de funções puras recursivas numa tabela da MEPA indexada pelos argumentos")
 
+def options_from_args(args: argparse.Namespace) -> CompileOptions:
+    return CompileOptions(print_ast=getattr(args, "print_ast", False), opt_level=args.opt_level,
+                          inline_size=args.inline_size, peval_steps=args.peval_steps, use_ir=args.use_ir,
+                          time_passes=getattr(args, "time_passes", False),
+                          check_passes=getattr(args, "check_passes", False),
+                          backend=getattr(args, "backend", "mepa"), memoize=args.memoize,
+                          unroll_size=args.unroll_size, specialize_size=args.specialize_size)
+
+#Executa o programa no interpretador MEPA (mepa_py) direto da memória, sem
+#gravar nem reler o .mep. Entrada e saída do programa são as do processo.
+def run_program(program: List[Instr], limit: Optional[int] = None, stacksize: Optional[int] = None,
+                programsize: Optional[int] = None, memosize: Optional[int] = None,
+                recursion: Optional[int] = None):
+    vm_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mepa_py")
+    if vm_dir not in sys.path:
+        sys.path.insert(0, vm_dir)
+    import mepa_defs
+    from mepa_interp import execute
+    for name, value in (("limit", limit), ("stacksize", stacksize), ("programsize", programsize), ("memosize", memosize),
+                        ("recursion", recursion)):
+        if value is not None:
+            mepa_defs.OPTIONS_DICT[name] = value
+    P, L = mepa_defs.loadProgram(program)
+    mepa_defs.fixArgs(P, L)
+    res = execute(mepa_defs.makeMepa(P), P, L, mepa_defs.MESS_FILE, sys.stdin, sys.stdout)
+    if res != -1:
+        mepa_defs.Msg(mepa_defs.EXECUTION_ERROR % res, quit=True, code=1)
+
+#Executa o programa gerado pelo backend Python
+def run_python_program(code: CodeType):
+    import rascal_pygen
     try:
-        with open(outfile, 'w', encoding='utf-8') as f:
-            f.write(cg.get_code())
-        print(f"Sucesso! Gerado '{outfile}'")
-    except Exception as e:
-        print(f"Erro ao gravar arquivo de saída: {e}")
+        rascal_pygen.run_python(code, sys.stdin, sys.stdout)
+    except rascal_pygen.ExecutionError as e:
+        sys.stdout.flush()
+        sys.stderr.write(f"Erro de execução: {e}\n")
+        sys.exit(1)
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="main.py", description="Compilador Rascal -> MEPA")
+    ap.add_argument("infile", help="arquivo fonte .ras")
+    ap.add_argument("outfile", nargs="?", help="arquivo MEPA de saída (opcional com --run)")
+    ap.add_argument("-pp", dest="print_ast", action="store_true", help="imprime a AST gerada")
+    ap.add_argument("--time-passes", action="store_true",
+                    help="mostra o tempo de cada fase e passagem e o número de instruções antes e depois (ignora o cache)")
+    ap.add_argument("--check-passes", action="store_true",
+                    help="verifica invariantes da AST e do código MEPA entre as passagens (depuração; ignora o cache)")
+    ap.add_argument("--run", action="store_true",
+                    help="executa o código gerado no interpretador MEPA, sem passar por arquivo")
+    ap.add_argument("--backend", choices=BACKENDS, default="mepa",
+                    help="mepa: gera código MEPA (padrão); python: traduz para Python e executa (exige --run)")
+    ap.add_argument("--limit", type=int, help="com --run: máximo de instruções executadas (padrão do interpretador)")
+    ap.add_argument("--stacksize", type=int, help="com --run: tamanho da pilha (padrão do interpretador)")
+    ap.add_argument("--programsize", type=int, help="com --run: tamanho máximo do programa (padrão do interpretador)")
+    ap.add_argument("--memosize", type=int, help="com --run: resultados guardados na tabela de memoização (padrão do interpretador)")
+    ap.add_argument("--recursion", type=int,
+                    help="com --run: máximo de chamadas recursivas aninhadas; dimensiona a pilha de programas recursivos verificados")
+    add_cache_arguments(ap)
+    add_optimization_arguments(ap)
+    return ap
+
+def main():
+    if "--batch" in sys.argv[1:]:
+        import rascal_batch
+        sys.exit(rascal_batch.main(sys.argv[1:]))
+
+    if len(sys.argv) < 3:
+        print("Uso: python main.py <entrada.ras> [<saida.mepa>] [--run [--limit N]] [--backend mepa|python] [-pp] [-O0|-O1|-O2] [--time-passes] [--check-passes] [--cache-dir DIR] [--cache-size MB] [--inline-size N] [--peval-steps N] [--unroll-size N] [--specialize-size N] [--ir] [--memoize]")
+        print("     python main.py --batch <dir|arquivo|glob>... [--jobs N] [--summary arquivo.json]")
+        print("  --run : opcional, executa o programa compilado (a saída .mepa passa a ser opcional)")
+        print("  --limit/--stacksize/--programsize/--memosize/--recursion : opcional, limites do interpretador com --run")
+        print("  --backend=python : opcional, com --run, executa o programa traduzido para Python, sem MEPA")
+        print("  -pp : opcional, imprime a AST gerada")
+        print("  -O0/-O1/-O2 : opcional, nível de otimização (padrão: -O0)")
+        print("  --time-passes : opcional, mostra o tempo e o efeito de cada passagem")
+        print("  --check-passes : opcional, verifica invariantes entre as passagens (depuração)")
+        print("  --cache-dir : opcional, reaproveita compilações anteriores do mesmo fonte")
+        print("  --inline-size : opcional, limite de tamanho para expansão em linha (0 desativa)")
+        print("  --peval-steps : opcional, orçamento da avaliação parcial em tempo de compilação (0 desativa)")
+        print("  --unroll-size : opcional, limite de tamanho para desenrolar laços contados (0 desativa)")
+        print("  --specialize-size : opcional, orçamento de crescimento da especialização de sub-rotinas (0 desativa)")
+        print("  --ir : opcional, gera o código pela representação intermediária em SSA")
+        print("  --memoize : opcional, memoiza funções puras recursivas (resultado por argumentos)")
+        print("  --batch : compila vários arquivos em paralelo, gerando .mep ao lado de cada fonte")
+        return
+
+    ap = build_arg_parser()
+    args = ap.parse_args()
+    infile = args.infile
+    outfile = args.outfile
+    if outfile is None and not args.run:
+        ap.error("informe o arquivo MEPA de saída ou use --run")
+    if args.backend == "python" and (outfile is not None or not args.run):
+        ap.error("--backend=python só executa o programa: use --run, sem arquivo de saída")
+
+    try:
+        with open(infile, 'r', encoding='utf-8') as f:
+            source = f.read()
+    except Exception:
+        print("Erro ao abrir arquivo de entrada.")
+        return
+
+    # medir tempos ou verificar passagens só faz sentido numa compilação de verdade
+    no_cache = args.time_passes or args.check_passes or args.backend == "python"
+    cache = None if no_cache else open_cache(args.cache_dir, args.cache_size)
+    options = options_from_args(args)
+    if cache is None:
+        program, diagnostics = compile_program(source, options)
+        code = None if program is None or outfile is None else format_mepa(program)
+    else:
+        # o cache guarda o texto .mep
+        code, diagnostics, _ = compile_cached(source, cache, options)
+        program = parse_mepa(code) if code is not None and args.run else None
+    sys.stdout.write(diagnostics)
+    if program is None and code is None:
+        return
+
+    if outfile is not None:
+        try:
+            with open(outfile, 'w', encoding='utf-8') as f:
+                f.write(code)
+            print(f"Sucesso! Gerado '{outfile}'")
+        except Exception as e:
+            print(f"Erro ao gravar arquivo de saída: {e}")
+            return
+
+    if args.run and args.backend == "python":
+        run_python_program(program)
+    elif args.run:
+        sys.stdout.flush()
+        run_program(program, args.limit, args.stacksize, args.programsize, args.memosize, args.recursion)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
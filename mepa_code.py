@@ -0,0 +1,79 @@
+from typing import Dict, List, Optional, Union
+
+#Representação do código MEPA em memória, compartilhada pelos geradores de
+#código, pelo otimizador peephole e pela execução direta (main.py --run).
+#O texto .mep é só uma das saídas (format_mepa) e uma das entradas (parse_mepa).
+
+END_INSTR = "FIM"
+
+#Rótulo de instrução. Desvios e chamadas guardam o próprio objeto que marca o
+#destino, então dois rótulos são o mesmo destino só se forem o mesmo objeto.
+class Label:
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+    __repr__ = __str__
+
+#Operando: número inteiro ou rótulo
+Arg = Union[int, Label]
+
+#Uma instrução MEPA: rótulo opcional, código e operandos
+class Instr:
+    __slots__ = ("label", "op", "args")
+
+    def __init__(self, op: str, args: Optional[List[Arg]] = None, label: Optional[Label] = None):
+        self.op = op
+        self.args = args or []
+        self.label = label
+
+    def __repr__(self):
+        return format_instr(self)
+
+def format_instr(ins: Instr) -> str:
+    text = f"{ins.op} {','.join(map(str, ins.args))}" if ins.args else ins.op
+    if ins.label:
+        return f"{ins.label}: {text}"
+    return f"     {text}"
+
+def format_mepa(prog: List[Instr]) -> str:
+    return "\n".join(format_instr(i) for i in prog)
+
+def is_number(a: str) -> bool:
+    return a.isdigit() or (a[:1] in ('+', '-') and a[1:].isdigit())
+
+#Converte o texto MEPA em instruções (até FIM, inclusive), no mesmo formato
+#aceito pelo interpretador: "[rótulo:] CÓDIGO [arg1,arg2,...]". Cada nome de
+#rótulo vira um único Label, seja ele definido ou só referenciado.
+def parse_mepa(text: str) -> List[Instr]:
+    prog = []
+    labels: Dict[str, Label] = {}
+
+    def label(name: str) -> Label:
+        if name not in labels:
+            labels[name] = Label(name)
+        return labels[name]
+
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith(';'):
+            continue
+        lab = None
+        parts = line.split()
+        if parts[0].endswith(':'):
+            lab = label(parts[0][:-1])
+            parts = parts[1:]
+        if not parts:
+            raise ValueError(f"instrução ausente: {line}")
+        op = parts[0].upper()
+        args = [int(a) if is_number(a) else label(a) for a in parts[1].split(',')] if len(parts) > 1 else []
+        prog.append(Instr(op, args, lab))
+        if op == END_INSTR:
+            break
+    if not prog or prog[-1].op != END_INSTR:
+        prog.append(Instr(END_INSTR))
+    return prog
@@ -0,0 +1,258 @@
+import sys
+from typing import Dict, List
+from mepa_code import END_INSTR, Instr, Label, format_mepa, parse_mepa
+
+#Otimizador peephole de código MEPA.
+#Lê qualquer programa .mep (gerado por este compilador ou não), aplica
+#reescritas locais, encadeamento de saltos e compactação de rótulos até
+#atingir um ponto fixo, e produz código semanticamente equivalente.
+#
+#Uso: python mepa_opt.py <entrada.mep> [saida.mep]
+
+JUMPS = ("DSVS", "DSVF")
+#Instruções após as quais a execução nunca segue para a linha seguinte
+TERMINATORS = ("DSVS", "RTPR", "RTPF", "PARA")
+#Comparações (sempre produzem 0/1) e suas inversas
+INVERSE_CMP = {"CMIG": "CMDG", "CMDG": "CMIG", "CMME": "CMAG", "CMAG": "CMME", "CMMA": "CMEG", "CMEG": "CMMA"}
+CONST_BINOPS = {
+    "SOMA": lambda a, b: a + b,
+    "SUBT": lambda a, b: a - b,
+    "MULT": lambda a, b: a * b,
+}
+
+#Operando numérico (os demais são rótulos)
+def is_number(a) -> bool:
+    return isinstance(a, int)
+
+#Instrução que sempre deixa 0 ou 1 no topo da pilha
+def is_boolean(ins: Instr) -> bool:
+    return ins.op in INVERSE_CMP or ins.op == "CRCT" and ins.args[0] in (0, 1)
+
+#Aplica todas as reescritas até não haver mudança
+def optimize(prog: List[Instr]) -> List[Instr]:
+    prog = list(prog)
+    for _ in range(100):
+        before = format_mepa(prog)
+        prog = compact_labels(prog)
+        prog = thread_jumps(prog)
+        prog = peephole(prog)
+        prog = remove_unreachable(prog)
+        prog = drop_unused_labels(prog)
+        if format_mepa(prog) == before:
+            break
+    return prog
+
+def optimize_text(text: str) -> str:
+    return format_mepa(optimize(parse_mepa(text)))
+
+def rename_labels(prog: List[Instr], alias: Dict[Label, Label]):
+    if not alias:
+        return
+    def final(name):
+        seen = set()
+        while name in alias and name not in seen:
+            seen.add(name)
+            name = alias[name]
+        return name
+    for ins in prog:
+        ins.args = [final(a) if a in alias else a for a in ins.args]
+
+#Retira os NADA: o rótulo passa para a instrução seguinte; rótulos que
+#acabam na mesma instrução são unificados. Um rótulo que precede o FIM
+#continua num NADA, pois o FIM encerra a leitura do programa.
+def compact_labels(prog: List[Instr]) -> List[Instr]:
+    out: List[Instr] = []
+    alias: Dict[Label, Label] = {}
+    pending: List[Label] = []
+    for ins in prog:
+        if ins.label:
+            pending.append(ins.label)
+            ins.label = None
+        if ins.op == "NADA":
+            continue
+        if pending:
+            if ins.op == END_INSTR:
+                out.append(Instr("NADA", label=pending[0]))
+            else:
+                ins.label = pending[0]
+            for name in pending[1:]:
+                alias[name] = pending[0]
+            pending = []
+        out.append(ins)
+    rename_labels(out, alias)
+    return out
+
+def label_index(prog: List[Instr]) -> Dict[Label, int]:
+    return {ins.label: k for k, ins in enumerate(prog) if ins.label}
+
+#Redireciona saltos que caem em outro DSVS; um DSVS para PARA/RTPR/RTPF vira a
+#própria instrução terminal
+def thread_jumps(prog: List[Instr]) -> List[Instr]:
+    where = label_index(prog)
+    for ins in prog:
+        if ins.op not in JUMPS or ins.args[0] not in where:
+            continue
+        target = ins.args[0]
+        seen = {target}
+        while True:
+            dest = prog[where[target]]
+            if dest.op != "DSVS" or dest.args[0] not in where or dest.args[0] in seen:
+                break
+            target = dest.args[0]
+            seen.add(target)
+        ins.args = [target]
+        dest = prog[where[target]]
+        if ins.op == "DSVS" and dest.op in ("PARA", "RTPR", "RTPF"):
+            ins.op, ins.args = dest.op, list(dest.args)
+    return prog
+
+#Reescritas locais em janelas de até quatro instruções. Só a primeira
+#instrução da janela pode ter rótulo, pois as demais são substituídas.
+def peephole(prog: List[Instr]) -> List[Instr]:
+    out: List[Instr] = []
+    k = 0
+    n = len(prog)
+    while k < n:
+        a = prog[k]
+        b = prog[k + 1] if k + 1 < n and not prog[k + 1].label else None
+        c = prog[k + 2] if b and k + 2 < n and not prog[k + 2].label else None
+        d = prog[k + 3] if c and k + 3 < n else None
+        nxt = prog[k + 1] if k + 1 < n else None
+
+        # salto para a instrução seguinte
+        if a.op in JUMPS and nxt is not None and nxt.label == a.args[0]:
+            if a.op == "DSVS":
+                if a.label:
+                    out.append(Instr("NADA", label=a.label))
+            else:
+                out.append(Instr("DMEM", [1], a.label))
+            k += 1
+            continue
+        if b is not None:
+            # AMEM/DMEM adjacentes se compensam
+            if a.op in ("AMEM", "DMEM") and b.op in ("AMEM", "DMEM") and is_number(a.args[0]) and is_number(b.args[0]):
+                delta = (a.args[0] if a.op == "AMEM" else -a.args[0]) + (b.args[0] if b.op == "AMEM" else -b.args[0])
+                if delta > 0:
+                    out.append(Instr("AMEM", [delta], a.label))
+                elif delta < 0:
+                    out.append(Instr("DMEM", [-delta], a.label))
+                elif a.label:
+                    out.append(Instr("NADA", label=a.label))
+                k += 2
+                continue
+            # desvio condicional sobre constante
+            if a.op == "CRCT" and b.op == "DSVF" and is_number(a.args[0]):
+                if a.args[0] == 0:
+                    out.append(Instr("DSVS", list(b.args), a.label))
+                elif a.label:
+                    out.append(Instr("NADA", label=a.label))
+                k += 2
+                continue
+            # comparação seguida de negação: comparação inversa
+            if a.op in INVERSE_CMP and b.op == "NEGA":
+                out.append(Instr(INVERSE_CMP[a.op], [], a.label))
+                k += 2
+                continue
+            # dupla negação
+            if a.op == "NEGA" and b.op == "NEGA":
+                if a.label:
+                    out.append(Instr("NADA", label=a.label))
+                k += 2
+                continue
+            # carregar e armazenar de volta no mesmo endereço
+            if a.op == "CRVL" and b.op == "ARMZ" and a.args == b.args:
+                if a.label:
+                    out.append(Instr("NADA", label=a.label))
+                k += 2
+                continue
+            if a.op == "CRCT" and b.op == "INVR" and is_number(a.args[0]):
+                out.append(Instr("CRCT", [-a.args[0]], a.label))
+                k += 2
+                continue
+            # CRCT a (já emitido); CRCT b; op  =>  CRCT (a op b), encadeando
+            # numa só passada somas como 0 + 0 + 0 + ...
+            if a.op == "CRCT" and not a.label and b.op in CONST_BINOPS and out and out[-1].op == "CRCT" \
+                    and is_number(a.args[0]) and is_number(out[-1].args[0]):
+                v = CONST_BINOPS[b.op](out[-1].args[0], a.args[0])
+                out[-1] = Instr("CRCT", [v], out[-1].label)
+                k += 2
+                continue
+        if c is not None:
+            # comparação com 0/1 de um resultado que já é 0/1
+            if a.op in INVERSE_CMP and b.op == "CRCT" and c.op in ("CMIG", "CMDG") and b.args[0] in (0, 1):
+                same = (b.args[0] == 1) == (c.op == "CMIG")
+                out.append(Instr(a.op if same else INVERSE_CMP[a.op], [], a.label))
+                k += 3
+                continue
+            # (x <> 0) falso  <=>  x = 0, que é exatamente o teste do DSVF
+            if a.op == "CRCT" and a.args[0] == 0 and b.op == "CMDG" and c.op == "DSVF":
+                out.append(Instr("DSVF", list(c.args), a.label))
+                k += 3
+                continue
+            # CRCT a; CRCT b; op  =>  CRCT (a op b)
+            if a.op == "CRCT" and b.op == "CRCT" and c.op in CONST_BINOPS and \
+                    is_number(a.args[0]) and is_number(b.args[0]):
+                v = CONST_BINOPS[c.op](a.args[0], b.args[0])
+                out.append(Instr("CRCT", [v], a.label))
+                k += 3
+                continue
+            # comparação; DSVF L1; DSVS L2; L1:  =>  comparação inversa; DSVF L2
+            # NEGA; DSVF L1; DSVS L2; L1:  =>  DSVF L2 (só se o operando do NEGA
+            # é 0/1; com outro valor o NEGA não inverte o teste do DSVF)
+            if (a.op in INVERSE_CMP or a.op == "NEGA" and not a.label and out and is_boolean(out[-1])) \
+                    and b.op == "DSVF" and c.op == "DSVS" and d is not None and d.label == b.args[0]:
+                if a.op == "NEGA":
+                    out.append(Instr("DSVF", list(c.args), a.label))
+                else:
+                    out.append(Instr(INVERSE_CMP[a.op], [], a.label))
+                    out.append(Instr("DSVF", list(c.args)))
+                k += 3
+                continue
+        out.append(a)
+        k += 1
+    return out
+
+#Remove o que vem depois de um terminador até a próxima instrução rotulada
+def remove_unreachable(prog: List[Instr]) -> List[Instr]:
+    out: List[Instr] = []
+    dead = False
+    for ins in prog:
+        if ins.label or ins.op == END_INSTR:
+            dead = False
+        if not dead:
+            out.append(ins)
+        if ins.op in TERMINATORS:
+            dead = True
+    return out
+
+def drop_unused_labels(prog: List[Instr]) -> List[Instr]:
+    used = {a for ins in prog for a in ins.args if isinstance(a, Label)}
+    for ins in prog:
+        if ins.label and ins.label not in used:
+            ins.label = None
+    return prog
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python mepa_opt.py <entrada.mep> [saida.mep]")
+        print("  sem arquivo de saída, o código otimizado é impresso na saída padrão")
+        return
+    try:
+        with open(sys.argv[1], 'r', encoding='utf-8') as f:
+            prog = parse_mepa(f.read())
+    except (OSError, ValueError) as e:
+        print(f"Erro ao ler programa MEPA: {e}")
+        return
+    before = sum(1 for i in prog if i.op != END_INSTR)
+    prog = optimize(prog)
+    text = format_mepa(prog)
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], 'w', encoding='utf-8') as f:
+            f.write(text)
+        after = sum(1 for i in prog if i.op != END_INSTR)
+        print(f"Sucesso! {before} -> {after} instruções em '{sys.argv[2]}'")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -19,9 +19,13 @@ import sys, traceback, getopt
 if sys.argv[0].endswith("mepa_pt.py"):
     from mepa_instr_pt import *
     from mepa_strings_pt import *
-else: ## default en
-    from mepa_instr_en import *
-    from mepa_strings_en import *
+else: ## default en; falls back to pt, the only one distributed here
+    try:
+        from mepa_instr_en import *
+        from mepa_strings_en import *
+    except ImportError:
+        from mepa_instr_pt import *
+        from mepa_strings_pt import *
     
 Usage = """
 Usage:
@@ -33,11 +37,14 @@ Usage:
          [--stacksize <integer> (500)]
          [--displaysize <integer> (10)]
          [--limit <integer> (10000)]
+         [--memosize <integer> (10000)]
+         [--recursion <integer> (None)]
          [--infile <file name> (stdin)]
          [--outfile <file name> (stdout)]
          [--progfile <file name> (stdin)]
          [--debug (False)]
          [--nocheck (False)]
+         [--verify (False)]
          [--silent (False)]
          [--step (False)]
 """
@@ -51,17 +58,20 @@ OPTIONS_DICT = {
                  "stacksize":   500,
                  "displaysize": 10,
                  "limit":       10000,
+                 "memosize":    10000,
+                 "recursion":   None,
                  "infile":      sys.stdin,
                  "outfile":     sys.stdout,
                  "progfile":    sys.stdin,
                  "debug":       False,
                  "nocheck":     False,
+                 "verify":      False,
                  "silent":      False,
                  "step":        False,
                }
                
-BOOL_OPTIONS = [ "help", "copyright", "debug", "nocheck", "silent", "step"]
-INT_OPTIONS =  [ "programsize", "stacksize", "displaysize", "limit"]
+BOOL_OPTIONS = [ "help", "copyright", "debug", "nocheck", "silent", "step", "verify"]
+INT_OPTIONS =  [ "programsize", "stacksize", "displaysize", "limit", "memosize", "recursion"]
 FILE_OPTIONS = [ "messfile", "infile", "outfile", "progfile"]
 
 def appendColumn(s): 
@@ -159,6 +169,54 @@ def inputProgram():
 
     return [P, LABEL_DICT]
 
+def loadProgram(prog):
+    """ Decodes an in-memory program: a list of instruction objects with
+        'op', 'args' (integers or label objects) and 'label' (label object
+        or None), as produced by the compiler. Same checks and result as
+        inputProgram, without going through program text.
+    """
+
+    LABEL_DICT = {}
+    P = []
+    count = 0
+    maxsize = OPTIONS_DICT["programsize"]
+    for ins in prog:
+        lab = "" if ins.label is None else str(ins.label)
+        inline = ("%s: " % lab if lab else "     ") + \
+                 " ".join([ins.op] + ([",".join(map(str, ins.args))] if ins.args else [])) + "\n"
+        if ins.op.upper()==END_INSTR:
+            break
+        if count+1>=maxsize:
+            Msg(PROGRAM_TOO_LARGE,quit=True,code=1)
+        try:
+            code = INSTR_DICT[ins.op.upper()]
+        except:
+            Msg(ILLEGAL_INSTRUCTION % (count,inline),quit=True,code=1)
+        if code in INSTR_0:
+            numargs = 0
+        elif code in INSTR_1:
+            numargs = 1
+        elif code in INSTR_2:
+            numargs = 2
+        elif code in INSTR_3:
+            numargs = 3
+        else:
+            impossible(7)
+        if len(ins.args)<numargs:
+            Msg(ILLEGAL_INSTRUCTION_ARGUMENTS % (count,inline),quit=True,code=1)
+        args = [a if isinstance(a, int) else str(a) for a in ins.args[:numargs]]
+        P.append([lab, ins.op, args, inline[:-1]])
+        if lab!="":
+            if lab in LABEL_DICT:
+                Msg(REDEFINED_LABEL % (count,inline),quit=True,code=1)
+            else:
+                LABEL_DICT[lab] = count
+        count += 1
+    else:
+        Msg(UNEXPECTED_EOF_PROGRAM,quit=True,code=1)
+
+    return [P, LABEL_DICT]
+
 def getLabel(s):
     """ Determines instruction label, if any. """
     p = s.split()
@@ -225,26 +283,28 @@ def fixArgs(P,L):
         args = p[2]
         for k in range(len(args)):
             a = args[k]
-            if (a[0] in ('+','-') and a[1:].isdigit()) or\
-               (a.isdigit()):
+            if isinstance(a, int):
                 pass
+            elif (a[0] in ('+','-') and a[1:].isdigit()) or\
+               (a.isdigit()):
+                args[k] = int(a)
             elif a in L:
-                args[k] = str(L[a])
+                args[k] = L[a]
             else:
                 Msg(ILLEGAL_ARGUMENT % count,quit=True,code=1)
             count += 1
             
 def makeMepa(P):
-    """ Transforms program into execution strings. """
+    """ Transforms program into pre-decoded instructions: pairs
+        (function name, integer arguments), decoded once before execution.
+    """
     MP = []
     for p in P:
         name = INSTR_DICT[p[1].upper()]
-        args = ",".join(p[2])
-        m = "%s(%s)" % (name,args)
-        MP.append(m)
+        MP.append((name, tuple(p[2])))
     return MP
 
 def dumpMepaP(MP):
-    for m in MP:
-        print(m)
+    for name, args in MP:
+        print("%s(%s)" % (name, ",".join(map(str, args))))
         
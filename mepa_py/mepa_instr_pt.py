@@ -44,6 +44,7 @@ INSTR_DICT = {
           "INPP": "init",
           "CONT": "cont",
           "DUMP": "dump",
+          "MEMG": "memstore",
           
           # 1 arg
           "CRCT": "ldct",
@@ -68,6 +69,9 @@ INSTR_DICT = {
           "ENRT": "entlabl",
           "CREG": "ldgaddr",
           "CHPR": "call",
+          "MEMB": "memlook",
+          "CHPF": "callleaf",
+          "RTPF": "retleaf",
 
           # 3 args
           "CHPP": "callpar",
@@ -96,6 +100,7 @@ INSTR_0 = [
           "init",
           "cont",
           "dump",
+          "memstore",
           ]
 
 # One arg instructions
@@ -125,6 +130,9 @@ INSTR_2 = [
           "entlabl",
           "ldgaddr",
           "call",
+          "memlook",
+          "callleaf",
+          "retleaf",
          ]
 
 # Three args instructions
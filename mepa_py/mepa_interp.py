@@ -13,15 +13,18 @@
 #------------------------------------------------------------------------#
 
 import traceback
+from collections import OrderedDict
 
 from mepa_defs import *
+from mepa_verify import verify
 
 # Jump instructions
-JMP_INSTR = [ "jmp", "retproc", "call", "callpar" ]
+JMP_INSTR = [ "jmp", "retproc", "call", "callpar", "callleaf", "retleaf" ]
 
 def execute(MP,P,L,msfile,infile,outfile):
     """Main execution function. """
     global s, i, D, M, labels, debug, nocheck, inf, outf, inputline, check, stepexec
+    global memo, memokeys, memosize, fresh
     
     inf = infile
     outf = outfile
@@ -40,24 +43,58 @@ def execute(MP,P,L,msfile,infile,outfile):
     debug = OPTIONS_DICT["debug"]
     nocheck = OPTIONS_DICT["nocheck"]
     check = not nocheck
+    
+    # programs verified at load time run without tag checks; allocated
+    # slots are then cleared, so no stale value of a dead frame is seen.
+    # Their memory is sized by the stack bound of the verifier: exactly
+    # without recursion, for --recursion nested recursive calls otherwise
+    fresh = False
+    if check or OPTIONS_DICT["verify"]:
+        v, error = verify(MP)
+        if error is not None:
+            if OPTIONS_DICT["verify"]:
+                Msg(UNVERIFIED_PROGRAM % (error.addr, P[error.addr][3].strip() if error.addr<len(P) else "", error.msg),quit=True,code=1)
+        else:
+            if OPTIONS_DICT["verify"]:
+                Msg(VERIFIED_PROGRAM % len(v.checks))
+                for addr, what in v.checks:
+                    Msg(REDUNDANT_CHECK % (addr, P[addr][3].strip(), what))
+                if v.frame:
+                    Msg(STACK_DEPTH_RECURSIVE % (v.depth, v.frame))
+                else:
+                    Msg(STACK_DEPTH % v.depth)
+            if not v.frame:
+                M = v.depth * [None]
+            elif OPTIONS_DICT["recursion"]:
+                M = (v.depth + OPTIONS_DICT["recursion"]*v.frame) * [None]
+            check = False
+            fresh = True
     limit = OPTIONS_DICT["limit"]
     stepexec = OPTIONS_DICT["step"]
     count = 0
     
+    # memo table of function results: (MEMB address, arguments) -> result,
+    # least recently used first; keys of the calls still running
+    memo = OrderedDict()
+    memokeys = []
+    memosize = OPTIONS_DICT["memosize"]
+    
+    # instruction functions resolved once: (function, jumps?, arguments)
+    code = [(globals()[name], name in JMP_INSTR, args) for name, args in MP]
+    
     # execution loop
     while True:
         li = i
         try:
             try:
-                ins = MP[i]
+                fun, jump, args = code[i]
             except:
                 Msg(PROG_END,quit=True,code=1)
             if debug:
                 deb(P)
-            par = ins.find('(')
-            if not ins[:par] in JMP_INSTR:
+            if not jump:
                 i += 1
-            eval(ins)
+            fun(*args)
             if debug:
                 Msg('')
             if stepexec:
@@ -271,7 +308,10 @@ def jmpf(p):
     s -= 1
 
 def alloc(n):
-    global s
+    global s, M
+    if fresh:
+        assert len(M)>s+n
+        M[s+1:s+n+1] = n*[None]
     s += n
 
 def dealloc(n):
@@ -302,6 +342,57 @@ def retproc(n):
         D[t-1] = M[D[t]-1][0]
         t -= 1
         
+def callleaf(p,k):
+    """ Call of a leaf procedure of level k, one that calls nothing: the
+        frame has the layout built by CHPR/ENPR, but only the return
+        address and the display entry it replaces are stored, and the
+        procedure starts at p with no ENPR. """
+    global i, s, D, M
+    assert len(M)>(s+4)
+    M[s+1] = [i+1,3]
+    M[s+2] = [D[k],2]
+    s += 4
+    top(2,2)
+    D[k] = s+1
+    i = p
+
+def retleaf(k,n):
+    """ Return from a leaf procedure: only D[k] changed, so the display
+        is restored without walking the static chain. """
+    global i, s, D, M
+    if check:
+        assert M[s-2][1]==2 and M[s-3][1]==3
+    top(2,2)
+    D[k] = M[s-2][0]
+    i = M[s-3][0]
+    s -= (n+4)
+
+def memlook(k,n):
+    """ Memoized function entry: returns at once if the arguments are in
+        the memo table, else remembers them for memstore. """
+    global i, M, D, memo, memokeys
+    base = D[k]
+    key = (i-1,) + tuple(M[base-5-j][0] for j in range(n))
+    ret = base-5-n
+    debnum(ret)
+    if key in memo:
+        memo.move_to_end(key)
+        M[ret] = [memo[key],0]
+        retproc(n)
+    else:
+        memokeys.append((key,ret))
+
+def memstore():
+    """ Memoized function exit: stores the result, evicting the least
+        recently used entry when the table is full. """
+    global M, memo, memokeys, memosize, check
+    key, ret = memokeys.pop()
+    if check:
+        assert M[ret][1]==0
+    memo[key] = M[ret][0]
+    if len(memo)>memosize:
+        memo.popitem(last=False)
+
 def indx(k):
     global s, M
     if check:
@@ -419,7 +510,7 @@ def dump():
         if D[k]!=None:
             Msg("%2d: %5d" % (k,D[k]))
     UndMsg(MEMORY,'-')
-    for k in range(OPTIONS_DICT["stacksize"]):
+    for k in range(len(M)):
         if M[k]!=None and M[k][0]!=None:
             Msg("%2d: %5d (%d)" % (k,M[k][0],M[k][1]))
     UndMsg(LABELS,'-')
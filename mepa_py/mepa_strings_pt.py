@@ -60,3 +60,33 @@ END_DUMP = "\nFim de despejo"
 ILLEGAL_DEBUG_VALUE = "Valor inválido para depuração"
 OPEN_FILE_ERROR = "Erro na abertura do arquivo '%s'"
 ILLEGAL_VALUE = "Valor inválido encontrado durante a interpretação da instrução %d"
+
+# mepa_verify.py
+
+VERIFIED_PROGRAM = "Programa verificado: %d verificações de tipo dispensadas"
+REDUNDANT_CHECK = "%5d  %-30s %s"
+UNVERIFIED_PROGRAM = "Programa não verificado (%3d)  %s: %s"
+STACK_DEPTH = "Pilha: %d posições"
+STACK_DEPTH_RECURSIVE = "Pilha: %d posições mais %d por chamada recursiva aninhada"
+CHECK_OPERANDS = "operandos inteiros"
+CHECK_OPERAND = "operando inteiro"
+CHECK_CONDITION = "condição inteira"
+CHECK_FRAME = "cabeçalho do registro de ativação"
+CHECK_RESULT = "resultado inteiro"
+VERIFY_NO_INIT = "o programa não começa com INPP"
+VERIFY_OUT_OF_PROGRAM = "desvio ou execução para fora do programa"
+VERIFY_NOT_PROCEDURE = "chamada a uma instrução que não é ENPR"
+VERIFY_NOT_LEAF = "CHPF para uma rotina que não é procedimento folha deste nível"
+VERIFY_LEAF_CALL = "chamada dentro de procedimento folha"
+VERIFY_RETURNS = "RTPRs/RTPFs com números de argumentos diferentes"
+VERIFY_NO_RETURN = "procedimento sem RTPR/RTPF"
+VERIFY_HEIGHTS = "alturas da pilha diferentes nos caminhos que chegam aqui"
+VERIFY_SHARED_CODE = "código compartilhado por duas rotinas"
+VERIFY_UNSUPPORTED = "instrução não verificável"
+VERIFY_ARGUMENT = "argumento negativo"
+VERIFY_CALL_LEVEL = "nível da chamada incompatível com o da rotina"
+VERIFY_RETURN = "RTPR/RTPF fora do procedimento correspondente ou com a pilha não vazia"
+VERIFY_MEMO = "MEMB/MEMG fora da entrada/saída do procedimento"
+VERIFY_UNDERFLOW = "pilha vazia"
+VERIFY_ACCESS = "acesso fora do registro de ativação"
+VERIFY_FEW_ARGUMENTS = "chamada com menos valores empilhados que os usados pelo procedimento"
@@ -0,0 +1,358 @@
+
+#------------------------------------------------------------------------#
+#                                                                        #
+# Load-time verification of MEPA programs                                #
+#                                                                        #
+#------------------------------------------------------------------------#
+
+# An abstract interpretation over the control-flow graph of the program,
+# one routine (main program, procedure entered by CHPR/ENPR or leaf
+# procedure entered by CHPF) at a time. For the instructions handled here
+# every slot of an activation record (locals, temporaries, arguments)
+# holds an integer (tag 0) or nothing, and the frame headers (tags 1, 2
+# and 3) are written only by CHPR/ENPR and CHPF.
+# The abstract state at each instruction is thus the stack height above
+# the frame base; the analysis proves that heights agree where paths
+# meet, that every memory access stays inside an activation record and
+# off its header, and that calls, returns and memo instructions follow
+# the calling convention. Then none of the tag checks made by the
+# interpreter can fail and the program may run without them.
+#
+# The same heights, together with the call graph, bound the stack the
+# program needs: exactly for programs without recursion, and as a fixed
+# part plus a cost per nested recursive call otherwise.
+
+from mepa_defs import *
+
+BINOPS = ["add", "subt", "mult", "divi", "andd", "orr",
+          "less", "grt", "eql", "dif", "leq", "geq"]
+UNOPS = ["inv", "nott"]
+
+# Instructions whose interpreter functions check tags, and what is checked
+CHECKED = dict([(b, CHECK_OPERANDS) for b in BINOPS] +
+               [(u, CHECK_OPERAND) for u in UNOPS] +
+               [("writ", CHECK_OPERAND), ("jmpf", CHECK_CONDITION),
+                ("retproc", CHECK_FRAME), ("retleaf", CHECK_FRAME),
+                ("memstore", CHECK_RESULT)])
+
+SUPPORTED = BINOPS + UNOPS + ["nop", "halt", "read", "writ", "init",
+             "ldct", "jmp", "jmpf", "alloc", "dealloc", "entproc",
+             "retproc", "ldvl", "stvl", "call", "memlook", "memstore",
+             "callleaf", "retleaf"]
+
+class VerifyError(Exception):
+    def __init__(self, addr, msg):
+        self.addr = addr
+        self.msg = msg
+
+class Routine:
+    """ Main program (entry 0), procedure (entry at its ENPR) or leaf
+        procedure (entry at its first instruction). """
+    def __init__(self, entry, level, nargs, leaf=False):
+        self.entry = entry
+        self.level = level
+        self.nargs = nargs      # RTPR argument; None for the main program
+        self.leaf = leaf        # entered by CHPF, returns by RTPF
+        self.below = 0          # slots used below the frame header
+        self.top = 0            # highest stack height in the frame
+        self.memo = False
+        self.heights = {}       # address -> stack height before it
+        self.calls = []         # (callee entry, height, address)
+        self.nonlocal_ = []     # (level, offset, address)
+
+def verify(MP):
+    """ Verifies pre-decoded program MP. Returns (verifier, None), whose
+        'checks' is the list of (address, description) of the tag checks
+        proved redundant and 'depth', 'frame' the stack bound (see
+        stack_depth), or (None, VerifyError) if it cannot be verified.
+    """
+    try:
+        v = Verifier(MP)
+        v.run()
+        return v, None
+    except VerifyError as e:
+        return None, e
+
+class Verifier:
+    def __init__(self, MP):
+        self.MP = MP
+        self.routines = {}
+        self.owner = {}
+        self.targets = set()
+        for name, args in MP:
+            if name in ("jmp", "jmpf"):
+                self.targets.add(args[0])
+
+    def fetch(self, addr):
+        if not 0<=addr<len(self.MP):
+            raise VerifyError(addr, VERIFY_OUT_OF_PROGRAM)
+        return self.MP[addr]
+
+    def run(self):
+        if not self.MP or self.MP[0][0]!="init":
+            raise VerifyError(0, VERIFY_NO_INIT)
+        main = Routine(0, 0, None)
+        self.routines[0] = main
+        pending = [main]
+        while pending:
+            r = pending.pop()
+            for callee in self.analyze(r):
+                pending.append(callee)
+        self.check_nonlocal()
+        for r in self.routines.values():
+            for callee, h, addr in r.calls:
+                if h<self.routines[callee].below:
+                    raise VerifyError(addr, VERIFY_FEW_ARGUMENTS)
+        checks = []
+        for r in self.routines.values():
+            for addr in r.heights:
+                name = self.MP[addr][0]
+                if name in CHECKED:
+                    checks.append((addr, CHECKED[name]))
+        checks.sort()
+        self.checks = checks
+        self.depth, self.frame = self.stack_depth()
+
+    def procedure(self, p, addr):
+        """ Routine entered at p (ENPR, possibly after NADAs), created on
+            the first call to it. """
+        q = p
+        while self.fetch(q)[0]=="nop":
+            q += 1
+        if q in self.routines:
+            if self.routines[q].leaf:
+                raise VerifyError(addr, VERIFY_NOT_PROCEDURE)
+            return self.routines[q], False
+        name, args = self.fetch(q)
+        if name!="entproc" or args[0]<1:
+            raise VerifyError(addr, VERIFY_NOT_PROCEDURE)
+        r = Routine(q, args[0], self.returns(q+1, "retproc"))
+        self.routines[q] = r
+        for a in range(p, q):
+            if self.owner.setdefault(a, r) is not r:
+                raise VerifyError(a, VERIFY_SHARED_CODE)
+        return r, True
+
+    def leaf(self, p, k, addr):
+        """ Leaf procedure of level k entered at p by CHPF, created on the
+            first call to it. """
+        if p in self.routines:
+            r = self.routines[p]
+            if not r.leaf or r.level!=k:
+                raise VerifyError(addr, VERIFY_NOT_LEAF)
+            return r, False
+        if k<1:
+            raise VerifyError(addr, VERIFY_CALL_LEVEL)
+        r = Routine(p, k, self.returns(p, "retleaf"), leaf=True)
+        self.routines[p] = r
+        return r, True
+
+    def returns(self, start, ret):
+        """ Number of arguments of the procedure whose body starts at
+            'start': the last argument of the 'ret' instructions (RTPR or
+            RTPF) reachable from there (all must agree). """
+        seen = set()
+        work = [start]
+        nargs = None
+        while work:
+            a = work.pop()
+            if a in seen:
+                continue
+            seen.add(a)
+            name, args = self.fetch(a)
+            if name==ret:
+                if nargs is not None and args[-1]!=nargs:
+                    raise VerifyError(a, VERIFY_RETURNS)
+                nargs = args[-1]
+            elif name=="jmp":
+                work.append(args[0])
+            elif name=="jmpf":
+                work += [args[0], a+1]
+            elif name!="halt":
+                work.append(a+1)
+        if nargs is None:
+            raise VerifyError(start, VERIFY_NO_RETURN)
+        return nargs
+
+    def analyze(self, r):
+        """ Stack heights of routine r; returns the procedures it calls
+            that were not seen before. """
+        new = []
+        start = r.entry if r.leaf else r.entry+1
+        self.owner[r.entry] = r
+        work = [(start, 0)]
+        while work:
+            addr, h = work.pop()
+            if addr in r.heights:
+                if r.heights[addr]!=h:
+                    raise VerifyError(addr, VERIFY_HEIGHTS)
+                continue
+            if self.owner.get(addr, r) is not r:
+                raise VerifyError(addr, VERIFY_SHARED_CODE)
+            name, args = self.fetch(addr)
+            if name not in SUPPORTED or name in ("init", "entproc"):
+                raise VerifyError(addr, VERIFY_UNSUPPORTED)
+            self.owner[addr] = r
+            r.heights[addr] = h
+            pops, pushes = 0, 0
+            succ = [addr+1]
+            if name in BINOPS:
+                pops, pushes = 2, 1
+            elif name in UNOPS:
+                pops, pushes = 1, 1
+            elif name in ("read", "ldct"):
+                pushes = 1
+            elif name=="writ":
+                pops = 1
+            elif name=="alloc":
+                if args[0]<0:
+                    raise VerifyError(addr, VERIFY_ARGUMENT)
+                pushes = args[0]
+            elif name=="dealloc":
+                if args[0]<0:
+                    raise VerifyError(addr, VERIFY_ARGUMENT)
+                pops = args[0]
+            elif name=="jmp":
+                succ = [args[0]]
+            elif name=="jmpf":
+                pops = 1
+                succ = [args[0], addr+1]
+            elif name=="halt":
+                succ = []
+            elif name=="ldvl":
+                self.access(r, args[0], args[1], h, addr)
+                pushes = 1
+            elif name=="stvl":
+                self.access(r, args[0], args[1], h, addr)
+                pops = 1
+            elif name in ("call", "callleaf") and r.leaf:
+                raise VerifyError(addr, VERIFY_LEAF_CALL)
+            elif name=="call":
+                callee, created = self.procedure(args[0], addr)
+                if args[1]!=r.level or callee.level>r.level+1:
+                    raise VerifyError(addr, VERIFY_CALL_LEVEL)
+                if created:
+                    new.append(callee)
+                r.calls.append((callee.entry, h, addr))
+                pops = callee.nargs
+            elif name=="callleaf":
+                callee, created = self.leaf(args[0], args[1], addr)
+                if callee.level>r.level+1:
+                    raise VerifyError(addr, VERIFY_CALL_LEVEL)
+                if created:
+                    new.append(callee)
+                r.calls.append((callee.entry, h, addr))
+                pops = callee.nargs
+            elif name=="retleaf":
+                if not r.leaf or h!=0 or args[0]!=r.level:
+                    raise VerifyError(addr, VERIFY_RETURN)
+                succ = []
+            elif name=="retproc":
+                if r.nargs is None or r.leaf or h!=0:
+                    raise VerifyError(addr, VERIFY_RETURN)
+                if r.memo and (self.MP[addr-1][0]!="memstore" or addr in self.targets):
+                    raise VerifyError(addr, VERIFY_MEMO)
+                succ = []
+            elif name=="memlook":
+                if addr!=r.entry+1 or r.nargs is None or r.leaf or h!=0 or \
+                   args[0]!=r.level or args[1]!=r.nargs:
+                    raise VerifyError(addr, VERIFY_MEMO)
+                r.memo = True
+                r.below = max(r.below, r.nargs+1)
+            elif name=="memstore":
+                if not r.memo or self.fetch(addr+1)[0]!="retproc":
+                    raise VerifyError(addr, VERIFY_MEMO)
+            if h<pops:
+                raise VerifyError(addr, VERIFY_UNDERFLOW)
+            r.top = max(r.top, h-pops+pushes)
+            for a in succ:
+                work.append((a, h-pops+pushes))
+        return new
+
+    def access(self, r, m, n, h, addr):
+        """ Memory access to offset n of the frame of level m. """
+        if m>r.level or m<0 or -5<n<0:
+            raise VerifyError(addr, VERIFY_ACCESS)
+        if m<r.level:
+            r.nonlocal_.append((m, n, addr))
+        elif n>=0:
+            if n>=h:
+                raise VerifyError(addr, VERIFY_ACCESS)
+        elif r.nargs is None:
+            raise VerifyError(addr, VERIFY_ACCESS)
+        else:
+            r.below = max(r.below, -4-n)
+
+    def check_nonlocal(self):
+        """ A frame of level m seen from a deeper routine is suspended at
+            one of its calls leading there: accesses must fall below the
+            height of all such calls, or among the caller's slots. """
+        callers = {}
+        for r in self.routines.values():
+            for callee, h, addr in r.calls:
+                callers.setdefault(callee, []).append((r, h))
+        for r in list(self.routines.values()):
+            for m, n, addr in r.nonlocal_:
+                seen = set([r.entry])
+                work = [r.entry]
+                frames = []
+                while work:
+                    e = work.pop()
+                    for x, h in callers.get(e, []):
+                        if x.level>m:
+                            if x.entry not in seen:
+                                seen.add(x.entry)
+                                work.append(x.entry)
+                        else:
+                            frames.append((x, h))
+                for x, h in frames:
+                    if n>=0:
+                        if n>=h:
+                            raise VerifyError(addr, VERIFY_ACCESS)
+                    elif x.nargs is None:
+                        raise VerifyError(addr, VERIFY_ACCESS)
+                    else:
+                        x.below = max(x.below, -4-n)
+
+    def stack_depth(self):
+        """ Stack slots needed: (depth, 0) if no routine is recursive,
+            else (depth, frame), where depth+k*frame slots suffice for
+            any execution with at most k nested recursive calls active.
+            A call made at height h places the callee's frame h+4 slots
+            above the caller's base (CHPR header and ENPR display link, or
+            the CHPF frame of the same layout).
+        """
+        reach = {}
+        for e in self.routines:
+            seen = set()
+            work = [e]
+            while work:
+                for c, h, addr in self.routines[work.pop()].calls:
+                    if c not in seen:
+                        seen.add(c)
+                        work.append(c)
+            reach[e] = seen
+        # strongly connected components of the call graph: a call inside
+        # one is recursive and costs at most 'frame'; the others form a
+        # DAG along which the deepest chain is found
+        comp = {}
+        for e in self.routines:
+            comp[e] = frozenset([e] + [c for c in reach[e] if e in reach[c]])
+        frame = 0
+        for e, r in self.routines.items():
+            for c, h, addr in r.calls:
+                if c in comp[e]:
+                    frame = max(frame, h+4)
+        depth = {}
+        def deepest(S):
+            if S not in depth:
+                d = 0
+                for e in S:
+                    r = self.routines[e]
+                    d = max(d, r.top)
+                    for c, h, addr in r.calls:
+                        if c not in S:
+                            d = max(d, h+4+deepest(comp[c]))
+                depth[S] = d
+            return depth[S]
+        return deepest(comp[0]), frame
@@ -6,7 +6,7 @@ _tabversion = '3.10'
 
 _lr_method = 'LALR'
 
-_lr_signature = 'nonassocEQUALSNELTLEGTGEleftPLUSMINUSORleftTIMESDIVANDrightNOTUMINUSAND ASSIGN BEGIN BOOLEAN COLON COMMA DIV DO DOT ELSE END EQUALS FALSE FUNCTION GE GT ID IF INTEGER LE LPAREN LT MINUS NE NOT NUMBER OR PLUS PROCEDURE PROGRAM READ RPAREN SEMI THEN TIMES TRUE VAR WHILE WRITEprograma : PROGRAM ID SEMI bloco DOTbloco : secao_vars_opt secao_sub_opt comando_compostosecao_vars_opt : VAR declaracao_vars_lista\n| emptydeclaracao_vars : lista_ids COLON tipodeclaracao_vars_lista : declaracao_vars_lista declaracao_vars SEMI\n| declaracao_vars SEMIlista_ids : lista_ids COMMA ID\n| IDsecao_sub_opt : secao_sub_opt declaracao_proc SEMI\n| secao_sub_opt declaracao_func SEMI\n| emptydeclaracao_proc : PROCEDURE ID params_opt SEMI blocodeclaracao_func : FUNCTION ID params_opt COLON tipo SEMI blocoparams_opt : LPAREN declaracao_params_lista RPAREN\n| emptydeclaracao_params_lista : declaracao_params_lista SEMI declaracao_vars\n| declaracao_varsleitura : READ LPAREN lista_ids RPARENescrita : WRITE LPAREN lista_exprs RPARENtipo : INTEGER\n| BOOLEANlista_comandos : lista_comandos SEMI comando\n| comandocomando_composto : BEGIN lista_comandos ENDcomando : atribuicao\n| condicional\n| repeticao\n| leitura\n| escrita\n| chamada_proc\n| comando_composto\n| emptychamada_proc : ID LPAREN lista_exprs RPAREN\n| ID LPAREN RPARENcondicional : IF expressao THEN comando\n| IF expressao THEN comando ELSE comandorepeticao : WHILE expressao DO comandoatribuicao : ID ASSIGN expressaoexpressao : expr_simples relacao expr_simples\n| expr_simplesrelacao : EQUALS\n| NE\n| LT\n| LE\n| GT\n| GElista_exprs : lista_exprs COMMA expressao\n| expressaoexpr_simples : expr_simples PLUS termo\n| expr_simples MINUS termo\n| expr_simples OR termo\n| termotermo : termo TIMES fator\n| termo DIV fator\n| termo AND fator\n| fatorfator : variavel\n| numero\n| logico\n| LPAREN expressao RPAREN\n| NOT fator\n| chamada_funcfator : MINUS fator %prec UMINUSchamada_func : ID LPAREN lista_exprs RPAREN\n| ID LPAREN RPARENvariavel : IDnumero : NUMBERlogico : TRUE\n| FALSEempty :'
+_lr_signature = 'nonassocEQUALSNELTLEGTGEleftPLUSMINUSORleftTIMESDIVANDrightNOTUMINUSAND ASSIGN BEGIN BOOLEAN COLON COMMA DIV DO DOT ELSE END EQUALS FALSE FUNCTION GE GT ID IF INTEGER LE LPAREN LT MINUS NE NOT NUMBER OR PLUS PROCEDURE PROGRAM READ RPAREN SEMI THEN TIMES TRUE VAR WHILE WRITEprograma : PROGRAM ID SEMI bloco DOTbloco : secao_vars_opt secao_sub_opt comando_compostosecao_vars_opt : VAR declaracao_vars_lista\n                      | emptydeclaracao_vars : lista_ids COLON tipodeclaracao_vars_lista : declaracao_vars_lista declaracao_vars SEMI\n                             | declaracao_vars SEMIlista_ids : lista_ids COMMA ID\n                 | IDsecao_sub_opt : secao_sub_opt declaracao_proc SEMI\n                      | secao_sub_opt declaracao_func SEMI\n                      | emptydeclaracao_proc : PROCEDURE ID params_opt SEMI blocodeclaracao_func : FUNCTION ID params_opt COLON tipo SEMI blocoparams_opt : LPAREN declaracao_params_lista RPAREN\n                  | emptydeclaracao_params_lista : declaracao_params_lista SEMI declaracao_vars\n                               | declaracao_varsleitura : READ LPAREN lista_ids RPARENescrita : WRITE LPAREN lista_exprs RPARENtipo : INTEGER\n            | BOOLEANlista_comandos : lista_comandos SEMI comando\n                      | comandocomando_composto : BEGIN lista_comandos ENDcomando : atribuicao\n               | condicional\n               | repeticao\n               | leitura\n               | escrita\n               | chamada_proc\n               | comando_composto\n               | emptychamada_proc : ID LPAREN lista_exprs RPAREN\n                    | ID LPAREN RPARENcondicional : IF expressao THEN comando\n                   | IF expressao THEN comando ELSE comandorepeticao : WHILE expressao DO comandoatribuicao : ID ASSIGN expressaoexpressao : expr_simples relacao expr_simples\n                 | expr_simplesrelacao : EQUALS\n               | NE\n               | LT\n               | LE\n               | GT\n               | GElista_exprs : lista_exprs COMMA expressao\n                   | expressaoexpr_simples : expr_simples PLUS termo\n                    | expr_simples MINUS termo\n                    | expr_simples OR termo\n                    | termotermo : termo TIMES fator\n             | termo DIV fator\n             | termo AND fator\n             | fatorfator : variavel\n             | numero\n             | logico\n             | LPAREN expressao RPAREN\n             | NOT fator\n             | chamada_funcfator : MINUS fator %prec UMINUSchamada_func : ID LPAREN lista_exprs RPAREN\n                    | ID LPAREN RPARENvariavel : IDnumero : NUMBERlogico : TRUE\n              | FALSEempty :'
     
 _lr_action_items = {'PROGRAM':([0,],[2,]),'$end':([1,9,],[0,-1,]),'ID':([2,7,12,19,20,21,23,25,39,40,45,51,52,53,57,62,63,70,71,73,81,82,83,84,85,86,87,88,89,90,91,92,93,94,98,99,107,124,127,],[3,15,15,38,43,44,-7,49,65,65,-6,38,65,65,65,65,65,15,65,15,38,65,65,65,65,-42,-43,-44,-45,-46,-47,65,65,65,65,38,65,15,38,]),'SEMI':([3,13,16,17,18,19,22,28,29,30,31,32,33,34,35,36,37,43,46,47,48,50,51,55,56,58,59,60,61,64,65,66,67,68,72,74,76,77,79,81,95,97,99,103,104,106,108,109,110,111,112,113,114,115,116,118,119,120,121,122,123,125,127,128,129,131,132,],[4,23,-2,26,27,-71,45,51,-24,-26,-27,-28,-29,-30,-31,-32,-33,-71,-5,-21,-22,-25,-71,-41,-53,-57,-58,-59,-60,-63,-67,-68,-69,-70,102,-16,-23,-39,-35,-71,-64,-62,-71,124,-18,-34,-36,-40,-50,-51,-52,-54,-55,-56,-61,-66,-38,-19,-20,-13,-15,130,-71,-65,-17,-37,-14,]),'VAR':([4,102,130,],[7,7,7,]),'BEGIN':([4,6,8,10,11,12,19,23,26,27,45,51,81,99,102,127,130,],[-71,-71,-4,19,-12,-3,19,-7,-10,-11,-6,19,19,19,-71,19,-71,]),'PROCEDURE':([4,6,8,10,11,12,23,26,27,45,102,130,],[-71,-71,-4,20,-12,-3,-7,-10,-11,-6,-71,-71,]),'FUNCTION':([4,6,8,10,11,12,23,26,27,45,102,130,],[-71,-71,-4,21,-12,-3,-7,-10,-11,-6,-71,-71,]),'DOT':([5,16,50,],[9,-2,-25,]),'COLON':([14,15,44,49,74,75,123,],[24,-9,-71,-8,-16,105,-15,]),'COMMA':([14,15,49,55,56,58,59,60,61,64,65,66,67,68,78,80,95,97,100,101,109,110,111,112,113,114,115,116,117,118,126,128,],[25,-9,-8,-41,-53,-57,-58,-59,-60,-63,-67,-68,-69,-70,107,-49,-64,-62,25,107,-40,-50,-51,-52,-54,-55,-56,-61,107,-66,-48,-65,]),'RPAREN':([15,46,47,48,49,53,55,56,58,59,60,61,64,65,66,67,68,78,80,95,96,97,98,100,101,103,104,109,110,111,112,113,114,115,116,117,118,126,128,129,],[-9,-5,-21,-22,-8,79,-41,-53,-57,-58,-59,-60,-63,-67,-68,-69,-70,106,-49,-64,116,-62,118,120,121,123,-18,-40,-50,-51,-52,-54,-55,-56,-61,128,-66,-48,-65,-17,]),'IF':([19,51,81,99,127,],[39,39,39,39,39,]),'WHILE':([19,51,81,99,127,],[40,40,40,40,40,]),'READ':([19,51,81,99,127,],[41,41,41,41,41,]),'WRITE':([19,51,81,99,127,],[42,42,42,42,42,]),'END':([19,28,29,30,31,32,33,34,35,36,37,50,51,55,56,58,59,60,61,64,65,66,67,68,76,77,79,81,95,97,99,106,108,109,110,111,112,113,114,115,116,118,119,120,121,127,128,131,],[-71,50,-24,-26,-27,-28,-29,-30,-31,-32,-33,-25,-71,-41,-53,-57,-58,-59,-60,-63,-67,-68,-69,-70,-23,-39,-35,-71,-64,-62,-71,-34,-36,-40,-50,-51,-52,-54,-55,-56,-61,-66,-38,-19,-20,-71,-65,-37,]),'INTEGER':([24,105,],[47,47,]),'BOOLEAN':([24,105,],[48,48,]),'ELSE':([30,31,32,33,34,35,36,37,50,55,56,58,59,60,61,64,65,66,67,68,77,79,81,95,97,99,106,108,109,110,111,112,113,114,115,116,118,119,120,121,127,128,131,],[-26,-27,-28,-29,-30,-31,-32,-33,-25,-41,-53,-57,-58,-59,-60,-63,-67,-68,-69,-70,-39,-35,-71,-64,-62,-71,-34,127,-40,-50,-51,-52,-54,-55,-56,-61,-66,-38,-19,-20,-71,-65,-37,]),'ASSIGN':([38,],[52,]),'LPAREN':([38,39,40,41,42,43,44,52,53,57,62,63,65,71,82,83,84,85,86,87,88,89,90,91,92,93,94,98,107,],[53,62,62,70,71,73,73,62,62,62,62,62,98,62,62,62,62,62,-42,-43,-44,-45,-46,-47,62,62,62,62,62,]),'NOT':([39,40,52,53,57,62,63,71,82,83,84,85,86,87,88,89,90,91,92,93,94,98,107,],[63,63,63,63,63,63,63,63,63,63,63,63,-42,-43,-44,-45,-46,-47,63,63,63,63,63,]),'MINUS':([39,40,52,53,55,56,57,58,59,60,61,62,63,64,65,66,67,68,71,82,83,84,85,86,87,88,89,90,91,92,93,94,95,97,98,107,109,110,111,112,113,114,115,116,118,128,],[57,57,57,57,84,-53,57,-57,-58,-59,-60,57,57,-63,-67,-68,-69,-70,57,57,57,57,57,-42,-43,-44,-45,-46,-47,57,57,57,-64,-62,57,57,84,-50,-51,-52,-54,-55,-56,-61,-66,-65,]),'NUMBER':([39,40,52,53,57,62,63,71,82,83,84,85,86,87,88,89,90,91,92,93,94,98,107,],[66,66,66,66,66,66,66,66,66,66,66,66,-42,-43,-44,-45,-46,-47,66,66,66,66,66,]),'TRUE':([39,40,52,53,57,62,63,71,82,83,84,85,86,87,88,89,90,91,92,93,94,98,107,],[67,67,67,67,67,67,67,67,67,67,67,67,-42,-43,-44,-45,-46,-47,67,67,67,67,67,]),'FALSE':([39,40,52,53,57,62,63,71,82,83,84,85,86,87,88,89,90,91,92,93,94,98,107,],[68,68,68,68,68,68,68,68,68,68,68,68,-42,-43,-44,-45,-46,-47,68,68,68,68,68,]),'THEN':([54,55,56,58,59,60,61,64,65,66,67,68,95,97,109,110,111,112,113,114,115,116,118,128,],[81,-41,-53,-57,-58,-59,-60,-63,-67,-68,-69,-70,-64,-62,-40,-50,-51,-52,-54,-55,-56,-61,-66,-65,]),'DO':([55,56,58,59,60,61,64,65,66,67,68,69,95,97,109,110,111,112,113,114,115,116,118,128,],[-41,-53,-57,-58,-59,-60,-63,-67,-68,-69,-70,99,-64,-62,-40,-50,-51,-52,-54,-55,-56,-61,-66,-65,]),'PLUS':([55,56,58,59,60,61,64,65,66,67,68,95,97,109,110,111,112,113,114,115,116,118,128,],[83,-53,-57,-58,-59,-60,-63,-67,-68,-69,-70,-64,-62,83,-50,-51,-52,-54,-55,-56,-61,-66,-65,]),'OR':([55,56,58,59,60,61,64,65,66,67,68,95,97,109,110,111,112,113,114,115,116,118,128,],[85,-53,-57,-58,-59,-60,-63,-67,-68,-69,-70,-64,-62,85,-50,-51,-52,-54,-55,-56,-61,-66,-65,]),'EQUALS':([55,56,58,59,60,61,64,65,66,67,68,95,97,110,111,112,113,114,115,116,118,128,],[86,-53,-57,-58,-59,-60,-63,-67,-68,-69,-70,-64,-62,-50,-51,-52,-54,-55,-56,-61,-66,-65,]),'NE':([55,56,58,59,60,61,64,65,66,67,68,95,97,110,111,112,113,114,115,116,118,128,],[87,-53,-57,-58,-59,-60,-63,-67,-68,-69,-70,-64,-62,-50,-51,-52,-54,-55,-56,-61,-66,-65,]),'LT':([55,56,58,59,60,61,64,65,66,67,68,95,97,110,111,112,113,114,115,116,118,128,],[88,-53,-57,-58,-59,-60,-63,-67,-68,-69,-70,-64,-62,-50,-51,-52,-54,-55,-56,-61,-66,-65,]),'LE':([55,56,58,59,60,61,64,65,66,67,68,95,97,110,111,112,113,114,115,116,118,128,],[89,-53,-57,-58,-59,-60,-63,-67,-68,-69,-70,-64,-62,-50,-51,-52,-54,-55,-56,-61,-66,-65,]),'GT':([55,56,58,59,60,61,64,65,66,67,68,95,97,110,111,112,113,114,115,116,118,128,],[90,-53,-57,-58,-59,-60,-63,-67,-68,-69,-70,-64,-62,-50,-51,-52,-54,-55,-56,-61,-66,-65,]),'GE':([55,56,58,59,60,61,64,65,66,67,68,95,97,110,111,112,113,114,115,116,118,128,],[91,-53,-57,-58,-59,-60,-63,-67,-68,-69,-70,-64,-62,-50,-51,-52,-54,-55,-56,-61,-66,-65,]),'TIMES':([56,58,59,60,61,64,65,66,67,68,95,97,110,111,112,113,114,115,116,118,128,],[92,-57,-58,-59,-60,-63,-67,-68,-69,-70,-64,-62,92,92,92,-54,-55,-56,-61,-66,-65,]),'DIV':([56,58,59,60,61,64,65,66,67,68,95,97,110,111,112,113,114,115,116,118,128,],[93,-57,-58,-59,-60,-63,-67,-68,-69,-70,-64,-62,93,93,93,-54,-55,-56,-61,-66,-65,]),'AND':([56,58,59,60,61,64,65,66,67,68,95,97,110,111,112,113,114,115,116,118,128,],[94,-57,-58,-59,-60,-63,-67,-68,-69,-70,-64,-62,94,94,94,-54,-55,-56,-61,-66,-65,]),}
 
@@ -27,75 +27,75 @@ for _k, _v in _lr_goto_items.items():
 del _lr_goto_items
 _lr_productions = [
   ("S' -> programa","S'",1,None,None,None),
-  ('programa -> PROGRAM ID SEMI bloco DOT','programa',5,'p_programa','rascal_parser.py',18),
-  ('bloco -> secao_vars_opt secao_sub_opt comando_composto','bloco',3,'p_bloco','rascal_parser.py',22),
-  ('secao_vars_opt -> VAR declaracao_vars_lista','secao_vars_opt',2,'p_secao_vars_opt','rascal_parser.py',26),
-  ('secao_vars_opt -> empty','secao_vars_opt',1,'p_secao_vars_opt','rascal_parser.py',27),
-  ('declaracao_vars -> lista_ids COLON tipo','declaracao_vars',3,'p_declaracao_vars','rascal_parser.py',31),
-  ('declaracao_vars_lista -> declaracao_vars_lista declaracao_vars SEMI','declaracao_vars_lista',3,'p_declaracao_vars_lista','rascal_parser.py',35),
-  ('declaracao_vars_lista -> declaracao_vars SEMI','declaracao_vars_lista',2,'p_declaracao_vars_lista','rascal_parser.py',36),
+  ('programa -> PROGRAM ID SEMI bloco DOT','programa',5,'p_programa','rascal_parser.py',13),
+  ('bloco -> secao_vars_opt secao_sub_opt comando_composto','bloco',3,'p_bloco','rascal_parser.py',17),
+  ('secao_vars_opt -> VAR declaracao_vars_lista','secao_vars_opt',2,'p_secao_vars_opt','rascal_parser.py',21),
+  ('secao_vars_opt -> empty','secao_vars_opt',1,'p_secao_vars_opt','rascal_parser.py',22),
+  ('declaracao_vars -> lista_ids COLON tipo','declaracao_vars',3,'p_declaracao_vars','rascal_parser.py',26),
+  ('declaracao_vars_lista -> declaracao_vars_lista declaracao_vars SEMI','declaracao_vars_lista',3,'p_declaracao_vars_lista','rascal_parser.py',31),
+  ('declaracao_vars_lista -> declaracao_vars SEMI','declaracao_vars_lista',2,'p_declaracao_vars_lista','rascal_parser.py',32),
   ('lista_ids -> lista_ids COMMA ID','lista_ids',3,'p_lista_ids','rascal_parser.py',40),
   ('lista_ids -> ID','lista_ids',1,'p_lista_ids','rascal_parser.py',41),
-  ('secao_sub_opt -> secao_sub_opt declaracao_proc SEMI','secao_sub_opt',3,'p_secao_sub_opt','rascal_parser.py',48),
-  ('secao_sub_opt -> secao_sub_opt declaracao_func SEMI','secao_sub_opt',3,'p_secao_sub_opt','rascal_parser.py',49),
-  ('secao_sub_opt -> empty','secao_sub_opt',1,'p_secao_sub_opt','rascal_parser.py',50),
-  ('declaracao_proc -> PROCEDURE ID params_opt SEMI bloco','declaracao_proc',5,'p_declaracao_proc','rascal_parser.py',57),
-  ('declaracao_func -> FUNCTION ID params_opt COLON tipo SEMI bloco','declaracao_func',7,'p_declaracao_func','rascal_parser.py',61),
-  ('params_opt -> LPAREN declaracao_params_lista RPAREN','params_opt',3,'p_params_opt','rascal_parser.py',65),
-  ('params_opt -> empty','params_opt',1,'p_params_opt','rascal_parser.py',66),
-  ('declaracao_params_lista -> declaracao_params_lista SEMI declaracao_vars','declaracao_params_lista',3,'p_declaracao_params_lista','rascal_parser.py',70),
-  ('declaracao_params_lista -> declaracao_vars','declaracao_params_lista',1,'p_declaracao_params_lista','rascal_parser.py',71),
-  ('leitura -> READ LPAREN lista_ids RPAREN','leitura',4,'p_leitura','rascal_parser.py',78),
-  ('escrita -> WRITE LPAREN lista_exprs RPAREN','escrita',4,'p_escrita','rascal_parser.py',82),
-  ('tipo -> INTEGER','tipo',1,'p_tipo','rascal_parser.py',86),
-  ('tipo -> BOOLEAN','tipo',1,'p_tipo','rascal_parser.py',87),
-  ('lista_comandos -> lista_comandos SEMI comando','lista_comandos',3,'p_lista_comandos','rascal_parser.py',91),
-  ('lista_comandos -> comando','lista_comandos',1,'p_lista_comandos','rascal_parser.py',92),
-  ('comando_composto -> BEGIN lista_comandos END','comando_composto',3,'p_comando_composto','rascal_parser.py',99),
-  ('comando -> atribuicao','comando',1,'p_comando','rascal_parser.py',103),
-  ('comando -> condicional','comando',1,'p_comando','rascal_parser.py',104),
-  ('comando -> repeticao','comando',1,'p_comando','rascal_parser.py',105),
-  ('comando -> leitura','comando',1,'p_comando','rascal_parser.py',106),
-  ('comando -> escrita','comando',1,'p_comando','rascal_parser.py',107),
-  ('comando -> chamada_proc','comando',1,'p_comando','rascal_parser.py',108),
-  ('comando -> comando_composto','comando',1,'p_comando','rascal_parser.py',109),
-  ('comando -> empty','comando',1,'p_comando','rascal_parser.py',110),
-  ('chamada_proc -> ID LPAREN lista_exprs RPAREN','chamada_proc',4,'p_chamada_proc','rascal_parser.py',114),
-  ('chamada_proc -> ID LPAREN RPAREN','chamada_proc',3,'p_chamada_proc','rascal_parser.py',115),
-  ('condicional -> IF expressao THEN comando','condicional',4,'p_condicional','rascal_parser.py',122),
-  ('condicional -> IF expressao THEN comando ELSE comando','condicional',6,'p_condicional','rascal_parser.py',123),
-  ('repeticao -> WHILE expressao DO comando','repeticao',4,'p_repeticao','rascal_parser.py',130),
-  ('atribuicao -> ID ASSIGN expressao','atribuicao',3,'p_atribuicao','rascal_parser.py',134),
-  ('expressao -> expr_simples relacao expr_simples','expressao',3,'p_expressao','rascal_parser.py',138),
-  ('expressao -> expr_simples','expressao',1,'p_expressao','rascal_parser.py',139),
-  ('relacao -> EQUALS','relacao',1,'p_relacao','rascal_parser.py',146),
-  ('relacao -> NE','relacao',1,'p_relacao','rascal_parser.py',147),
-  ('relacao -> LT','relacao',1,'p_relacao','rascal_parser.py',148),
-  ('relacao -> LE','relacao',1,'p_relacao','rascal_parser.py',149),
-  ('relacao -> GT','relacao',1,'p_relacao','rascal_parser.py',150),
-  ('relacao -> GE','relacao',1,'p_relacao','rascal_parser.py',151),
-  ('lista_exprs -> lista_exprs COMMA expressao','lista_exprs',3,'p_lista_exprs','rascal_parser.py',155),
-  ('lista_exprs -> expressao','lista_exprs',1,'p_lista_exprs','rascal_parser.py',156),
-  ('expr_simples -> expr_simples PLUS termo','expr_simples',3,'p_expr_simples','rascal_parser.py',163),
-  ('expr_simples -> expr_simples MINUS termo','expr_simples',3,'p_expr_simples','rascal_parser.py',164),
-  ('expr_simples -> expr_simples OR termo','expr_simples',3,'p_expr_simples','rascal_parser.py',165),
-  ('expr_simples -> termo','expr_simples',1,'p_expr_simples','rascal_parser.py',166),
-  ('termo -> termo TIMES fator','termo',3,'p_termo','rascal_parser.py',174),
-  ('termo -> termo DIV fator','termo',3,'p_termo','rascal_parser.py',175),
-  ('termo -> termo AND fator','termo',3,'p_termo','rascal_parser.py',176),
-  ('termo -> fator','termo',1,'p_termo','rascal_parser.py',177),
-  ('fator -> variavel','fator',1,'p_fator','rascal_parser.py',185),
-  ('fator -> numero','fator',1,'p_fator','rascal_parser.py',186),
-  ('fator -> logico','fator',1,'p_fator','rascal_parser.py',187),
-  ('fator -> LPAREN expressao RPAREN','fator',3,'p_fator','rascal_parser.py',188),
-  ('fator -> NOT fator','fator',2,'p_fator','rascal_parser.py',189),
-  ('fator -> chamada_func','fator',1,'p_fator','rascal_parser.py',190),
-  ('fator -> MINUS fator','fator',2,'p_fator_neg','rascal_parser.py',199),
-  ('chamada_func -> ID LPAREN lista_exprs RPAREN','chamada_func',4,'p_chamada_func','rascal_parser.py',203),
-  ('chamada_func -> ID LPAREN RPAREN','chamada_func',3,'p_chamada_func','rascal_parser.py',204),
-  ('variavel -> ID','variavel',1,'p_variavel','rascal_parser.py',212),
-  ('numero -> NUMBER','numero',1,'p_numero','rascal_parser.py',216),
-  ('logico -> TRUE','logico',1,'p_logico','rascal_parser.py',220),
-  ('logico -> FALSE','logico',1,'p_logico','rascal_parser.py',221),
-  ('empty -> <empty>','empty',0,'p_empty','rascal_parser.py',225),
+  ('secao_sub_opt -> secao_sub_opt declaracao_proc SEMI','secao_sub_opt',3,'p_secao_sub_opt','rascal_parser.py',49),
+  ('secao_sub_opt -> secao_sub_opt declaracao_func SEMI','secao_sub_opt',3,'p_secao_sub_opt','rascal_parser.py',50),
+  ('secao_sub_opt -> empty','secao_sub_opt',1,'p_secao_sub_opt','rascal_parser.py',51),
+  ('declaracao_proc -> PROCEDURE ID params_opt SEMI bloco','declaracao_proc',5,'p_declaracao_proc','rascal_parser.py',59),
+  ('declaracao_func -> FUNCTION ID params_opt COLON tipo SEMI bloco','declaracao_func',7,'p_declaracao_func','rascal_parser.py',63),
+  ('params_opt -> LPAREN declaracao_params_lista RPAREN','params_opt',3,'p_params_opt','rascal_parser.py',67),
+  ('params_opt -> empty','params_opt',1,'p_params_opt','rascal_parser.py',68),
+  ('declaracao_params_lista -> declaracao_params_lista SEMI declaracao_vars','declaracao_params_lista',3,'p_declaracao_params_lista','rascal_parser.py',72),
+  ('declaracao_params_lista -> declaracao_vars','declaracao_params_lista',1,'p_declaracao_params_lista','rascal_parser.py',73),
+  ('leitura -> READ LPAREN lista_ids RPAREN','leitura',4,'p_leitura','rascal_parser.py',81),
+  ('escrita -> WRITE LPAREN lista_exprs RPAREN','escrita',4,'p_escrita','rascal_parser.py',85),
+  ('tipo -> INTEGER','tipo',1,'p_tipo','rascal_parser.py',89),
+  ('tipo -> BOOLEAN','tipo',1,'p_tipo','rascal_parser.py',90),
+  ('lista_comandos -> lista_comandos SEMI comando','lista_comandos',3,'p_lista_comandos','rascal_parser.py',94),
+  ('lista_comandos -> comando','lista_comandos',1,'p_lista_comandos','rascal_parser.py',95),
+  ('comando_composto -> BEGIN lista_comandos END','comando_composto',3,'p_comando_composto','rascal_parser.py',103),
+  ('comando -> atribuicao','comando',1,'p_comando','rascal_parser.py',107),
+  ('comando -> condicional','comando',1,'p_comando','rascal_parser.py',108),
+  ('comando -> repeticao','comando',1,'p_comando','rascal_parser.py',109),
+  ('comando -> leitura','comando',1,'p_comando','rascal_parser.py',110),
+  ('comando -> escrita','comando',1,'p_comando','rascal_parser.py',111),
+  ('comando -> chamada_proc','comando',1,'p_comando','rascal_parser.py',112),
+  ('comando -> comando_composto','comando',1,'p_comando','rascal_parser.py',113),
+  ('comando -> empty','comando',1,'p_comando','rascal_parser.py',114),
+  ('chamada_proc -> ID LPAREN lista_exprs RPAREN','chamada_proc',4,'p_chamada_proc','rascal_parser.py',118),
+  ('chamada_proc -> ID LPAREN RPAREN','chamada_proc',3,'p_chamada_proc','rascal_parser.py',119),
+  ('condicional -> IF expressao THEN comando','condicional',4,'p_condicional','rascal_parser.py',126),
+  ('condicional -> IF expressao THEN comando ELSE comando','condicional',6,'p_condicional','rascal_parser.py',127),
+  ('repeticao -> WHILE expressao DO comando','repeticao',4,'p_repeticao','rascal_parser.py',134),
+  ('atribuicao -> ID ASSIGN expressao','atribuicao',3,'p_atribuicao','rascal_parser.py',138),
+  ('expressao -> expr_simples relacao expr_simples','expressao',3,'p_expressao','rascal_parser.py',142),
+  ('expressao -> expr_simples','expressao',1,'p_expressao','rascal_parser.py',143),
+  ('relacao -> EQUALS','relacao',1,'p_relacao','rascal_parser.py',150),
+  ('relacao -> NE','relacao',1,'p_relacao','rascal_parser.py',151),
+  ('relacao -> LT','relacao',1,'p_relacao','rascal_parser.py',152),
+  ('relacao -> LE','relacao',1,'p_relacao','rascal_parser.py',153),
+  ('relacao -> GT','relacao',1,'p_relacao','rascal_parser.py',154),
+  ('relacao -> GE','relacao',1,'p_relacao','rascal_parser.py',155),
+  ('lista_exprs -> lista_exprs COMMA expressao','lista_exprs',3,'p_lista_exprs','rascal_parser.py',159),
+  ('lista_exprs -> expressao','lista_exprs',1,'p_lista_exprs','rascal_parser.py',160),
+  ('expr_simples -> expr_simples PLUS termo','expr_simples',3,'p_expr_simples','rascal_parser.py',168),
+  ('expr_simples -> expr_simples MINUS termo','expr_simples',3,'p_expr_simples','rascal_parser.py',169),
+  ('expr_simples -> expr_simples OR termo','expr_simples',3,'p_expr_simples','rascal_parser.py',170),
+  ('expr_simples -> termo','expr_simples',1,'p_expr_simples','rascal_parser.py',171),
+  ('termo -> termo TIMES fator','termo',3,'p_termo','rascal_parser.py',179),
+  ('termo -> termo DIV fator','termo',3,'p_termo','rascal_parser.py',180),
+  ('termo -> termo AND fator','termo',3,'p_termo','rascal_parser.py',181),
+  ('termo -> fator','termo',1,'p_termo','rascal_parser.py',182),
+  ('fator -> variavel','fator',1,'p_fator','rascal_parser.py',190),
+  ('fator -> numero','fator',1,'p_fator','rascal_parser.py',191),
+  ('fator -> logico','fator',1,'p_fator','rascal_parser.py',192),
+  ('fator -> LPAREN expressao RPAREN','fator',3,'p_fator','rascal_parser.py',193),
+  ('fator -> NOT fator','fator',2,'p_fator','rascal_parser.py',194),
+  ('fator -> chamada_func','fator',1,'p_fator','rascal_parser.py',195),
+  ('fator -> MINUS fator','fator',2,'p_fator_neg','rascal_parser.py',204),
+  ('chamada_func -> ID LPAREN lista_exprs RPAREN','chamada_func',4,'p_chamada_func','rascal_parser.py',208),
+  ('chamada_func -> ID LPAREN RPAREN','chamada_func',3,'p_chamada_func','rascal_parser.py',209),
+  ('variavel -> ID','variavel',1,'p_variavel','rascal_parser.py',217),
+  ('numero -> NUMBER','numero',1,'p_numero','rascal_parser.py',221),
+  ('logico -> TRUE','logico',1,'p_logico','rascal_parser.py',225),
+  ('logico -> FALSE','logico',1,'p_logico','rascal_parser.py',226),
+  ('empty -> <empty>','empty',0,'p_empty','rascal_parser.py',230),
 ]
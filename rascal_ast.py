@@ -1,4 +1,5 @@
 from __future__ import annotations
+from types import GeneratorType
 from typing import List, Dict, Optional
 
 #Nó base genérico para todos os elementos da árvore
@@ -152,10 +153,84 @@ class FunctionCall(Expression):
         self.name = name
         self.arguments = args
 
+#Visitor base com percurso por pilha explícita (sem recursão em Python).
+#Um método visit_* pode devolver o resultado direto ou ser um gerador:
+#cada `yield filho` suspende o método até o filho ser visitado e devolve
+#o resultado do filho; o `return` do gerador é o resultado do próprio nó.
+#Assim a profundidade da AST não consome a pilha do interpretador.
+class NodeVisitor:
+    def visit(self, node):
+        stack = []
+        result = self.dispatch(node)
+        while True:
+            if isinstance(result, GeneratorType):
+                stack.append(result)
+                result = None
+            elif not stack:
+                return result
+            try:
+                child = stack[-1].send(result)
+            except StopIteration as stop:
+                stack.pop()
+                result = stop.value
+                if not stack:
+                    return result
+                continue
+            #Um gerador produzido é uma sub-rotina auxiliar do próprio visitor
+            #e roda na mesma pilha, sem recursão do Python
+            result = child if isinstance(child, GeneratorType) else self.dispatch(child)
+
+    #Manda para visit_program, visit_block, etc.
+    def dispatch(self, node):
+        if not node:
+            return None
+        method = getattr(self, f'visit_{node.type}', self.generic_visit)
+        return method(node)
+
+    def generic_visit(self, node):
+        pass
+
+#Visitor que reescreve a árvore: cada visit_* devolve o nó que substitui o
+#nó visitado (ele mesmo, um nó novo, ou None para removê-lo de uma lista).
+#O generic_visit visita os filhos e instala os substitutos no lugar.
+class NodeTransformer(NodeVisitor):
+    def generic_visit(self, node):
+        for field, value in list(vars(node).items()):
+            if isinstance(value, list):
+                items = []
+                for item in value:
+                    if isinstance(item, Node):
+                        item = yield item
+                        if item is None:
+                            continue
+                    items.append(item)
+                value[:] = items
+            elif isinstance(value, Node):
+                setattr(node, field, (yield value))
+        return node
+
+#Filhos diretos de um nó (campos Node e listas de Node), na ordem dos campos
+def children(node: Node):
+    for value in vars(node).values():
+        if isinstance(value, list):
+            for item in value:
+                if isinstance(item, Node):
+                    yield item
+        elif isinstance(value, Node):
+            yield value
+
+#Percorre a subárvore em pré-ordem usando pilha explícita
+def walk(node: Node):
+    stack = [node]
+    while stack:
+        n = stack.pop()
+        yield n
+        stack.extend(reversed(list(children(n))))
+
 # ===================================================================
 # 2. PRINT AST (Visualizador)
 # ===================================================================
-class PrintAST:
+class PrintAST(NodeVisitor):
     def __init__(self):
         self.level = 0
 
@@ -163,32 +238,22 @@ class PrintAST:
     def print_node(self, msg):
         print("  " * self.level + msg)
 
-    #Chama o método específico para o tipo do nó
-    def visit(self, node):
-        if not node: return
-        #Manda para visit_program, visit_block, etc.
-        method = getattr(self, f'visit_{node.type}', self.generic_visit)
-        return method(node)
-
-    def generic_visit(self, node):
-        pass
-
     def visit_program(self, node):
         self.print_node(f"Program: {node.name}")
-        self.level += 1; self.visit(node.block); self.level -= 1
+        self.level += 1; yield node.block; self.level -= 1
 
     def visit_block(self, node):
         if node.var_declarations:
             self.print_node("Vars:")
             self.level += 1
-            for d in node.var_declarations: self.visit(d)
+            for d in node.var_declarations: yield d
             self.level -= 1
         if node.subroutine_declarations:
             self.print_node("Subroutines:")
             self.level += 1
-            for s in node.subroutine_declarations: self.visit(s)
+            for s in node.subroutine_declarations: yield s
             self.level -= 1
-        self.print_node("Body:"); self.level += 1; self.visit(node.compound_statement); self.level -= 1
+        self.print_node("Body:"); self.level += 1; yield node.compound_statement; self.level -= 1
 
     def visit_var_declaration(self, node):
         ids = ", ".join([v.name for v in node.identifiers])
@@ -196,42 +261,42 @@ class PrintAST:
 
     def visit_proc_declaration(self, node):
         self.print_node(f"Procedure {node.name}"); self.level += 1
-        for p in node.params: self.visit(p)
-        self.visit(node.block); self.level -= 1
+        for p in node.params: yield p
+        yield node.block; self.level -= 1
 
     def visit_func_declaration(self, node):
         self.print_node(f"Function {node.name} : {node.return_type.name}"); self.level += 1
-        for p in node.params: self.visit(p)
-        self.visit(node.block); self.level -= 1
+        for p in node.params: yield p
+        yield node.block; self.level -= 1
 
     def visit_seq_comandos(self, node):
         self.print_node("Begin"); self.level += 1
-        for s in node.statements: self.visit(s)
+        for s in node.statements: yield s
         self.level -= 1; self.print_node("End")
 
     def visit_cmd_atrib(self, node):
         self.print_node(f"Assign {node.variable.name} :="); self.level += 1
-        self.visit(node.expression); self.level -= 1
+        yield node.expression; self.level -= 1
 
     def visit_proc_call(self, node):
         self.print_node(f"Call {node.name}"); self.level += 1
-        for a in node.arguments: self.visit(a)
+        for a in node.arguments: yield a
         self.level -= 1
 
     def visit_func_call(self, node):
         self.print_node(f"CallFunc {node.name}"); self.level += 1
-        for a in node.arguments: self.visit(a)
+        for a in node.arguments: yield a
         self.level -= 1
 
     def visit_cmd_condicional(self, node):
-        self.print_node("If"); self.level += 1; self.visit(node.condition); self.level -= 1
-        self.print_node("Then"); self.level += 1; self.visit(node.then_statement); self.level -= 1
+        self.print_node("If"); self.level += 1; yield node.condition; self.level -= 1
+        self.print_node("Then"); self.level += 1; yield node.then_statement; self.level -= 1
         if node.else_statement:
-            self.print_node("Else"); self.level += 1; self.visit(node.else_statement); self.level -= 1
+            self.print_node("Else"); self.level += 1; yield node.else_statement; self.level -= 1
 
     def visit_cmd_repeticao(self, node):
-        self.print_node("While"); self.level += 1; self.visit(node.condition); self.level -= 1
-        self.print_node("Do"); self.level += 1; self.visit(node.statement); self.level -= 1
+        self.print_node("While"); self.level += 1; yield node.condition; self.level -= 1
+        self.print_node("Do"); self.level += 1; yield node.statement; self.level -= 1
 
     def visit_read(self, node):
         ids = ", ".join([v.name for v in node.variables])
@@ -239,16 +304,16 @@ class PrintAST:
 
     def visit_write(self, node):
         self.print_node("Write"); self.level += 1
-        for e in node.expressions: self.visit(e)
+        for e in node.expressions: yield e
         self.level -= 1
 
     def visit_exp_binaria(self, node):
         self.print_node(f"Op {node.op}"); self.level += 1
-        self.visit(node.left); self.visit(node.right); self.level -= 1
+        yield node.left; yield node.right; self.level -= 1
 
     def visit_exp_unaria(self, node):
         self.print_node(f"Unary {node.op}"); self.level += 1
-        self.visit(node.operand); self.level -= 1
+        yield node.operand; self.level -= 1
 
     def visit_exp_var(self, node): self.print_node(f"Var {node.name}")
     def visit_exp_num(self, node): self.print_node(f"Num {node.value}")
@@ -0,0 +1,137 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+import main as compiler_main
+from rascal_cache import CompilationCache, compiler_version
+
+#Estado de cada processo trabalhador (preenchido uma única vez no initializer)
+_worker_cache: Optional[CompilationCache] = None
+_worker_options = compiler_main.CompileOptions()
+
+#Expande diretórios (recursivamente), globs e arquivos em uma lista de fontes .ras
+def collect_sources(patterns: List[str]) -> List[str]:
+    found = []
+    for pat in patterns:
+        if os.path.isdir(pat):
+            for root, dirs, files in os.walk(pat):
+                dirs.sort()
+                found.extend(os.path.join(root, f) for f in sorted(files) if f.endswith('.ras'))
+        elif glob.has_magic(pat):
+            found.extend(p for p in sorted(glob.glob(pat, recursive=True)) if os.path.isfile(p))
+        else:
+            found.append(pat)
+    seen = set()
+    unique = []
+    for path in found:
+        norm = os.path.abspath(path)
+        if norm not in seen:
+            seen.add(norm)
+            unique.append(path)
+    return unique
+
+def output_path(source_path: str) -> str:
+    return os.path.splitext(source_path)[0] + '.mep'
+
+#Executado uma vez por trabalhador: importa o PLY e monta as tabelas LALR,
+#que ficam carregadas para todas as compilações seguintes do processo.
+def init_worker(cache_dir: Optional[str], cache_size: int, options: compiler_main.CompileOptions):
+    global _worker_cache, _worker_options
+    compiler_main.load_compiler()
+    _worker_cache = compiler_main.open_cache(cache_dir, cache_size)
+    _worker_options = options
+
+def compile_file(path: str) -> Dict:
+    start = time.perf_counter()
+    result = {"file": path, "output": None, "status": "ok", "cached": False, "diagnostics": ""}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            source = f.read()
+    except Exception as e:
+        result["status"] = "io_error"
+        result["diagnostics"] = f"Erro ao abrir arquivo de entrada: {e}\n"
+        result["time"] = time.perf_counter() - start
+        return result
+
+    # um erro inesperado do compilador fica no resultado deste arquivo, sem
+    # interromper o lote
+    try:
+        code, diagnostics, hit = compiler_main.compile_cached(source, _worker_cache, _worker_options, evict=False)
+    except Exception as e:
+        result["status"] = "internal_error"
+        result["diagnostics"] = f"Erro interno do compilador: {type(e).__name__}: {e}\n"
+        result["time"] = time.perf_counter() - start
+        return result
+    result["diagnostics"] = diagnostics
+    result["cached"] = hit
+    if code is None:
+        result["status"] = "error"
+    else:
+        out = output_path(path)
+        try:
+            with open(out, 'w', encoding='utf-8') as f:
+                f.write(code)
+            result["output"] = out
+        except Exception as e:
+            result["status"] = "io_error"
+            result["diagnostics"] += f"Erro ao gravar arquivo de saída: {e}\n"
+    result["time"] = time.perf_counter() - start
+    return result
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="main.py --batch", description="Compilação em lote de arquivos Rascal")
+    ap.add_argument("--batch", action="store_true", help=argparse.SUPPRESS)
+    ap.add_argument("paths", nargs="+", help="diretórios, arquivos .ras ou globs (ex.: 'subs/**/*.ras')")
+    ap.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                    help="número de processos trabalhadores (padrão: número de núcleos)")
+    ap.add_argument("--summary", help="grava o resumo JSON neste arquivo em vez da saída padrão")
+    compiler_main.add_cache_arguments(ap)
+    compiler_main.add_optimization_arguments(ap)
+    return ap
+
+def main(argv: List[str]) -> int:
+    args = build_arg_parser().parse_args(argv)
+    sources = collect_sources(args.paths)
+    jobs = max(1, min(args.jobs, len(sources) or 1))
+
+    # Garante tabelas do parser atualizadas antes de iniciar os trabalhadores
+    compiler_main.load_compiler()
+
+    start = time.perf_counter()
+    init_args = (args.cache_dir, args.cache_size, compiler_main.options_from_args(args))
+    if jobs == 1:
+        init_worker(*init_args)
+        results = [compile_file(p) for p in sources]
+    else:
+        chunk = max(1, len(sources) // (jobs * 8))
+        with multiprocessing.Pool(jobs, initializer=init_worker, initargs=init_args) as pool:
+            results = list(pool.imap(compile_file, sources, chunksize=chunk))
+    wall = time.perf_counter() - start
+
+    cache = compiler_main.open_cache(args.cache_dir, args.cache_size)
+    if cache is not None:
+        cache.evict()
+
+    failed = sum(1 for r in results if r["status"] != "ok")
+    summary = {
+        "compiler_version": compiler_version(),
+        "jobs": jobs,
+        "total": len(results),
+        "ok": len(results) - failed,
+        "failed": failed,
+        "cached": sum(1 for r in results if r["cached"]),
+        "wall_time": wall,
+        "files": results,
+    }
+    text = json.dumps(summary, indent=2, ensure_ascii=False)
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+    return 1 if failed else 0
@@ -0,0 +1,103 @@
+import glob
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, Optional
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_compiler_version: Optional[str] = None
+
+#Versão do compilador: hash do código-fonte de todos os módulos do compilador.
+#Qualquer alteração no compilador invalida automaticamente as entradas antigas.
+def compiler_version() -> str:
+    global _compiler_version
+    if _compiler_version is None:
+        h = hashlib.sha256()
+        base = os.path.dirname(os.path.abspath(__file__))
+        for path in sorted(glob.glob(os.path.join(base, '*.py'))):
+            h.update(os.path.basename(path).encode('utf-8'))
+            with open(path, 'rb') as f:
+                h.update(f.read())
+        _compiler_version = h.hexdigest()
+    return _compiler_version
+
+#Cache de compilação endereçado por conteúdo.
+#Cada entrada é um arquivo JSON com o código MEPA e os diagnósticos gerados,
+#nomeado pelo hash (fonte + versão do compilador + opções). A escrita é feita
+#num arquivo temporário seguido de os.replace, que é atômico: leitores e
+#escritores concorrentes nunca enxergam uma entrada pela metade. O mtime de
+#cada arquivo marca o último uso e guia a remoção LRU quando o tamanho total
+#ultrapassa o limite.
+class CompilationCache:
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, source: str, options: str = "") -> str:
+        h = hashlib.sha256()
+        h.update(compiler_version().encode('utf-8'))
+        h.update(b'\0')
+        h.update(options.encode('utf-8'))
+        h.update(b'\0')
+        h.update(source.encode('utf-8'))
+        return h.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    #Devolve a entrada armazenada ou None; um acerto renova o uso (LRU)
+    def get(self, key: str) -> Optional[Dict]:
+        path = self.path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key: str, entry: Dict, evict: bool = True):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        if evict:
+            self.evict()
+
+    #Remove as entradas usadas há mais tempo até caber no limite
+    def evict(self):
+        entries = []
+        total = 0
+        for path in glob.glob(os.path.join(self.directory, '*', '*.json')):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
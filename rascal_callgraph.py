@@ -0,0 +1,124 @@
+from typing import Dict, List, Optional, Set
+from rascal_ast import *
+
+#Grafo de chamadas do programa, construído a partir das entradas de tabela de
+#símbolos anotadas pelo SemanticAnalyzer em ProcedureCall/FunctionCall.
+#Cada sub-rotina é identificada pela sua SymbolEntry; o programa principal
+#é representado por None.
+class CallGraph:
+    def __init__(self, program: Program):
+        self.decls: Dict[object, SubroutineDeclaration] = {}
+        self.callees: Dict[Optional[object], Set[object]] = {None: set()}
+        self.call_sites: Dict[Optional[object], List[Node]] = {None: []}
+        self.build(program)
+        #Efeitos de cada sub-rotina, incluindo os das que ela chama:
+        #variáveis não locais lidas e escritas, e se faz read/write
+        self.reads: Dict[object, Set[object]] = {}
+        self.writes: Dict[object, Set[object]] = {}
+        self.io: Dict[object, bool] = {}
+        self.compute_effects()
+
+    #Atribui cada chamada à sub-rotina que a contém diretamente
+    def build(self, program: Program):
+        stack = [(program.block, None)]
+        while stack:
+            node, owner = stack.pop()
+            if isinstance(node, SubroutineDeclaration):
+                owner = node.entry
+                self.decls[owner] = node
+                self.callees.setdefault(owner, set())
+                self.call_sites.setdefault(owner, [])
+            elif isinstance(node, (ProcedureCall, FunctionCall)) and node.entry is not None:
+                self.callees[owner].add(node.entry)
+                self.call_sites[owner].append(node)
+            for child in children(node):
+                stack.append((child, owner))
+
+    #Efeitos diretos de cada corpo, depois propagados dos chamados para os
+    #chamadores até o ponto fixo (cobre recursão mútua). Só interessam ao
+    #chamador as variáveis de nível menor que o da sub-rotina.
+    def compute_effects(self):
+        for entry, decl in self.decls.items():
+            reads, writes, io = set(), set(), False
+            targets = set()
+            for n in walk(decl.block.compound_statement):
+                if isinstance(n, Assignment):
+                    targets.add(id(n.variable))
+                    writes.add(n.variable.entry)
+                elif isinstance(n, Read):
+                    io = True
+                    for v in n.variables:
+                        targets.add(id(v))
+                        writes.add(v.entry)
+                elif isinstance(n, Write):
+                    io = True
+                elif isinstance(n, Var) and id(n) not in targets:
+                    reads.add(n.entry)
+            self.reads[entry] = {e for e in reads if e is not None and e.level < entry.level}
+            self.writes[entry] = {e for e in writes if e is not None and e.level < entry.level}
+            self.io[entry] = io
+
+        changed = True
+        while changed:
+            changed = False
+            for entry in self.decls:
+                for callee in self.callees[entry]:
+                    if callee not in self.decls:
+                        continue
+                    for mine, theirs in ((self.reads[entry], self.reads[callee]), (self.writes[entry], self.writes[callee])):
+                        new = {e for e in theirs if e.level < entry.level} - mine
+                        if new:
+                            mine |= new
+                            changed = True
+                    if self.io[callee] and not self.io[entry]:
+                        self.io[entry] = True
+                        changed = True
+
+    #Variáveis que um trecho de código pode alterar, diretamente ou pelas
+    #sub-rotinas que chama
+    def assigned_in(self, node: Node) -> Set[object]:
+        assigned: Set[object] = set()
+        for n in walk(node):
+            if isinstance(n, Assignment):
+                assigned.add(n.variable.entry)
+            elif isinstance(n, Read):
+                assigned.update(v.entry for v in n.variables)
+            elif isinstance(n, (ProcedureCall, FunctionCall)) and n.entry in self.writes:
+                assigned |= self.writes[n.entry]
+        return assigned
+
+    #Sub-rotinas alcançáveis a partir do programa principal
+    def reachable(self) -> Set[object]:
+        seen: Set[object] = set()
+        work = list(self.callees[None])
+        while work:
+            e = work.pop()
+            if e in seen:
+                continue
+            seen.add(e)
+            work.extend(self.callees.get(e, ()))
+        return seen
+
+    #Sub-rotinas alcançáveis a partir das chamadas feitas por 'entry'
+    def reachable_from(self, entry) -> Set[object]:
+        seen: Set[object] = set()
+        work = list(self.callees.get(entry, ()))
+        while work:
+            e = work.pop()
+            if e in seen:
+                continue
+            seen.add(e)
+            work.extend(self.callees.get(e, ()))
+        return seen
+
+    #Recursiva (direta ou mutuamente): alcança a si mesma pelas chamadas
+    def is_recursive(self, entry) -> bool:
+        return entry in self.reachable_from(entry)
+
+    #Folha: não chama nenhuma sub-rotina
+    def is_leaf(self, entry) -> bool:
+        return not self.callees.get(entry)
+
+    #Todas as chamadas a 'entry' no programa
+    def calls_to(self, entry) -> List[Node]:
+        return [c for sites in self.call_sites.values() for c in sites if c.entry is entry]
@@ -1,42 +1,89 @@
-from typing import List
+from typing import List, Set
+from mepa_code import Instr, Label, format_mepa
 from rascal_ast import *
-
-#Percorre AST e emite instruções MEPA
-class CodeGenerator:
+from rascal_callgraph import CallGraph
+from rascal_constfold import is_pure
+
+#Operadores binários e a instrução MEPA correspondente
+BINARY_INSTR = {
+    '+': 'SOMA', '-': 'SUBT', '*': 'MULT', 'div': 'DIVI',
+    'and': 'CONJ', 'or': 'DISJ',
+    '=': 'CMIG', '<>': 'CMDG', '<': 'CMME', '<=': 'CMEG', '>': 'CMMA', '>=': 'CMAG'
+}
+#Comparação com o resultado oposto, para saltar quando a condição é verdadeira
+INVERSE_CMP = {'CMIG': 'CMDG', 'CMDG': 'CMIG', 'CMME': 'CMAG', 'CMAG': 'CMME', 'CMMA': 'CMEG', 'CMEG': 'CMMA'}
+
+#Chamadas da sub-rotina a si mesma em posição de cauda: último comando
+#executado do corpo, como procedimento ou como 'f := f(...)' numa função
+def self_tail_calls(node: SubroutineDeclaration) -> List[Statement]:
+    found = []
+    stack = [node.block.compound_statement]
+    while stack:
+        stmt = stack.pop()
+        if isinstance(stmt, CompoundStatement):
+            if stmt.statements:
+                stack.append(stmt.statements[-1])
+        elif isinstance(stmt, If):
+            stack.append(stmt.then_statement)
+            stack.append(stmt.else_statement)
+        elif isinstance(stmt, ProcedureCall):
+            if stmt.entry is node.entry:
+                found.append(stmt)
+        elif isinstance(stmt, Assignment) and isinstance(node, FunctionDeclaration):
+            expr = stmt.expression
+            target = stmt.variable.entry
+            if isinstance(expr, FunctionCall) and expr.entry is node.entry and \
+                    target is not None and target.name == f"@{node.name}" and target.level == node.entry.level:
+                found.append(stmt)
+    return found
+
+#Sub-rotinas folha (não chamam nenhuma outra, logo não são recursivas) e não
+#memoizadas: chamadas por CHPF e encerradas por RTPF, sem ENPR. O registro
+#de ativação tem o mesmo formato, mas a MEPA só guarda o endereço de retorno
+#e a entrada do display que a rotina ocupa, e não refaz o display na volta.
+def leaf_routines(program: Program) -> Set[object]:
+    graph = CallGraph(program)
+    return {e for e in graph.decls if graph.is_leaf(e) and not e.memo}
+
+#Percorre AST e emite instruções MEPA (objetos Instr, com operandos inteiros
+#e rótulos Label); get_code produz o texto .mep
+class CodeGenerator(NodeVisitor):
     def __init__(self):
-        self.code: List[str] = []
+        self.code: List[Instr] = []
         self.next_label_number = 0
         self.current_level = 0  
+        #Chamadas de cauda (id do comando) -> rótulo do início do corpo
+        self.tail_calls = {}
+        #Blocos (id) cujo corpo recebe rótulo para as chamadas de cauda
+        self.body_labels = {}
+        #Sub-rotina (entrada) -> rótulo do seu início
+        self.routine_labels = {}
+        #Sub-rotinas com chamada rápida (leaf_routines)
+        self.leaves = set()
 
     # Adiciona uma instrução à lista
     def emit(self, instr: str, *args):
-        if args:
-            arg_str = ",".join(map(str, args))
-            self.code.append(f"     {instr} {arg_str}")
-        else:
-            self.code.append(f"     {instr}")
+        self.code.append(Instr(instr, list(args)))
 
-    def new_label(self):
-        L = f"R{self.next_label_number:02d}"
+    def new_label(self) -> Label:
+        L = Label(f"R{self.next_label_number:02d}")
         self.next_label_number += 1
         return L
 
-    def emit_label(self, label: str):
-        self.code.append(f"{label}: NADA")
+    #Rótulo da sub-rotina, criado no primeiro uso: a chamada pode ser gerada
+    #antes da declaração (irmã declarada depois, ou cópia especializada)
+    def routine_label(self, entry) -> Label:
+        if entry not in self.routine_labels:
+            self.routine_labels[entry] = self.new_label()
+        return self.routine_labels[entry]
 
-    #Padrão Visitor manual para mandar nós da AST
-    def visit(self, node: Node):
-        if not node:
-            return
-        method = getattr(self, f'visit_{node.type}', self.generic_visit)
-        return method(node)
-
-    def generic_visit(self, node: Node):
-        pass
+    def emit_label(self, label: Label):
+        self.code.append(Instr("NADA", label=label))
 
     def visit_program(self, node: Program):
+        self.leaves = leaf_routines(node)
         self.emit("INPP")
-        self.visit(node.block)
+        yield node.block
         self.emit("PARA")
         self.emit("FIM")
 
@@ -53,82 +100,130 @@ class CodeGenerator:
             self.emit("DSVS", lab_main)
 
             for sub in node.subroutine_declarations:
-                self.visit(sub)
+                yield sub
             self.emit_label(lab_main)
 
+        if id(node) in self.body_labels:
+            self.emit_label(self.body_labels.pop(id(node)))
 
-        self.visit(node.compound_statement)
+        yield node.compound_statement
 
         if vars_count > 0:
             self.emit("DMEM", vars_count)
 
     # Declaração de Procedimento
     def visit_proc_declaration(self, node: ProcedureDeclaration):
-            label = self.new_label()
+            label = self.routine_label(node.entry)
             node.entry.label = label
             level = node.entry.level  
 
             self.emit_label(label)
-            self.emit("ENPR", level)
+            if node.entry not in self.leaves:
+                self.emit("ENPR", level)
 
             # Salva o nível anterior e define o atual para o nível deste procedimento
             previous_level = self.current_level
             self.current_level = level
 
-            self.visit(node.block)
+            self.mark_tail_calls(node)
+            yield node.block
 
             # Restaura o nível anterior (saiu do procedimento)
             self.current_level = previous_level
 
             num_params = sum(len(p.identifiers) for p in node.params)
-            self.emit("RTPR", num_params)
+            self.emit_return(node.entry, num_params)
 
+    #Função memoizada: MEMB procura os argumentos na tabela da MEPA e, se
+    #acha, já retorna com o resultado; MEMG guarda o resultado calculado
     def visit_func_declaration(self, node: FunctionDeclaration):
-            label = self.new_label()
+            label = self.routine_label(node.entry)
             node.entry.label = label
             level = node.entry.level
+            num_params = sum(len(p.identifiers) for p in node.params)
 
             self.emit_label(label)
-            self.emit("ENPR", level)
+            if node.entry not in self.leaves:
+                self.emit("ENPR", level)
+            if node.entry.memo:
+                self.emit("MEMB", level, num_params)
 
             # Salva o nível anterior e define o atual
             previous_level = self.current_level
             self.current_level = level
 
-            self.visit(node.block)
+            self.mark_tail_calls(node)
+            yield node.block
 
             # Restaura o nível anterior
             self.current_level = previous_level
 
-            num_params = sum(len(p.identifiers) for p in node.params)
+            if node.entry.memo:
+                self.emit("MEMG")
+            self.emit_return(node.entry, num_params)
+
+    def emit_return(self, entry, num_params: int):
+        if entry in self.leaves:
+            self.emit("RTPF", entry.level, num_params)
+        else:
             self.emit("RTPR", num_params)
 
+    #CHPR leva o nível de quem chama; CHPF, o da sub-rotina folha
+    def emit_call(self, entry):
+        if entry in self.leaves:
+            self.emit("CHPF", self.routine_label(entry), entry.level)
+        else:
+            self.emit("CHPR", self.routine_label(entry), self.current_level)
+
+    def mark_tail_calls(self, node: SubroutineDeclaration):
+        calls = self_tail_calls(node)
+        if calls:
+            body = self.new_label()
+            self.body_labels[id(node.block)] = body
+            for call in calls:
+                self.tail_calls[id(call)] = body
+
+    #Chamada recursiva de cauda: reaproveita o registro de ativação atual.
+    #Os argumentos são avaliados antes de sobrescrever os parâmetros (o primeiro
+    #fica no topo) e a execução volta ao início do corpo, sem CHPR/ENPR/RTPR.
+    def emit_tail_call(self, call, body_label: Label):
+        for arg in reversed(call.arguments):
+            yield arg
+        level = call.entry.level
+        for i in range(len(call.arguments)):
+            self.emit("ARMZ", level, -5 - i)
+        self.emit("DSVS", body_label)
+
     #Visita sequência de comandos
     def visit_seq_comandos(self, node: CompoundStatement):
         for stmt in node.statements:
-            self.visit(stmt)
+            yield stmt
 
     def visit_cmd_atrib(self, node: Assignment):
-        self.visit(node.expression)
+        if id(node) in self.tail_calls:
+            yield self.emit_tail_call(node.expression, self.tail_calls.pop(id(node)))
+            return
+        yield node.expression
         entry = node.variable.entry
         if entry:
             self.emit("ARMZ", entry.level, entry.offset)
 
     #Empilha args e chama
     def visit_proc_call(self, node: ProcedureCall):
+            if id(node) in self.tail_calls:
+                yield self.emit_tail_call(node, self.tail_calls.pop(id(node)))
+                return
             for arg in reversed(node.arguments):
-                self.visit(arg)
+                yield arg
 
-            label = node.entry.label
-            self.emit("CHPR", label, self.current_level)
+            self.emit_call(node.entry)
 
     def visit_func_call(self, node: FunctionCall):
             self.emit("AMEM", 1)
             for arg in reversed(node.arguments):
-                self.visit(arg)
+                yield arg
 
-            label = node.entry.label
-            self.emit("CHPR", label, self.current_level)
+            self.emit_call(node.entry)
 
     def visit_read(self, node: Read):
         for var in node.variables:
@@ -139,7 +234,7 @@ class CodeGenerator:
 
     def visit_write(self, node: Write):
         for expr in node.expressions:
-            self.visit(expr)
+            yield expr
             self.emit("IMPR")
 
     #Carrega valor da variável
@@ -156,40 +251,77 @@ class CodeGenerator:
         self.emit("CRCT", 1 if node.value == 'true' else 0)
 
     def visit_exp_binaria(self, node: BinaryOp):
-        self.visit(node.left)
-        self.visit(node.right)
-        ops = {
-            '+': 'SOMA', '-': 'SUBT', '*': 'MULT', 'div': 'DIVI',
-            'and': 'CONJ', 'or': 'DISJ',
-            '=': 'CMIG', '<>': 'CMDG', '<': 'CMME', '<=': 'CMEG', '>': 'CMMA', '>=': 'CMAG'
-        }
-        self.emit(ops.get(node.op, 'NADA'))
+        # and/or com chamada à direita: avaliação em curto-circuito, como nas condições
+        if node.op in ('and', 'or') and not is_pure(node.right):
+            lab_false = self.new_label()
+            lab_end = self.new_label()
+            yield self.jump(node, lab_false, False)
+            self.emit("CRCT", 1)
+            self.emit("DSVS", lab_end)
+            self.emit_label(lab_false)
+            self.emit("CRCT", 0)
+            self.emit_label(lab_end)
+            return
+        yield node.left
+        yield node.right
+        self.emit(BINARY_INSTR.get(node.op, 'NADA'))
 
     def visit_exp_unaria(self, node: UnaryOp):
-        self.visit(node.operand)
+        yield node.operand
         if node.op == 'not':
             self.emit("NEGA")
         elif node.op == '-':
             self.emit("INVR")
 
+    #Código de desvio para condições: salta para 'label' quando o valor de
+    #'cond' é igual a 'when', sem materializar o booleano. and/or param de
+    #avaliar assim que o resultado está decidido.
+    def jump(self, cond, label: Label, when: bool):
+        if isinstance(cond, Boolean):
+            if (cond.value == 'true') == when:
+                self.emit("DSVS", label)
+        elif isinstance(cond, UnaryOp) and cond.op == 'not':
+            yield self.jump(cond.operand, label, not when)
+        elif isinstance(cond, BinaryOp) and cond.op in ('and', 'or'):
+            # and salta no primeiro falso, or no primeiro verdadeiro
+            decides = cond.op == 'or'
+            if when == decides:
+                yield self.jump(cond.left, label, when)
+                yield self.jump(cond.right, label, when)
+            else:
+                lab_skip = self.new_label()
+                yield self.jump(cond.left, lab_skip, decides)
+                yield self.jump(cond.right, label, when)
+                self.emit_label(lab_skip)
+        elif isinstance(cond, BinaryOp) and BINARY_INSTR.get(cond.op) in INVERSE_CMP:
+            yield cond.left
+            yield cond.right
+            instr = BINARY_INSTR[cond.op]
+            self.emit(INVERSE_CMP[instr] if when else instr)
+            self.emit("DSVF", label)
+        else:
+            yield cond
+            if when:
+                self.emit("NEGA")
+            self.emit("DSVF", label)
+
     def visit_cmd_condicional(self, node: If):
         if node.else_statement:
             lab_end = self.new_label()  
             lab_else = self.new_label()  
 
             # condição
-            self.visit(node.condition)
-            self.emit("DSVF", lab_else)
+            yield self.jump(node.condition, lab_else, False)
 
             # bloco THEN
-            self.visit(node.then_statement)
+            yield node.then_statement
 
             # salto para o fim
             self.emit("DSVS", lab_end)
 
             # bloco ELSE
             self.emit_label(lab_else)
-            self.visit(node.else_statement)
+            yield node.else_statement
 
             # fim
             self.emit_label(lab_end)
@@ -197,23 +329,23 @@ class CodeGenerator:
         else:
             lab_end = self.new_label()
 
-            self.visit(node.condition)
-            self.emit("DSVF", lab_end)
+            yield self.jump(node.condition, lab_end, False)
 
-            self.visit(node.then_statement)
+            yield node.then_statement
 
             self.emit_label(lab_end)
 
 
+    #Laço com o teste no fim: cada iteração executa só o desvio condicional
+    #de volta ao corpo, em vez de DSVF na entrada mais DSVS no fim
     def visit_cmd_repeticao(self, node: While):
-        lab_ini = self.new_label()
-        lab_end = self.new_label()
-        self.emit_label(lab_ini)
-        self.visit(node.condition)
-        self.emit("DSVF", lab_end) #Falso sai do loop
-        self.visit(node.statement)
-        self.emit("DSVS", lab_ini) #Volta para o início
-        self.emit_label(lab_end)
+        lab_body = self.new_label()
+        lab_test = self.new_label()
+        self.emit("DSVS", lab_test)
+        self.emit_label(lab_body)
+        yield node.statement
+        self.emit_label(lab_test)
+        yield self.jump(node.condition, lab_body, True) #Verdadeiro volta ao corpo
 
     def get_code(self) -> str:
-        return "\n".join(self.code)
\ No newline at end of file
+        return format_mepa(self.code)
\ No newline at end of file
@@ -0,0 +1,160 @@
+from typing import Dict, Optional, Union
+from rascal_ast import *
+
+#Operadores avaliados em tempo de compilação, com a mesma semântica da MEPA
+#(div é a divisão inteira com piso do Python, como o '//' do interpretador)
+ARITH_OPS = {
+    '+': lambda a, b: a + b,
+    '-': lambda a, b: a - b,
+    '*': lambda a, b: a * b,
+    'div': lambda a, b: a // b,
+}
+REL_OPS = {
+    '=': lambda a, b: a == b,
+    '<>': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+}
+#Relação inversa, usada para eliminar 'not' sobre comparações
+INVERSE_REL = {'=': '<>', '<>': '=', '<': '>=', '>=': '<', '>': '<=', '<=': '>'}
+
+#Valor de um literal (int para Number, bool para Boolean) ou None
+def const_value(node: Optional[Node]) -> Optional[Union[int, bool]]:
+    if isinstance(node, Number):
+        return node.value
+    if isinstance(node, Boolean):
+        return node.value == 'true'
+    return None
+
+def make_const(value: Union[int, bool]) -> Expression:
+    if isinstance(value, bool):
+        return Boolean('true' if value else 'false')
+    return Number(value)
+
+#Expressão sem efeitos colaterais e que não pode falhar em tempo de execução:
+#sem chamadas de função e sem 'div' por divisor que não seja constante não nula.
+#Só expressões puras podem ser descartadas ou reordenadas pelas otimizações.
+def is_pure(expr: Optional[Node]) -> bool:
+    if expr is None:
+        return True
+    for n in walk(expr):
+        if isinstance(n, FunctionCall):
+            return False
+        if isinstance(n, BinaryOp) and n.op == 'div' and not const_value(n.right):
+            return False
+    return True
+
+#Tipo (integer/boolean) de uma expressão já anotada pela análise semântica
+def expr_type(expr: Expression) -> str:
+    if isinstance(expr, BinaryOp):
+        return 'integer' if expr.op in ARITH_OPS else 'boolean'
+    if isinstance(expr, UnaryOp):
+        return 'boolean' if expr.op == 'not' else 'integer'
+    if isinstance(expr, (Var, FunctionCall)):
+        return expr.entry.type
+    if isinstance(expr, Boolean):
+        return 'boolean'
+    return 'integer'
+
+#Numeração de valores: subárvores estruturalmente iguais (mesmos operadores,
+#literais e entradas de variáveis/funções) recebem o mesmo número. Cada nó é
+#identificado pela tupla (tipo, rótulo, números dos filhos), sem recursão.
+#Com 'versions', uma variável só é igual a si mesma na mesma versão, o que
+#separa leituras feitas antes e depois de uma atribuição.
+class ExprNumbering:
+    def __init__(self):
+        self.table: Dict[tuple, int] = {}
+
+    def number(self, expr: Expression, versions: Optional[Dict] = None) -> int:
+        return self.numbers(expr, versions)[id(expr)]
+
+    #Números de todos os nós da subárvore, indexados por id do nó
+    def numbers(self, expr: Expression, versions: Optional[Dict] = None) -> Dict[int, int]:
+        nums: Dict[int, int] = {}
+        for n in reversed(list(walk(expr))):
+            if isinstance(n, Var):
+                label = (n.entry, versions.get(n.entry, 0)) if versions is not None else n.entry
+            elif isinstance(n, FunctionCall):
+                label = n.entry
+            elif isinstance(n, (BinaryOp, UnaryOp)):
+                label = n.op
+            else:
+                label = getattr(n, 'value', None)
+            key = (n.type, label) + tuple(nums[id(c)] for c in children(n))
+            nums[id(n)] = self.table.setdefault(key, len(self.table))
+        return nums
+
+#Dobra subárvores constantes e aplica identidades algébricas seguras.
+#Executado entre a análise semântica e a geração de código.
+class ConstantFolder(NodeTransformer):
+    def visit_exp_binaria(self, node: BinaryOp):
+        node.left = yield node.left
+        node.right = yield node.right
+        op = node.op
+        lv = const_value(node.left)
+        rv = const_value(node.right)
+
+        if lv is not None and rv is not None:
+            if op in ARITH_OPS:
+                if op == 'div' and rv == 0:
+                    return node # divisão por zero fica para a execução
+                return make_const(ARITH_OPS[op](lv, rv))
+            if op in REL_OPS:
+                return make_const(REL_OPS[op](lv, rv))
+            if op == 'and':
+                return make_const(lv and rv)
+            if op == 'or':
+                return make_const(lv or rv)
+            return node
+
+        return self.simplify(node, lv, rv)
+
+    #Identidades com um dos operandos constante
+    def simplify(self, node: BinaryOp, lv, rv) -> Expression:
+        op, left, right = node.op, node.left, node.right
+        if op == '+':
+            if lv == 0: return right
+            if rv == 0: return left
+        elif op == '-':
+            if rv == 0: return left
+            if lv == 0: return UnaryOp('-', right)
+        elif op == '*':
+            if lv == 1: return right
+            if rv == 1: return left
+            if lv == 0 and is_pure(right): return Number(0)
+            if rv == 0 and is_pure(left): return Number(0)
+        elif op == 'div':
+            if rv == 1: return left
+            if rv == -1: return UnaryOp('-', left)
+        elif op == 'and':
+            if lv is True: return right
+            if rv is True: return left
+            if lv is False and is_pure(right): return Boolean('false')
+            if rv is False and is_pure(left): return Boolean('false')
+        elif op == 'or':
+            if lv is False: return right
+            if rv is False: return left
+            if lv is True and is_pure(right): return Boolean('true')
+            if rv is True and is_pure(left): return Boolean('true')
+        return node
+
+    def visit_exp_unaria(self, node: UnaryOp):
+        node.operand = yield node.operand
+        operand = node.operand
+        v = const_value(operand)
+        if node.op == '-':
+            if v is not None:
+                return Number(-v)
+            if isinstance(operand, UnaryOp) and operand.op == '-':
+                return operand.operand
+        elif node.op == 'not':
+            if v is not None:
+                return make_const(not v)
+            if isinstance(operand, UnaryOp) and operand.op == 'not':
+                return operand.operand
+            if isinstance(operand, BinaryOp) and operand.op in INVERSE_REL:
+                operand.op = INVERSE_REL[operand.op]
+                return operand
+        return node
@@ -0,0 +1,163 @@
+from typing import Dict, List, Optional
+from rascal_ast import *
+from rascal_callgraph import CallGraph
+from rascal_constfold import ExprNumbering, const_value, expr_type, is_pure
+from rascal_semantic import SymbolEntry, declare_temp, var_ref
+
+def has_call(node: Optional[Node]) -> bool:
+    return node is not None and any(isinstance(n, (ProcedureCall, FunctionCall)) for n in walk(node))
+
+#Subexpressão que vale a pena guardar: operação sobre algo que não é literal
+def is_candidate(node: Node) -> bool:
+    if isinstance(node, BinaryOp):
+        return True
+    return isinstance(node, UnaryOp) and const_value(node.operand) is None
+
+#Eliminação de subexpressões comuns dentro de blocos básicos.
+#Um bloco básico é uma sequência de atribuições, read e write sem chamadas,
+#terminada opcionalmente pela condição de um if. As expressões recebem números
+#de valor (variáveis versionadas a cada atribuição), e uma subexpressão que se
+#repete com o mesmo valor é calculada uma vez num temporário antes do comando
+#em que aparece primeiro; as repetições passam a ler o temporário. Os
+#temporários são variáveis locais da rotina, reaproveitadas entre blocos, e
+#entram no AMEM/DMEM do bloco como qualquer variável declarada.
+class CommonSubexpressionEliminator(NodeTransformer):
+    def __init__(self):
+        self.block: Optional[Block] = None
+        self.level = 0
+        self.slots: Dict[str, List[SymbolEntry]] = {}
+
+    def visit_program(self, node: Program):
+        graph = CallGraph(node)
+        owners = [(decl.block, entry.level) for entry, decl in graph.decls.items()]
+        owners.append((node.block, 0))
+        for block, level in owners:
+            self.block, self.level, self.slots = block, level, {}
+            block.compound_statement = self.visit(block.compound_statement)
+        return node
+
+    @staticmethod
+    def is_simple(stmt: Statement) -> bool:
+        return isinstance(stmt, (Assignment, Read, Write)) and not has_call(stmt)
+
+    def visit_seq_comandos(self, node: CompoundStatement):
+        result: List[Statement] = []
+        block: List[Statement] = []
+        for stmt in node.statements:
+            if self.is_simple(stmt):
+                block.append(stmt)
+                continue
+            if isinstance(stmt, If) and not has_call(stmt.condition):
+                # a condição é o fim do bloco; os ramos são blocos novos
+                block.append(stmt)
+                result.extend(self.eliminate(block))
+                block = []
+                stmt.then_statement = yield stmt.then_statement
+                if stmt.else_statement:
+                    stmt.else_statement = yield stmt.else_statement
+                continue
+            result.extend(self.eliminate(block))
+            block = []
+            result.append((yield stmt))
+        result.extend(self.eliminate(block))
+        node.statements = [s for s in result if s is not None]
+        return node
+
+    #Expressões avaliadas por um comando: (pai, campo, índice, pode falhar?)
+    #Só no início de um comando uma expressão que pode falhar é antecipada
+    #sem trocar a ordem em relação a efeitos visíveis (IMPR de um write), e
+    #nunca de dentro do operando direito de um and/or.
+    @staticmethod
+    def roots(stmt: Statement):
+        if isinstance(stmt, Assignment):
+            return [(stmt, 'expression', None, True)]
+        if isinstance(stmt, Write):
+            return [(stmt, 'expressions', k, k == 0) for k in range(len(stmt.expressions))]
+        if isinstance(stmt, If):
+            return [(stmt, 'condition', None, False)]
+        return []
+
+    def alloc(self, used: Dict[str, int], type_name: str) -> SymbolEntry:
+        pool = self.slots.setdefault(type_name, [])
+        k = used.get(type_name, 0)
+        if k == len(pool):
+            pool.append(declare_temp(self.block, self.level, type_name))
+        used[type_name] = k + 1
+        return pool[k]
+
+    def eliminate(self, stmts: List[Statement]) -> List[Statement]:
+        if not stmts:
+            return stmts
+        numbering = ExprNumbering()
+        versions: Dict[object, int] = {}
+        keys: Dict[int, int] = {}
+        sizes: Dict[int, int] = {}
+        counts: Dict[int, int] = {}
+
+        # 1. números de valor e quantas vezes cada valor é calculado
+        for stmt in stmts:
+            for parent, field, index, _ in self.roots(stmt):
+                root = getattr(parent, field) if index is None else getattr(parent, field)[index]
+                nums = numbering.numbers(root, versions)
+                for n in reversed(list(walk(root))):
+                    sizes[id(n)] = 1 + sum(sizes[id(c)] for c in children(n))
+                    if is_candidate(n):
+                        keys[id(n)] = nums[id(n)]
+                        counts[nums[id(n)]] = counts.get(nums[id(n)], 0) + 1
+            for target in self.targets(stmt):
+                versions[target] = versions.get(target, 0) + 1
+
+        # 2. substitui as repetições por temporários
+        available: Dict[int, SymbolEntry] = {}
+        used: Dict[str, int] = {}
+        out: List[Statement] = []
+        for stmt in stmts:
+            pre: List[Statement] = []
+            stack: list = list(reversed(self.roots(stmt)))
+            while stack:
+                item = stack.pop()
+                if item[0] == 'def':
+                    pre.append(Assignment(var_ref(item[1]), item[2]))
+                    continue
+                parent, field, index, may_trap = item
+                node = getattr(parent, field) if index is None else getattr(parent, field)[index]
+                key = keys.get(id(node))
+                if key is not None and key in available:
+                    self.replace(parent, field, index, var_ref(available[key]))
+                    continue
+                if key is not None and counts[key] >= 2 and (counts[key] - 1) * (sizes[id(node)] - 1) > 2 \
+                        and (may_trap or is_pure(node)):
+                    temp = available[key] = self.alloc(used, expr_type(node))
+                    # as ocorrências internas das repetições somem junto com elas
+                    for n in walk(node):
+                        if n is not node and id(n) in keys:
+                            counts[keys[id(n)]] -= counts[key] - 1
+                    self.replace(parent, field, index, var_ref(temp))
+                    # a definição vai depois das dos seus próprios operandos
+                    stack.append(('def', temp, node))
+                for name, value in vars(node).items():
+                    if isinstance(value, list):
+                        stack.extend((node, name, k, may_trap) for k, item in enumerate(value) if isinstance(item, Node))
+                    elif isinstance(value, Node):
+                        # o operando direito de and/or pode não ser avaliado
+                        short = isinstance(node, BinaryOp) and node.op in ('and', 'or') and name == 'right'
+                        stack.append((node, name, None, may_trap and not short))
+            out.extend(pre)
+            out.append(stmt)
+        return out
+
+    @staticmethod
+    def replace(parent: Node, field: str, index: Optional[int], new: Node):
+        if index is None:
+            setattr(parent, field, new)
+        else:
+            getattr(parent, field)[index] = new
+
+    #Variáveis alteradas pelo comando
+    @staticmethod
+    def targets(stmt: Statement) -> List[object]:
+        if isinstance(stmt, Assignment):
+            return [stmt.variable.entry]
+        if isinstance(stmt, Read):
+            return [v.entry for v in stmt.variables]
+        return []
@@ -0,0 +1,77 @@
+from rascal_ast import *
+from rascal_callgraph import CallGraph
+from rascal_constfold import const_value, is_pure
+
+def is_empty(stmt) -> bool:
+    return stmt is None or (isinstance(stmt, CompoundStatement) and not stmt.statements)
+
+#Remove código morto da AST já anotada: ramos de condições constantes,
+#laços que nunca executam, comandos inalcançáveis depois de um laço infinito
+#e sub-rotinas que nenhuma chamada alcança a partir do programa principal.
+#Deve rodar depois do ConstantFolder, que expõe as condições constantes.
+class DeadCodeEliminator(NodeTransformer):
+    def __init__(self):
+        #ids dos comandos já visitados que nunca terminam normalmente
+        #(laço com condição constante verdadeira, ou bloco/if que sempre cai num)
+        self.diverging = set()
+
+    def never_completes(self, stmt) -> bool:
+        return stmt is not None and id(stmt) in self.diverging
+
+    def visit_program(self, node: Program):
+        yield from self.generic_visit(node)
+        remove_unreachable_subroutines(node)
+        return node
+
+    def visit_cmd_condicional(self, node: If):
+        node.condition = yield node.condition
+        node.then_statement = yield node.then_statement
+        if node.else_statement:
+            node.else_statement = yield node.else_statement
+        if is_empty(node.else_statement):
+            node.else_statement = None
+        v = const_value(node.condition)
+        if v is True:
+            return node.then_statement
+        if v is False:
+            return node.else_statement
+        if is_empty(node.then_statement) and node.else_statement is None and is_pure(node.condition):
+            return None
+        if self.never_completes(node.then_statement) and self.never_completes(node.else_statement):
+            self.diverging.add(id(node))
+        return node
+
+    def visit_cmd_repeticao(self, node: While):
+        if const_value(node.condition) is False:
+            return None
+        node.statement = yield node.statement
+        if const_value(node.condition) is True:
+            self.diverging.add(id(node))
+        return node
+
+    #Achata blocos aninhados, descarta comandos vazios e corta o que vier
+    #depois de um comando que nunca termina
+    def visit_seq_comandos(self, node: CompoundStatement):
+        statements = []
+        for stmt in node.statements:
+            if stmt is None:
+                continue
+            stmt = yield stmt
+            if stmt is None:
+                continue
+            if isinstance(stmt, CompoundStatement):
+                statements.extend(stmt.statements)
+            else:
+                statements.append(stmt)
+            if self.never_completes(stmt):
+                self.diverging.add(id(node))
+                break
+        node.statements = statements
+        return node
+
+#Retira dos blocos as declarações de sub-rotinas que não são alcançáveis
+def remove_unreachable_subroutines(program: Program):
+    live = CallGraph(program).reachable()
+    for node in walk(program):
+        if isinstance(node, Block) and node.subroutine_declarations:
+            node.subroutine_declarations = [s for s in node.subroutine_declarations if s.entry in live]
@@ -0,0 +1,230 @@
+import copy
+from typing import Dict, List, Optional, Set, Tuple
+from rascal_ast import *
+from rascal_callgraph import CallGraph
+from rascal_constfold import is_pure
+from rascal_semantic import SymbolEntry, declare_temp, var_ref
+
+#Tamanho máximo (em nós da AST) do corpo de uma sub-rotina para ser expandida
+DEFAULT_INLINE_SIZE = 40
+
+def subtree_size(node: Node) -> int:
+    return sum(1 for _ in walk(node))
+
+#Troca 'old' por 'new' no nó que o contém, dentro da subárvore 'root'
+def replace_child(root: Node, old: Node, new: Node):
+    for n in walk(root):
+        for field, value in vars(n).items():
+            if value is old:
+                setattr(n, field, new)
+                return
+            if isinstance(value, list):
+                for k, item in enumerate(value):
+                    if item is old:
+                        value[k] = new
+                        return
+
+#Primeira chamada de função executada ao avaliar 'exprs' (na ordem do
+#CodeGenerator: operandos da esquerda para a direita, argumentos do último
+#para o primeiro) e os nós avaliados antes dela. Para no operando direito de
+#um and/or em curto-circuito, que pode nem ser avaliado.
+def first_call(exprs: List[Expression]) -> Tuple[Optional[FunctionCall], List[Node]]:
+    preceding: List[Node] = []
+    stack = [(e, False) for e in reversed(exprs)]
+    while stack:
+        node, expanded = stack.pop()
+        if node is None:
+            return None, preceding
+        if expanded:
+            if isinstance(node, FunctionCall):
+                return node, preceding
+            preceding.append(node)
+            continue
+        stack.append((node, True))
+        if isinstance(node, BinaryOp):
+            if node.op in ('and', 'or') and not is_pure(node.right):
+                stack.append((None, False))
+            else:
+                stack.append((node.right, False))
+            stack.append((node.left, False))
+        elif isinstance(node, UnaryOp):
+            stack.append((node.operand, False))
+        elif isinstance(node, FunctionCall):
+            for arg in node.arguments:
+                stack.append((arg, False))
+    return None, preceding
+
+#Variáveis não locais que a sub-rotina pode alterar, ou None se ela chama
+#outras sub-rotinas (efeito desconhecido)
+def nonlocal_writes(decl: SubroutineDeclaration) -> Optional[Set[SymbolEntry]]:
+    level = decl.entry.level
+    writes: Set[SymbolEntry] = set()
+    for n in walk(decl.block.compound_statement):
+        if isinstance(n, (ProcedureCall, FunctionCall)):
+            return None
+        targets = [n.variable] if isinstance(n, Assignment) else n.variables if isinstance(n, Read) else []
+        for v in targets:
+            if v.entry is not None and v.entry.level < level:
+                writes.add(v.entry)
+    return writes
+
+#Expansão em linha de sub-rotinas pequenas e não recursivas.
+#Cada chamada vira: atribuição dos argumentos a locais novos do chamador
+#(na mesma ordem de avaliação da MEPA), seguida de uma cópia do corpo em que
+#parâmetros, variáveis locais e a variável de retorno @func apontam para esses
+#locais. Referências não locais continuam válidas, pois o chamador enxerga o
+#mesmo escopo estático da sub-rotina. Chamadas de função dentro de expressões
+#são antecipadas para antes do comando apenas quando isso não muda a ordem
+#dos efeitos observáveis.
+class Inliner(NodeTransformer):
+    def __init__(self, max_size: int = DEFAULT_INLINE_SIZE):
+        self.max_size = max_size
+        self.block: Optional[Block] = None
+        self.level = 0
+
+    def visit_program(self, node: Program):
+        if self.max_size <= 0 or not node.block.subroutine_declarations:
+            return node
+        self.graph = CallGraph(node)
+        self.recursive = {e for e in self.graph.decls if self.graph.is_recursive(e)}
+        self.call_counts: Dict[object, int] = {}
+        for sites in self.graph.call_sites.values():
+            for call in sites:
+                self.call_counts[call.entry] = self.call_counts.get(call.entry, 0) + 1
+        #O crescimento total fica limitado ao tamanho original do programa
+        self.remaining = subtree_size(node)
+
+        #Chamadas primeiro: cada corpo já chega expandido a quem o copia.
+        #Rotinas sem nenhuma chamada expansível nem são percorridas.
+        for entry in self.postorder():
+            decl = self.graph.decls[entry]
+            if self.has_candidates(entry):
+                self.block, self.level = decl.block, entry.level
+                decl.block.compound_statement = self.visit(decl.block.compound_statement)
+        if self.has_candidates(None):
+            self.block, self.level = node.block, 0
+            node.block.compound_statement = self.visit(node.block.compound_statement)
+        return node
+
+    def has_candidates(self, owner) -> bool:
+        return any(self.can_inline(call.entry) for call in self.graph.call_sites[owner])
+
+    def postorder(self) -> List[object]:
+        order: List[object] = []
+        seen: Set[object] = set()
+        for root in self.graph.decls:
+            if root in seen:
+                continue
+            seen.add(root)
+            stack = [(root, iter(self.graph.callees.get(root, ())))]
+            while stack:
+                entry, it = stack[-1]
+                nxt = next((e for e in it if e not in seen and e in self.graph.decls), None)
+                if nxt is None:
+                    stack.pop()
+                    order.append(entry)
+                else:
+                    seen.add(nxt)
+                    stack.append((nxt, iter(self.graph.callees.get(nxt, ()))))
+        return order
+
+    def can_inline(self, entry) -> bool:
+        decl = self.graph.decls.get(entry)
+        if decl is None or entry in self.recursive:
+            return False
+        body = decl.block.compound_statement
+        # o corpo não pode depender de sub-rotinas declaradas dentro dela
+        nested = {n.entry for n in walk(decl.block) if isinstance(n, SubroutineDeclaration) and n is not decl}
+        if any(isinstance(n, (ProcedureCall, FunctionCall)) and n.entry in nested for n in walk(body)):
+            return False
+        size = subtree_size(body)
+        if size > self.remaining:
+            return False
+        return size <= self.max_size or self.call_counts.get(entry, 0) == 1
+
+    #A chamada pode ser executada antes de tudo o que a precede na expressão?
+    def can_hoist(self, call: FunctionCall, preceding: List[Node]) -> bool:
+        if not preceding:
+            return True
+        if not all(is_pure(n) for n in preceding):
+            return False
+        writes = nonlocal_writes(self.graph.decls[call.entry])
+        if writes is None:
+            return not any(isinstance(n, Var) for n in preceding)
+        return not any(isinstance(n, Var) and n.entry in writes for n in preceding)
+
+    #Devolve os comandos que executam a sub-rotina e a entrada do resultado
+    def expand(self, entry, arguments: List[Expression]) -> Tuple[List[Statement], Optional[SymbolEntry]]:
+        decl = self.graph.decls[entry]
+        body = decl.block.compound_statement
+        self.remaining -= subtree_size(body)
+
+        stmts: List[Statement] = []
+        params: Dict[int, SymbolEntry] = {}
+        for i in reversed(range(len(arguments))):
+            temp = declare_temp(self.block, self.level, entry.params[i])
+            params[-5 - i] = temp
+            stmts.append(Assignment(var_ref(temp), arguments[i]))
+        result = None
+        if isinstance(decl, FunctionDeclaration):
+            result = declare_temp(self.block, self.level, entry.type)
+
+        memo: Dict[int, object] = {}
+        for n in walk(body):
+            e = n.entry
+            if e is None or id(e) in memo:
+                continue
+            target = e
+            if isinstance(n, Var) and e.level == entry.level:
+                if e.category == 'param':
+                    target = params[e.offset]
+                elif e.name == f"@{decl.name}":
+                    target = result
+                else:
+                    target = declare_temp(self.block, self.level, e.type)
+            memo[id(e)] = target
+        stmts.append(copy.deepcopy(body, memo))
+        return stmts, result
+
+    #Antecipa as chamadas de função de 'exprs' que podem ser expandidas
+    def hoist_calls(self, stmt: Statement, exprs) -> List[Statement]:
+        pre: List[Statement] = []
+        while True:
+            call, preceding = first_call(exprs())
+            if call is None or not self.can_inline(call.entry) or not self.can_hoist(call, preceding):
+                return pre
+            stmts, result = self.expand(call.entry, call.arguments)
+            pre.extend(stmts)
+            replace_child(stmt, call, var_ref(result))
+
+    def finish(self, pre: List[Statement], stmt: Statement) -> Statement:
+        if not pre:
+            return stmt
+        return CompoundStatement(pre + [stmt])
+
+    def visit_cmd_atrib(self, node: Assignment):
+        pre = self.hoist_calls(node, lambda: [node.expression])
+        return self.finish(pre, node)
+
+    def visit_write(self, node: Write):
+        # só a primeira expressão: as demais vêm depois de um IMPR
+        pre = self.hoist_calls(node, lambda: node.expressions[:1])
+        return self.finish(pre, node)
+
+    def visit_cmd_condicional(self, node: If):
+        yield from self.generic_visit(node)
+        pre = self.hoist_calls(node, lambda: [node.condition])
+        return self.finish(pre, node)
+
+    def visit_cmd_repeticao(self, node: While):
+        # a condição é reavaliada a cada volta: só o corpo é tratado
+        node.statement = yield node.statement
+        return node
+
+    def visit_proc_call(self, node: ProcedureCall):
+        # argumentos são avaliados do último para o primeiro
+        pre = self.hoist_calls(node, lambda: list(reversed(node.arguments)))
+        if self.can_inline(node.entry):
+            stmts, _ = self.expand(node.entry, node.arguments)
+            return CompoundStatement(pre + stmts)
+        return self.finish(pre, node)
@@ -0,0 +1,954 @@
+from typing import Dict, List, Optional, Set, Tuple
+import mepa_code
+from rascal_ast import *
+from rascal_constfold import const_value, is_pure
+
+#Representação intermediária em SSA: cada rotina (programa principal ou
+#sub-rotina) vira um grafo de fluxo de controle de blocos básicos.
+#
+#  AST anotada --lower_program--> IR com load/store --build_ssa--> SSA
+#  SSA --IRCodeGenerator--> MEPA
+#
+#Variáveis locais que nenhuma sub-rotina aninhada enxerga (inclusive
+#parâmetros e o retorno @func) são promovidas a valores SSA; as demais
+#(globais usadas em sub-rotinas, locais vistas por rotinas aninhadas)
+#continuam em memória e são acessadas por load/store.
+
+#Operadores binários e a instrução MEPA correspondente
+BINARY_INSTR = {
+    '+': 'SOMA', '-': 'SUBT', '*': 'MULT', 'div': 'DIVI',
+    'and': 'CONJ', 'or': 'DISJ',
+    '=': 'CMIG', '<>': 'CMDG', '<': 'CMME', '<=': 'CMEG', '>': 'CMMA', '>=': 'CMAG'
+}
+#Operações que produzem valor
+VALUE_OPS = ('const', 'undef', 'param', 'binop', 'unop', 'load', 'read', 'call', 'phi')
+#Operações sem efeito e que não falham: podem ser calculadas em qualquer ponto
+MOVABLE_OPS = ('const', 'undef', 'param')
+#Posição "extra" que é o próprio espaço do retorno da função
+RETURN_SLOT = -1
+
+#Instrução da IR; se produz valor, a própria instrução é o valor SSA.
+#  const value | undef | param entry | binop op [a, b] | unop op [a]
+#  load entry | store entry [v] | read | write [v] | call entry [args...]
+#  phi [um valor por predecessor, na ordem de block.preds] | retval [v]
+#  jump | branch [cond] | ret | halt   (terminadores; destinos em targets)
+class Instr:
+    __slots__ = ("id", "op", "args", "block", "value", "entry", "targets")
+
+    def __init__(self, op: str, args: Optional[List['Instr']] = None, value=None, entry=None,
+                 targets: Optional[List['BasicBlock']] = None):
+        self.id = 0
+        self.op = op
+        self.args = args or []
+        self.block: Optional[BasicBlock] = None
+        self.value = value
+        self.entry = entry
+        self.targets = targets or []
+
+    #Chamada de função produz valor; chamada de procedimento não
+    def produces_value(self) -> bool:
+        if self.op == 'call':
+            return self.entry.category == 'func'
+        return self.op in VALUE_OPS
+
+    def __repr__(self):
+        return f"%{self.id}"
+
+class BasicBlock:
+    def __init__(self, id: int):
+        self.id = id
+        self.phis: List[Instr] = []
+        self.instrs: List[Instr] = []
+        self.term: Optional[Instr] = None
+        self.preds: List['BasicBlock'] = []
+
+    @property
+    def succs(self) -> List['BasicBlock']:
+        return self.term.targets if self.term else []
+
+    def add(self, ins: Instr) -> Instr:
+        ins.block = self
+        (self.phis if ins.op == 'phi' else self.instrs).append(ins)
+        return ins
+
+    def __repr__(self):
+        return f"b{self.id}"
+
+#Uma rotina em IR
+class IRFunction:
+    def __init__(self, name: str, entry, level: int, nparams: int, nlocals: int, decl=None):
+        self.name = name
+        self.entry = entry          # SymbolEntry da sub-rotina; None no programa principal
+        self.level = level
+        self.nparams = nparams
+        self.nlocals = nlocals      # variáveis declaradas no bloco (AMEM do código atual)
+        self.decl = decl
+        self.blocks: List[BasicBlock] = []
+        self.promoted: Set[object] = set()
+        self.ret_entry = None
+        self.frame_size = nlocals   # com as posições extras da geração de código
+        self.next_id = 0
+
+    def new_block(self) -> BasicBlock:
+        b = BasicBlock(len(self.blocks))
+        self.blocks.append(b)
+        return b
+
+    def number(self, ins: Instr) -> Instr:
+        self.next_id += 1
+        ins.id = self.next_id
+        return ins
+
+    @property
+    def start(self) -> BasicBlock:
+        return self.blocks[0]
+
+    def all_instrs(self):
+        for b in self.blocks:
+            yield from b.phis
+            yield from b.instrs
+            if b.term:
+                yield b.term
+
+    def dump(self) -> str:
+        lines = [f"function {self.name} (level {self.level}):"]
+        for b in self.blocks:
+            lines.append(f"  {b}:  ; preds {', '.join(map(str, b.preds))}")
+            for ins in b.phis + b.instrs + ([b.term] if b.term else []):
+                lines.append("    " + format_instr(ins))
+        return "\n".join(lines)
+
+def format_instr(ins: Instr) -> str:
+    parts = [ins.op]
+    if ins.op in ('binop', 'unop'):
+        parts.append(ins.value)
+    elif ins.op == 'const':
+        parts.append(str(ins.value))
+    if ins.entry is not None:
+        parts.append(ins.entry.name)
+    parts.extend(map(repr, ins.args))
+    parts.extend(map(repr, ins.targets))
+    text = " ".join(parts)
+    return f"%{ins.id} = {text}" if ins.produces_value() else text
+
+class IRProgram:
+    def __init__(self, main: IRFunction, functions: List[IRFunction]):
+        self.main = main
+        self.functions = functions
+
+    def dump(self) -> str:
+        return "\n\n".join(f.dump() for f in self.functions + [self.main])
+
+# ===================================================================
+# AST -> IR
+# ===================================================================
+
+#Constrói a IR de cada rotina a partir da AST anotada. As variáveis são
+#acessadas por load/store; build_ssa depois promove as que podem ser valores.
+class IRBuilder(NodeVisitor):
+    def __init__(self, fn: IRFunction):
+        self.fn = fn
+        self.cur = fn.new_block()
+
+    def emit(self, op: str, args=None, **kw) -> Instr:
+        return self.cur.add(self.fn.number(Instr(op, args, **kw)))
+
+    def terminate(self, op: str, args=None, targets=None):
+        if self.cur.term is not None:
+            return
+        ins = self.fn.number(Instr(op, args, targets=targets))
+        ins.block = self.cur
+        self.cur.term = ins
+        for t in ins.targets:
+            t.preds.append(self.cur)
+
+    def jump(self, target: BasicBlock):
+        self.terminate('jump', targets=[target])
+
+    def visit_seq_comandos(self, node: CompoundStatement):
+        for stmt in node.statements:
+            yield stmt
+
+    def visit_cmd_atrib(self, node: Assignment):
+        v = yield node.expression
+        self.emit('store', [v], entry=node.variable.entry)
+
+    def visit_read(self, node: Read):
+        for var in node.variables:
+            v = self.emit('read')
+            self.emit('store', [v], entry=var.entry)
+
+    def visit_write(self, node: Write):
+        for expr in node.expressions:
+            v = yield expr
+            self.emit('write', [v])
+
+    #Argumentos do último para o primeiro, como o CodeGenerator os empilha
+    def call_args(self, node):
+        args = [None] * len(node.arguments)
+        for i in reversed(range(len(node.arguments))):
+            args[i] = yield node.arguments[i]
+        return args
+
+    def visit_proc_call(self, node: ProcedureCall):
+        args = yield self.call_args(node)
+        self.emit('call', args, entry=node.entry)
+
+    def visit_func_call(self, node: FunctionCall):
+        args = yield self.call_args(node)
+        return self.emit('call', args, entry=node.entry)
+
+    def visit_exp_var(self, node: Var):
+        return self.emit('load', entry=node.entry)
+
+    def visit_exp_num(self, node: Number):
+        return self.emit('const', value=node.value)
+
+    def visit_exp_logica(self, node: Boolean):
+        return self.emit('const', value=1 if node.value == 'true' else 0)
+
+    def visit_exp_binaria(self, node: BinaryOp):
+        # and/or com chamada à direita: curto-circuito, como no CodeGenerator
+        if node.op in ('and', 'or') and not is_pure(node.right):
+            t, f, join = self.fn.new_block(), self.fn.new_block(), self.fn.new_block()
+            yield self.cond(node, t, f)
+            self.cur = t
+            one = self.emit('const', value=1)
+            self.jump(join)
+            self.cur = f
+            zero = self.emit('const', value=0)
+            self.jump(join)
+            self.cur = join
+            return self.emit('phi', [one, zero])
+        left = yield node.left
+        right = yield node.right
+        return self.emit('binop', [left, right], value=node.op)
+
+    def visit_exp_unaria(self, node: UnaryOp):
+        v = yield node.operand
+        if node.op not in ('not', '-'):
+            return v
+        return self.emit('unop', [v], value=node.op)
+
+    #Desvia para 't' se a condição for verdadeira, senão para 'f'
+    def cond(self, expr, t: BasicBlock, f: BasicBlock):
+        v = const_value(expr)
+        if v is not None:
+            self.jump(t if v else f)
+        elif isinstance(expr, UnaryOp) and expr.op == 'not':
+            yield self.cond(expr.operand, f, t)
+        elif isinstance(expr, BinaryOp) and expr.op in ('and', 'or'):
+            mid = self.fn.new_block()
+            if expr.op == 'and':
+                yield self.cond(expr.left, mid, f)
+            else:
+                yield self.cond(expr.left, t, mid)
+            self.cur = mid
+            yield self.cond(expr.right, t, f)
+        else:
+            c = yield expr
+            self.terminate('branch', [c], targets=[t, f])
+
+    def visit_cmd_condicional(self, node: If):
+        then_b, join = self.fn.new_block(), self.fn.new_block()
+        else_b = self.fn.new_block() if node.else_statement else join
+        yield self.cond(node.condition, then_b, else_b)
+        self.cur = then_b
+        yield node.then_statement
+        self.jump(join)
+        if node.else_statement:
+            self.cur = else_b
+            yield node.else_statement
+            self.jump(join)
+        self.cur = join
+
+    def visit_cmd_repeticao(self, node: While):
+        header, body, exit_b = self.fn.new_block(), self.fn.new_block(), self.fn.new_block()
+        self.jump(header)
+        self.cur = header
+        yield self.cond(node.condition, body, exit_b)
+        self.cur = body
+        yield node.statement
+        self.jump(header)
+        self.cur = exit_b
+
+#Entradas de variáveis usadas dentro de cada sub-rotina (corpo próprio)
+def referenced_entries(decl) -> Set[object]:
+    return {n.entry for n in walk(decl.block.compound_statement) if isinstance(n, Var) and n.entry is not None}
+
+def lower_program(program: Program) -> IRProgram:
+    decls = [n for n in walk(program.block) if isinstance(n, SubroutineDeclaration)]
+    # variáveis vistas por rotinas de nível mais profundo que o seu ficam em memória
+    escaped: Set[object] = set()
+    for d in decls:
+        escaped |= {e for e in referenced_entries(d) if e.level < d.entry.level}
+
+    functions = [lower_routine(d.name, d, d.block, d.entry.level, escaped) for d in decls]
+    main = lower_routine(program.name, None, program.block, 0, escaped)
+    return IRProgram(main, functions)
+
+def lower_routine(name: str, decl, block: Block, level: int, escaped: Set[object]) -> IRFunction:
+    nparams = sum(len(p.identifiers) for p in decl.params) if decl else 0
+    nlocals = sum(len(d.identifiers) for d in block.var_declarations)
+    fn = IRFunction(name, decl.entry if decl else None, level, nparams, nlocals, decl)
+    builder = IRBuilder(fn)
+
+    body = block.compound_statement
+    own = {n.entry for n in walk(body) if isinstance(n, Var) and n.entry is not None and n.entry.level == level}
+    fn.promoted = {e for e in own if e.category in ('var', 'param') and e not in escaped}
+    if isinstance(decl, FunctionDeclaration):
+        fn.ret_entry = next((e for e in own if e.name == f"@{decl.name}"), None)
+
+    # parâmetros promovidos começam com o valor passado pelo chamador
+    for e in sorted((e for e in fn.promoted if e.category == 'param'), key=lambda e: -e.offset):
+        builder.emit('store', [builder.emit('param', entry=e)], entry=e)
+
+    builder.visit(body)
+    if decl is None:
+        builder.terminate('halt')
+    else:
+        if fn.ret_entry is not None and fn.ret_entry in fn.promoted:
+            builder.emit('retval', [builder.emit('load', entry=fn.ret_entry)], entry=fn.ret_entry)
+        builder.terminate('ret')
+    remove_unreachable_blocks(fn)
+    build_ssa(fn)
+    return fn
+
+# ===================================================================
+# Análises
+# ===================================================================
+
+#Blocos em pós-ordem reversa a partir da entrada. Os sucessores são visitados
+#do último para o primeiro, para que o destino "verdadeiro" de um desvio
+#venha logo depois dele.
+def reverse_postorder(fn: IRFunction) -> List[BasicBlock]:
+    order: List[BasicBlock] = []
+    seen = {fn.start.id}
+    stack = [(fn.start, reversed(fn.start.succs))]
+    while stack:
+        b, it = stack[-1]
+        nxt = next((s for s in it if s.id not in seen), None)
+        if nxt is None:
+            stack.pop()
+            order.append(b)
+        else:
+            seen.add(nxt.id)
+            stack.append((nxt, reversed(nxt.succs)))
+    order.reverse()
+    return order
+
+def remove_unreachable_blocks(fn: IRFunction):
+    live = reverse_postorder(fn)
+    ids = {b.id for b in live}
+    for b in live:
+        keep = [k for k, p in enumerate(b.preds) if p.id in ids]
+        if len(keep) != len(b.preds):
+            b.preds = [b.preds[k] for k in keep]
+            for phi in b.phis:
+                phi.args = [phi.args[k] for k in keep]
+    fn.blocks = live
+    for k, b in enumerate(fn.blocks):
+        b.id = k
+
+#Dominador imediato de cada bloco (semi-NCA: semidominadores de Lengauer e
+#Tarjan, com compressão de caminho iterativa, seguidos de subida na árvore
+#da busca em profundidade). Quase linear mesmo com milhares de predecessores
+#num único bloco, como no destino falso de uma longa cadeia de 'and'.
+def dominators(fn: IRFunction) -> Dict[BasicBlock, BasicBlock]:
+    # pré-ordem da busca em profundidade e pai de cada bloco na árvore
+    pre: List[BasicBlock] = []
+    num: Dict[BasicBlock, int] = {}
+    parent: List[int] = []
+    stack = [(fn.start, -1)]
+    while stack:
+        b, p = stack.pop()
+        if b in num:
+            continue
+        num[b] = len(pre)
+        pre.append(b)
+        parent.append(p)
+        for s in reversed(b.succs):
+            if s not in num:
+                stack.append((s, num[b]))
+
+    n = len(pre)
+    semi = list(range(n))
+    label = list(range(n))
+    ancestor = [-1] * n
+
+    def evaluate(v: int) -> int:
+        if ancestor[v] == -1:
+            return v
+        path = [v]
+        while ancestor[ancestor[path[-1]]] != -1:
+            path.append(ancestor[path[-1]])
+        path.pop()
+        for u in reversed(path):
+            a = ancestor[u]
+            if semi[label[a]] < semi[label[u]]:
+                label[u] = label[a]
+            ancestor[u] = ancestor[a]
+        return label[v]
+
+    for w in range(n - 1, 0, -1):
+        for p in pre[w].preds:
+            if p in num:
+                u = evaluate(num[p])
+                if semi[u] < semi[w]:
+                    semi[w] = semi[u]
+        ancestor[w] = parent[w]
+
+    idom = parent[:]
+    for w in range(1, n):
+        while idom[w] > semi[w]:
+            idom[w] = idom[idom[w]]
+    result = {pre[w]: pre[idom[w]] for w in range(1, n)}
+    result[fn.start] = fn.start
+    return result
+
+def dominator_tree(fn: IRFunction, idom: Dict[BasicBlock, BasicBlock]) -> Dict[BasicBlock, List[BasicBlock]]:
+    tree: Dict[BasicBlock, List[BasicBlock]] = {b: [] for b in fn.blocks}
+    for b, d in idom.items():
+        if b is not d:
+            tree[d].append(b)
+    return tree
+
+def dominates(idom: Dict[BasicBlock, BasicBlock], a: BasicBlock, b: BasicBlock) -> bool:
+    while True:
+        if a is b:
+            return True
+        if idom[b] is b:
+            return False
+        b = idom[b]
+
+def dominance_frontiers(fn: IRFunction, idom: Dict[BasicBlock, BasicBlock]) -> Dict[BasicBlock, Set[BasicBlock]]:
+    df: Dict[BasicBlock, Set[BasicBlock]] = {b: set() for b in fn.blocks}
+    for b in fn.blocks:
+        if len(b.preds) < 2:
+            continue
+        for p in b.preds:
+            runner = p
+            # quem já tem 'b' na fronteira já foi visitado até idom[b]
+            while runner is not idom[b] and b not in df[runner]:
+                df[runner].add(b)
+                runner = idom[runner]
+    return df
+
+#Cadeias uso-definição: para cada valor, as instruções que o usam
+def uses(fn: IRFunction) -> Dict[Instr, List[Instr]]:
+    result: Dict[Instr, List[Instr]] = {}
+    for ins in fn.all_instrs():
+        for a in ins.args:
+            result.setdefault(a, []).append(ins)
+    return result
+
+#Vivacidade dos valores SSA na entrada e na saída de cada bloco. O argumento
+#de um phi é usado no fim do predecessor correspondente.
+def liveness(fn: IRFunction) -> Tuple[Dict[BasicBlock, Set[Instr]], Dict[BasicBlock, Set[Instr]]]:
+    gen: Dict[BasicBlock, Set[Instr]] = {}
+    kill: Dict[BasicBlock, Set[Instr]] = {}
+    phi_uses: Dict[BasicBlock, Set[Instr]] = {b: set() for b in fn.blocks}
+    for b in fn.blocks:
+        defined = set(b.phis)
+        used = set()
+        for ins in b.instrs + ([b.term] if b.term else []):
+            for a in ins.args:
+                if a not in defined:
+                    used.add(a)
+            defined.add(ins)
+        gen[b], kill[b] = used, defined
+        for phi in b.phis:
+            for p, a in zip(b.preds, phi.args):
+                phi_uses[p].add(a)
+
+    live_in = {b: set() for b in fn.blocks}
+    live_out = {b: set() for b in fn.blocks}
+    order = list(reversed(reverse_postorder(fn)))
+    changed = True
+    while changed:
+        changed = False
+        for b in order:
+            out = set(phi_uses[b])
+            for s in b.succs:
+                out |= live_in[s] - set(s.phis)
+            inn = gen[b] | (out - kill[b])
+            if out != live_out[b] or inn != live_in[b]:
+                live_out[b], live_in[b] = out, inn
+                changed = True
+    return live_in, live_out
+
+# ===================================================================
+# Construção da SSA (Cytron et al.)
+# ===================================================================
+
+def build_ssa(fn: IRFunction):
+    idom = dominators(fn)
+    df = dominance_frontiers(fn, idom)
+    tree = dominator_tree(fn, idom)
+
+    # 1. phis nas fronteiras de dominância dos blocos que atribuem
+    phi_var: Dict[Instr, object] = {}
+    for var in sorted(fn.promoted, key=lambda e: e.offset):
+        defsites = [b for b in fn.blocks if any(i.op == 'store' and i.entry is var for i in b.instrs)]
+        work = list(defsites)
+        seen = set(defsites)
+        has_phi: Set[BasicBlock] = set()
+        while work:
+            d = work.pop()
+            for y in sorted(df[d], key=lambda b: b.id):
+                if y in has_phi:
+                    continue
+                has_phi.add(y)
+                phi = fn.number(Instr('phi', [None] * len(y.preds)))
+                y.add(phi)
+                phi_var[phi] = var
+                if y not in seen:
+                    seen.add(y)
+                    work.append(y)
+
+    # 2. renomeação em pré-ordem na árvore de dominadores
+    undef = fn.number(Instr('undef'))
+    fn.start.instrs.insert(0, undef)
+    undef.block = fn.start
+    current: Dict[object, List[Instr]] = {v: [] for v in fn.promoted}
+    replaced: Dict[Instr, Instr] = {}
+
+    def top(var):
+        stack = current[var]
+        return stack[-1] if stack else undef
+
+    stack = [(fn.start, False)]
+    pushed: Dict[BasicBlock, List[object]] = {}
+    while stack:
+        b, done = stack.pop()
+        if done:
+            for var in pushed.pop(b):
+                current[var].pop()
+            continue
+        mine: List[object] = []
+        # phis de and/or em curto-circuito já nascem com os argumentos
+        for phi in b.phis:
+            if phi in phi_var:
+                current[phi_var[phi]].append(phi)
+                mine.append(phi_var[phi])
+        kept = []
+        for ins in b.instrs:
+            if ins.op == 'load' and ins.entry in fn.promoted:
+                replaced[ins] = top(ins.entry)
+            elif ins.op == 'store' and ins.entry in fn.promoted:
+                current[ins.entry].append(ins.args[0])
+                mine.append(ins.entry)
+            else:
+                kept.append(ins)
+        b.instrs = kept
+        for s in b.succs:
+            if not s.phis:
+                continue
+            for k, p in enumerate(s.preds):
+                if p is b:
+                    for phi in s.phis:
+                        if phi in phi_var:
+                            phi.args[k] = top(phi_var[phi])
+        pushed[b] = mine
+        stack.append((b, True))
+        for child in reversed(tree[b]):
+            stack.append((child, False))
+
+    def resolve(v):
+        while v in replaced:
+            v = replaced[v]
+        return v
+
+    for ins in fn.all_instrs():
+        ins.args = [resolve(a) for a in ins.args]
+    simplify_phis(fn)
+
+#Remove phis triviais (todos os argumentos iguais, fora ele mesmo) e phis
+#cujo valor só chega a outros phis. Ambos por lista de trabalho, pois uma
+#cadeia de ifs aninhados forma uma cadeia de phis do mesmo tamanho.
+def simplify_phis(fn: IRFunction):
+    users = uses(fn)
+    replaced: Dict[Instr, Instr] = {}
+
+    def resolve(v):
+        root = v
+        while root in replaced:
+            root = replaced[root]
+        while v in replaced:
+            nxt = replaced[v]
+            replaced[v] = root
+            v = nxt
+        return root
+
+    work = [phi for b in fn.blocks for phi in b.phis]
+    while work:
+        phi = work.pop()
+        if phi in replaced:
+            continue
+        others = {resolve(a) for a in phi.args} - {phi}
+        if len(others) == 1:
+            value = others.pop()
+            replaced[phi] = value
+            # quem usava este phi pode ter ficado trivial
+            work.extend(u for u in users.get(phi, ()) if u.op == 'phi')
+            users.setdefault(value, []).extend(users.get(phi, ()))
+    if replaced:
+        for ins in fn.all_instrs():
+            ins.args = [resolve(a) for a in ins.args]
+
+    # phis vivos: usados por alguma instrução que não é phi, ou por um phi vivo
+    live: Set[Instr] = set()
+    work = [a for ins in fn.all_instrs() if ins.op != 'phi' for a in ins.args if a.op == 'phi']
+    while work:
+        phi = work.pop()
+        if phi in live:
+            continue
+        live.add(phi)
+        work.extend(a for a in phi.args if a.op == 'phi')
+    for b in fn.blocks:
+        b.phis = [phi for phi in b.phis if phi in live]
+
+# ===================================================================
+# IR -> MEPA
+# ===================================================================
+
+#Quebra arestas críticas (de bloco com dois sucessores para bloco com vários
+#predecessores), para que as cópias dos phis fiquem num bloco só da aresta
+def split_critical_edges(fn: IRFunction):
+    for s in list(fn.blocks):
+        if len(s.preds) < 2:
+            continue
+        for k, b in enumerate(s.preds):
+            if len(b.term.targets) < 2:
+                continue
+            mid = fn.new_block()
+            jump = fn.number(Instr('jump', targets=[s]))
+            jump.block = mid
+            mid.term = jump
+            mid.preds = [b]
+            s.preds[k] = mid
+            # se os dois destinos são 's', cada ocorrência ganha seu bloco
+            j = next(j for j, t in enumerate(b.term.targets) if t is s)
+            b.term.targets[j] = mid
+
+#Operandos na ordem em que a MEPA os avalia
+def eval_operands(ins: Instr) -> List[Instr]:
+    if ins.op == 'call':
+        return list(reversed(ins.args))
+    return list(ins.args)
+
+#Gera MEPA a partir da IR. Como a MEPA é uma máquina de pilha, valores usados
+#uma única vez, logo em seguida e no mesmo bloco são reconstruídos como
+#árvores de expressão e ficam na pilha; os demais vão para posições extras do
+#registro de ativação, compartilhadas entre valores que não estão vivos ao
+#mesmo tempo. Os phis viram cópias paralelas no fim dos predecessores:
+#todas as origens são empilhadas antes de qualquer ARMZ.
+class IRCodeGenerator:
+    def __init__(self):
+        self.code: List[mepa_code.Instr] = []
+        self.next_label_number = 0
+
+    def emit(self, instr: str, *args):
+        self.code.append(mepa_code.Instr(instr, list(args)))
+
+    def new_label(self) -> mepa_code.Label:
+        L = mepa_code.Label(f"R{self.next_label_number:02d}")
+        self.next_label_number += 1
+        return L
+
+    def emit_label(self, label: mepa_code.Label):
+        self.code.append(mepa_code.Instr("NADA", label=label))
+
+    def generate(self, program: IRProgram) -> List[mepa_code.Instr]:
+        self.routine_labels = {fn.entry: self.new_label() for fn in program.functions}
+        # rotinas folha não memoizadas: CHPF/RTPF, sem ENPR (como em
+        # rascal_codegen.leaf_routines)
+        self.leaves = {fn.entry for fn in program.functions
+                       if not fn.entry.memo and not any(ins.op == 'call' for ins in fn.all_instrs())}
+        self.states = {fn: self.prepare(fn) for fn in program.functions + [program.main]}
+        main = program.main
+        self.emit("INPP")
+        if main.frame_size:
+            self.emit("AMEM", main.frame_size)
+        if program.functions:
+            lab_main = self.new_label()
+            self.emit("DSVS", lab_main)
+            for fn in program.functions:
+                self.emit_label(self.routine_labels[fn.entry])
+                if fn.entry not in self.leaves:
+                    self.emit("ENPR", fn.level)
+                if fn.entry.memo:
+                    self.emit("MEMB", fn.level, fn.nparams)
+                if fn.frame_size:
+                    self.emit("AMEM", fn.frame_size)
+                self.emit_function(fn)
+            self.emit_label(lab_main)
+        self.emit_function(main)
+        self.emit("FIM")
+        return self.code
+
+    #Decisões de geração da rotina: (usos, valores na pilha, posições)
+    def prepare(self, fn: IRFunction):
+        split_critical_edges(fn)
+        self.fn = fn
+        self.users = uses(fn)
+        self.stackify(fn)
+        self.assign_slots(fn)
+        return self.users, self.inlined, self.slot
+
+    #Decide quais valores vão direto para a pilha do seu único uso
+    def stackify(self, fn: IRFunction):
+        self.inlined: Set[Instr] = set()
+        for b in fn.blocks:
+            seq = b.instrs + [b.term]
+            index = {ins: k for k, ins in enumerate(seq)}
+            for k in range(len(seq) - 1, -1, -1):
+                root = seq[k]
+                if root in self.inlined:
+                    continue
+                # 'pos' é a instrução que precisa vir logo antes da árvore já
+                # montada: só ela pode entrar sem trocar a ordem de nada
+                pos = k - 1
+                # no fim do bloco as cópias dos phis vêm antes do desvio
+                frames = [self.copy_sources(b) + eval_operands(root) if root is b.term else eval_operands(root)]
+                while frames:
+                    ops = frames[-1]
+                    if not ops:
+                        frames.pop()
+                        continue
+                    v = ops.pop()
+                    # constantes não geram código na posição em que foram definidas
+                    while pos >= 0 and seq[pos].op in MOVABLE_OPS:
+                        pos -= 1
+                    if v.block is b and index.get(v) == pos and v.op not in MOVABLE_OPS \
+                            and len(self.users.get(v, ())) == 1:
+                        self.inlined.add(v)
+                        pos -= 1
+                        frames.append(eval_operands(v))
+
+    #Origens das cópias de phi no fim do bloco (só blocos com um sucessor)
+    @staticmethod
+    def copy_sources(b: BasicBlock) -> List[Instr]:
+        if b.term is None or len(b.term.targets) != 1:
+            return []
+        s = b.term.targets[0]
+        if not s.phis:
+            return []
+        k = s.preds.index(b)
+        return [phi.args[k] for phi in s.phis]
+
+    #Valores que precisam de posição na memória
+    def needs_slot(self, v: Instr) -> bool:
+        return v.produces_value() and v.op not in MOVABLE_OPS and v not in self.inlined and bool(self.users.get(v))
+
+    #Coloração gulosa do grafo de interferência dos valores em posição
+    def assign_slots(self, fn: IRFunction):
+        live_in, live_out = liveness(fn)
+        interfere: Dict[Instr, Set[Instr]] = {}
+
+        def slotted_uses(roots):
+            found, stack = [], list(roots)
+            while stack:
+                a = stack.pop()
+                if a in self.inlined:
+                    stack.extend(a.args)
+                elif self.needs_slot(a):
+                    found.append(a)
+            return found
+
+        for b in fn.blocks:
+            live = {v for v in live_out[b] if self.needs_slot(v)}
+            for ins in reversed(b.instrs + [b.term]):
+                if ins in self.inlined:
+                    continue
+                if self.needs_slot(ins):
+                    live.discard(ins)
+                    interfere.setdefault(ins, set()).update(live)
+                    for other in live:
+                        interfere.setdefault(other, set()).add(ins)
+                # as cópias dos phis também são lidas no fim do bloco
+                live.update(slotted_uses(ins.args + self.copy_sources(b) if ins is b.term else ins.args))
+            phis = [p for p in b.phis if self.needs_slot(p)]
+            for p in phis:
+                group = (live | set(phis)) - {p}
+                interfere.setdefault(p, set()).update(group)
+                for other in group:
+                    interfere.setdefault(other, set()).add(p)
+
+        # um phi e seus argumentos preferem a mesma posição: a cópia some
+        related: Dict[Instr, List[Instr]] = {}
+        for b in fn.blocks:
+            for p in b.phis:
+                for a in p.args:
+                    if self.needs_slot(p) and self.needs_slot(a) and a is not p:
+                        related.setdefault(p, []).append(a)
+                        related.setdefault(a, []).append(p)
+
+        self.slot: Dict[Instr, int] = {}
+        # o valor devolvido pela função fica direto na posição de retorno
+        for b in fn.blocks:
+            for ins in b.instrs:
+                if ins.op == 'retval' and self.needs_slot(ins.args[0]):
+                    self.slot[ins.args[0]] = RETURN_SLOT
+        nslots = 0
+        for v in sorted(interfere, key=lambda v: v.id):
+            if v in self.slot:
+                continue
+            taken = {self.slot[o] for o in interfere[v] if o in self.slot}
+            preferred = [self.slot[r] for r in related.get(v, ()) if r in self.slot and self.slot[r] not in taken]
+            color = preferred[0] if preferred else 0
+            while color in taken:
+                color = max(color + 1, 0)
+            self.slot[v] = color
+            nslots = max(nslots, color + 1)
+        fn.frame_size = fn.nlocals + nslots
+
+    def offset(self, v: Instr) -> int:
+        if self.slot[v] == RETURN_SLOT:
+            return -5 - self.fn.nparams
+        return self.fn.nlocals + self.slot[v]
+
+    #Empilha um valor: árvore no próprio uso, constante ou leitura da posição
+    def push(self, value: Instr):
+        tasks: list = [('value', value)]
+        while tasks:
+            kind, v = tasks.pop()
+            if kind == 'instr':
+                self.emit_op(v)
+            elif kind == 'amem':
+                self.emit("AMEM", 1)
+            elif v.op == 'const':
+                self.emit("CRCT", v.value)
+            elif v.op == 'undef':
+                self.emit("CRCT", 0)
+            elif v.op == 'param':
+                self.emit("CRVL", v.entry.level, v.entry.offset)
+            elif v in self.inlined:
+                tasks.append(('instr', v))
+                tasks.extend(('value', a) for a in reversed(eval_operands(v)))
+                if v.op == 'call' and v.produces_value():
+                    tasks.append(('amem', v))
+            else:
+                self.emit("CRVL", self.fn.level, self.offset(v))
+
+    #Instrução com os operandos já na pilha
+    def emit_op(self, ins: Instr):
+        op = ins.op
+        if op == 'binop':
+            self.emit(BINARY_INSTR[ins.value])
+        elif op == 'unop':
+            self.emit("NEGA" if ins.value == 'not' else "INVR")
+        elif op == 'load':
+            self.emit("CRVL", ins.entry.level, ins.entry.offset)
+        elif op == 'store':
+            self.emit("ARMZ", ins.entry.level, ins.entry.offset)
+        elif op == 'retval':
+            self.emit("ARMZ", self.fn.level, -5 - self.fn.nparams)
+        elif op == 'read':
+            self.emit("LEIT")
+        elif op == 'write':
+            self.emit("IMPR")
+        elif op == 'call':
+            if ins.entry in self.leaves:
+                self.emit("CHPF", self.routine_labels[ins.entry], ins.entry.level)
+            else:
+                self.emit("CHPR", self.routine_labels[ins.entry], self.fn.level)
+
+    #Ordem dos blocos: pós-ordem reversa, com o teste de cada laço movido
+    #para depois do corpo (um só desvio por volta, como no CodeGenerator).
+    #O grafo vem de código estruturado, logo é redutível: as arestas de
+    #retorno são as que voltam na pós-ordem reversa.
+    @staticmethod
+    def layout(fn: IRFunction) -> List[BasicBlock]:
+        order = reverse_postorder(fn)
+        index = {b: k for k, b in enumerate(order)}
+        for h in list(order):
+            latches = [p for p in h.preds if index[p] >= index[h]]
+            if len(latches) == 1 and latches[0] is not h and latches[0].term.op == 'jump':
+                order.remove(h)
+                order.insert(order.index(latches[0]) + 1, h)
+        return order
+
+    def emit_function(self, fn: IRFunction):
+        self.fn = fn
+        self.users, self.inlined, self.slot = self.states[fn]
+        labels = {b: self.new_label() for b in fn.blocks}
+        order = self.layout(fn)
+        for k, b in enumerate(order):
+            nxt = order[k + 1] if k + 1 < len(order) else None
+            self.emit_label(labels[b])
+            for ins in b.instrs:
+                if ins in self.inlined or ins.op in MOVABLE_OPS:
+                    continue
+                if ins.op == 'retval' and self.slot.get(ins.args[0]) == RETURN_SLOT:
+                    continue
+                if ins.produces_value() and not self.users.get(ins):
+                    # valor sem uso: só é calculado se a árvore tiver efeito ou puder falhar
+                    if self.has_effect(ins):
+                        self.push_root(ins)
+                        self.emit("DMEM", 1)
+                    continue
+                self.push_root(ins)
+                if self.needs_slot(ins):
+                    self.emit("ARMZ", fn.level, self.offset(ins))
+            self.emit_terminator(fn, b, labels, nxt)
+
+    #Alguma instrução da árvore (a raiz e os operandos na própria pilha) tem
+    #efeito ou pode falhar
+    def has_effect(self, ins: Instr) -> bool:
+        stack = [ins]
+        while stack:
+            v = stack.pop()
+            if not is_pure_instr(v):
+                return True
+            stack.extend(a for a in v.args if a in self.inlined)
+        return False
+
+    #Emite a instrução com seus operandos (que podem ser árvores)
+    def push_root(self, ins: Instr):
+        if ins.op == 'call' and ins.produces_value():
+            self.emit("AMEM", 1)
+        for a in eval_operands(ins):
+            self.push(a)
+        self.emit_op(ins)
+
+    def emit_terminator(self, fn: IRFunction, b: BasicBlock, labels, nxt):
+        term = b.term
+        # cópia paralela; as que já estão na posição do phi são omitidas
+        s = term.targets[0] if len(term.targets) == 1 else None
+        copies = [(phi, v) for phi, v in zip(s.phis if s else [], self.copy_sources(b))
+                  if not (self.needs_slot(v) and self.slot[v] == self.slot[phi])]
+        for _, v in copies:
+            self.push(v)
+        for phi, _ in reversed(copies):
+            self.emit("ARMZ", fn.level, self.offset(phi))
+        if term.op == 'jump':
+            if term.targets[0] is not nxt:
+                self.emit("DSVS", labels[term.targets[0]])
+        elif term.op == 'branch':
+            t, f = term.targets
+            self.push(term.args[0])
+            self.emit("DSVF", labels[f])
+            if t is not nxt:
+                self.emit("DSVS", labels[t])
+        elif term.op == 'ret':
+            if fn.frame_size:
+                self.emit("DMEM", fn.frame_size)
+            if fn.entry.memo:
+                self.emit("MEMG")
+            if fn.entry in self.leaves:
+                self.emit("RTPF", fn.level, fn.nparams)
+            else:
+                self.emit("RTPR", fn.nparams)
+        elif term.op == 'halt':
+            if fn.frame_size:
+                self.emit("DMEM", fn.frame_size)
+            self.emit("PARA")
+
+def is_pure_instr(ins: Instr) -> bool:
+    if ins.op == 'binop' and ins.value == 'div':
+        return ins.args[1].op == 'const' and ins.args[1].value != 0
+    return ins.op in ('binop', 'unop', 'load', 'const', 'undef', 'param', 'phi')
+
+def generate_mepa(program: Program) -> List[mepa_code.Instr]:
+    return IRCodeGenerator().generate(lower_program(program))
@@ -0,0 +1,107 @@
+from typing import Dict, List, Optional, Set
+from rascal_ast import *
+from rascal_callgraph import CallGraph
+from rascal_constfold import ExprNumbering, const_value, expr_type
+from rascal_semantic import SymbolEntry, declare_temp, var_ref
+
+#Movimentação de código invariante de laço.
+#Subexpressões de um while (condição ou corpo) que só leem variáveis que o
+#laço não altera, nem diretamente nem pelas sub-rotinas que chama, são
+#calculadas uma única vez em temporários antes do laço. Como o corpo pode
+#nem executar, só são movidas expressões que não falham e sempre terminam:
+#sem 'div' por divisor variável e sem chamadas, exceto a funções puras
+#(ver hoistable_function).
+class LoopInvariantMotion(NodeTransformer):
+    def __init__(self):
+        self.block: Optional[Block] = None
+        self.level = 0
+        self.hoistable: Dict[object, bool] = {}
+
+    def visit_program(self, node: Program):
+        self.graph = CallGraph(node)
+        for entry, decl in self.graph.decls.items():
+            if any(isinstance(n, While) for n in walk(decl.block.compound_statement)):
+                self.block, self.level = decl.block, entry.level
+                decl.block.compound_statement = self.visit(decl.block.compound_statement)
+        if any(isinstance(n, While) for n in walk(node.block.compound_statement)):
+            self.block, self.level = node.block, 0
+            node.block.compound_statement = self.visit(node.block.compound_statement)
+        return node
+
+    #Função sem efeitos, sem entrada/saída, sem laços, não recursiva e que
+    #só chama funções com as mesmas garantias
+    def hoistable_function(self, entry) -> bool:
+        if entry in self.hoistable:
+            return self.hoistable[entry]
+        self.hoistable[entry] = False # provisório, corta ciclos
+        decl = self.graph.decls.get(entry)
+        ok = (isinstance(decl, FunctionDeclaration) and not self.graph.writes[entry]
+              and not self.graph.io[entry] and not self.graph.is_recursive(entry))
+        if ok:
+            for n in walk(decl.block.compound_statement):
+                if isinstance(n, (While, ProcedureCall)) or (isinstance(n, BinaryOp) and n.op == 'div' and not const_value(n.right)):
+                    ok = False
+                    break
+                if isinstance(n, FunctionCall) and not self.hoistable_function(n.entry):
+                    ok = False
+                    break
+        self.hoistable[entry] = ok
+        return ok
+
+    def invariant(self, expr: Expression, assigned: Set[object]) -> bool:
+        for n in walk(expr):
+            if isinstance(n, Var):
+                if n.entry in assigned:
+                    return False
+            elif isinstance(n, FunctionCall):
+                if not self.hoistable_function(n.entry) or self.graph.reads[n.entry] & assigned:
+                    return False
+            elif isinstance(n, BinaryOp) and n.op == 'div' and not const_value(n.right):
+                return False
+        return True
+
+    #Só compensa guardar em temporário o que custa mais que um CRVL
+    @staticmethod
+    def worth_hoisting(expr: Expression) -> bool:
+        if isinstance(expr, (BinaryOp, FunctionCall)):
+            return True
+        return isinstance(expr, UnaryOp) and const_value(expr.operand) is None
+
+    #Laços externos primeiro: cada expressão sai do laço mais externo em que
+    #é invariante; os internos tratam depois o que sobrou
+    def visit_cmd_repeticao(self, node: While):
+        pre = self.hoist(node)
+        node.statement = yield node.statement
+        if not pre:
+            return node
+        return CompoundStatement(pre + [node])
+
+    def hoist(self, loop: While) -> List[Statement]:
+        assigned = self.graph.assigned_in(loop)
+        numbering = ExprNumbering()
+        temps: Dict[int, SymbolEntry] = {}
+        pre: List[Statement] = []
+        # (pai, campo, índice na lista ou None)
+        stack = [(loop, 'condition', None), (loop, 'statement', None)]
+        while stack:
+            parent, field, index = stack.pop()
+            node = getattr(parent, field) if index is None else getattr(parent, field)[index]
+            if node is None:
+                continue
+            if isinstance(node, Expression) and self.worth_hoisting(node) and self.invariant(node, assigned):
+                key = numbering.number(node)
+                if key not in temps:
+                    temps[key] = declare_temp(self.block, self.level, expr_type(node))
+                    pre.append(Assignment(var_ref(temps[key]), node))
+                ref = var_ref(temps[key])
+                if index is None:
+                    setattr(parent, field, ref)
+                else:
+                    getattr(parent, field)[index] = ref
+                continue
+            for name, value in vars(node).items():
+                if isinstance(value, list):
+                    stack.extend((node, name, k) for k, item in enumerate(value) if isinstance(item, Node))
+                elif isinstance(value, Node):
+                    stack.append((node, name, None))
+        return pre
@@ -0,0 +1,248 @@
+from typing import Dict, List, Optional, Set, Tuple
+from rascal_ast import *
+from rascal_constfold import ConstantFolder, REL_OPS, is_pure
+from rascal_semantic import SymbolEntry, declare_temp, var_ref
+from rascal_unroll import SWAPPED_REL, copy_tree, int_value
+
+#Expressão afim nas variáveis de indução do laço: soma de coeficiente
+#inteiro * variável, mais uma parte invariante (None se zero)
+class Affine:
+    def __init__(self, coefs: Optional[Dict[SymbolEntry, int]] = None, rest: Optional[Expression] = None):
+        self.coefs = coefs or {}
+        self.rest = rest
+
+    def scale(self, k: int) -> 'Affine':
+        rest = None if self.rest is None or k == 0 else times(k, self.rest)
+        return Affine({v: c * k for v, c in self.coefs.items()}, rest)
+
+    def plus(self, other: 'Affine') -> 'Affine':
+        coefs = dict(self.coefs)
+        for v, c in other.coefs.items():
+            coefs[v] = coefs.get(v, 0) + c
+        return Affine(coefs, add(self.rest, other.rest))
+
+def add(a: Optional[Expression], b: Optional[Expression]) -> Optional[Expression]:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return BinaryOp(a, '+', b)
+
+def times(k: int, e: Expression) -> Expression:
+    if k == 1:
+        return e
+    if k == -1:
+        return UnaryOp('-', e)
+    return BinaryOp(Number(k), '*', e)
+
+#Resumo de laços em forma fechada.
+#Um while cujo corpo só tem atribuições (sem read, write, chamadas, if ou
+#laços) e em que cada variável alterada é
+#  - de indução: só 'i := i + c' com c constante;
+#  - acumuladora: só 's := s + e' ou 's := s - e', e afim nas variáveis de
+#    indução (coeficientes constantes) mais uma parte invariante;
+#  - produto: só 'p := p * m', m invariante;
+#e cuja condição compara uma variável de indução que anda na direção do
+#limite com uma expressão invariante, executa um número de vezes que se
+#calcula na entrada. O laço vira um if com a condição original, o número
+#de voltas num temporário, a soma das progressões aritméticas de cada
+#acumuladora, a potência de cada multiplicador (por quadrados sucessivos) e
+#os valores finais das variáveis de indução. Acumuladoras e produtos não
+#podem ser lidos no resto do laço; partes invariantes são puras, então o
+#resultado e a saída do programa não mudam.
+class LoopSummarizer(NodeTransformer):
+    def __init__(self):
+        self.block: Optional[Block] = None
+        self.level = 0
+
+    def visit_program(self, node: Program):
+        owners = [(d.block, d.entry.level) for d in walk(node.block) if isinstance(d, SubroutineDeclaration)]
+        owners.append((node.block, 0))
+        for block, level in owners:
+            if any(isinstance(n, While) for n in walk(block.compound_statement)):
+                self.block, self.level = block, level
+                block.compound_statement = self.visit(block.compound_statement)
+        return node
+
+    def visit_cmd_repeticao(self, node: While):
+        node.statement = yield node.statement
+        summary = self.summarize(node)
+        return node if summary is None else summary
+
+    def summarize(self, loop: While) -> Optional[Statement]:
+        body = flatten(loop.statement)
+        if body is None or not body:
+            return None
+        updates: Dict[SymbolEntry, List[Assignment]] = {}
+        for stmt in body:
+            if stmt.variable.entry.type != 'integer':
+                return None
+            updates.setdefault(stmt.variable.entry, []).append(stmt)
+        assigned = set(updates)
+        steps = {v: [step_of(v, s) for s in stmts] for v, stmts in updates.items()}
+        induction = {v: sum(ss) for v, ss in steps.items() if None not in ss}
+
+        cond = loop.condition
+        if not isinstance(cond, BinaryOp) or cond.op not in REL_OPS:
+            return None
+        if isinstance(cond.left, Var) and cond.left.entry in induction:
+            var, op, limit = cond.left.entry, cond.op, cond.right
+        elif isinstance(cond.right, Var) and cond.right.entry in induction:
+            var, op, limit = cond.right.entry, SWAPPED_REL[cond.op], cond.left
+        else:
+            return None
+        if not self.invariant(limit, assigned):
+            return None
+        trips = trip_expression(var, op, limit, induction[var])
+        if trips is None:
+            return None
+
+        # somas e produtos, com o deslocamento das variáveis de indução já
+        # incrementadas antes de cada atribuição na mesma volta
+        shift = {v: 0 for v in induction}
+        sums: Dict[SymbolEntry, Tuple[Optional[Expression], int]] = {}
+        products: Dict[SymbolEntry, List[Expression]] = {}
+        for stmt in body:
+            v, e = stmt.variable.entry, stmt.expression
+            if v in induction:
+                shift[v] += step_of(v, stmt)
+                continue
+            if isinstance(e, BinaryOp) and e.op == '*' and v not in sums:
+                factor = other_operand(v, e)
+                if factor is None or not self.invariant(factor, assigned):
+                    return None
+                products.setdefault(v, []).append(factor)
+                continue
+            # s := s + termo, com s em qualquer posição de uma soma
+            term = self.affine(e, set(induction) | {v}, assigned)
+            if term is None or term.coefs.pop(v, 0) != 1 or v in products:
+                return None
+            # valor na volta k: invariante + soma(coef * (i + desloc)), com i
+            # no valor de entrada, mais k * soma(coef * passo)
+            value, slope = term.rest, 0
+            for i, c in term.coefs.items():
+                if c:
+                    value = add(value, times(c, add(var_ref(i), Number(shift[i]) if shift[i] else None)))
+                    slope += c * induction[i]
+            rest, total = sums.get(v, (None, 0))
+            sums[v] = (add(rest, value), total + slope)
+
+        n = declare_temp(self.block, self.level, 'integer')
+        stmts: List[Statement] = [Assignment(var_ref(n), trips)]
+        for v, (value, slope) in sums.items():
+            total = None if value is None else BinaryOp(var_ref(n), '*', value)
+            if slope:
+                pairs = BinaryOp(BinaryOp(var_ref(n), '*', BinaryOp(var_ref(n), '-', Number(1))), 'div', Number(2))
+                total = add(total, times(slope, pairs))
+            if total is not None:
+                stmts.append(Assignment(var_ref(v), BinaryOp(var_ref(v), '+', total)))
+        if products:
+            b = declare_temp(self.block, self.level, 'integer')
+            k = declare_temp(self.block, self.level, 'integer')
+            for v, factors in products.items():
+                stmts += power_loop(v, factors, n, b, k)
+        for v, step in induction.items():
+            if step:
+                moved = times(abs(step), var_ref(n))
+                stmts.append(Assignment(var_ref(v), BinaryOp(var_ref(v), '+' if step > 0 else '-', moved)))
+        folder = ConstantFolder()
+        return If(loop.condition, CompoundStatement([folder.visit(s) for s in stmts]))
+
+    #Expressão pura que só lê variáveis não alteradas pelo laço
+    @staticmethod
+    def invariant(expr: Expression, assigned: Set[SymbolEntry]) -> bool:
+        return is_pure(expr) and not any(isinstance(n, Var) and n.entry in assigned for n in walk(expr))
+
+    #Forma afim de expr nas variáveis 'symbols' (as outras lidas precisam
+    #ser invariantes), ou None
+    def affine(self, expr: Expression, symbols: Set[SymbolEntry],
+               assigned: Set[SymbolEntry]) -> Optional[Affine]:
+        if self.invariant(expr, assigned):
+            return Affine({}, copy_tree(expr))
+        if isinstance(expr, Var):
+            return Affine({expr.entry: 1}) if expr.entry in symbols else None
+        if isinstance(expr, UnaryOp) and expr.op == '-':
+            inner = self.affine(expr.operand, symbols, assigned)
+            return None if inner is None else inner.scale(-1)
+        if not isinstance(expr, BinaryOp) or expr.op not in ('+', '-', '*'):
+            return None
+        if expr.op == '*':
+            for k, e in ((int_value(expr.left), expr.right), (int_value(expr.right), expr.left)):
+                if k is not None:
+                    inner = self.affine(e, symbols, assigned)
+                    return None if inner is None else inner.scale(k)
+            return None
+        left = self.affine(expr.left, symbols, assigned)
+        right = self.affine(expr.right, symbols, assigned)
+        if left is None or right is None:
+            return None
+        return left.plus(right.scale(-1) if expr.op == '-' else right)
+
+#Comandos do corpo, todos atribuições, ou None se há outro tipo de comando
+def flatten(stmt: Statement) -> Optional[List[Assignment]]:
+    result: List[Assignment] = []
+    stack = [stmt]
+    while stack:
+        s = stack.pop()
+        if s is None:
+            continue
+        if isinstance(s, CompoundStatement):
+            stack.extend(reversed(s.statements))
+        elif isinstance(s, Assignment):
+            result.append(s)
+        else:
+            return None
+    return result
+
+def is_var(expr: Expression, var: SymbolEntry) -> bool:
+    return isinstance(expr, Var) and expr.entry is var
+
+#Em 'v op x' ou 'x op v' (op comutativo), o operando x
+def other_operand(var: SymbolEntry, e: BinaryOp) -> Optional[Expression]:
+    if is_var(e.left, var) and not is_var(e.right, var):
+        return e.right
+    if is_var(e.right, var) and not is_var(e.left, var):
+        return e.left
+    return None
+
+#Passo de 'v := v + c', 'v := c + v' ou 'v := v - c', ou None
+def step_of(var: SymbolEntry, stmt: Assignment) -> Optional[int]:
+    e = stmt.expression
+    if not isinstance(e, BinaryOp) or e.op not in ('+', '-'):
+        return None
+    if is_var(e.left, var) and int_value(e.right) is not None:
+        return int_value(e.right) if e.op == '+' else -int_value(e.right)
+    if e.op == '+' and is_var(e.right, var) and int_value(e.left) is not None:
+        return int_value(e.left)
+    return None
+
+#Voltas de 'while i op limite' com passo 'step', sabendo que a condição vale
+#na entrada; None se i não anda na direção do limite (laço infinito)
+def trip_expression(var: SymbolEntry, op: str, limit: Expression, step: int) -> Optional[Expression]:
+    if op in ('<', '<=') and step > 0:
+        distance, d = BinaryOp(copy_tree(limit), '-', var_ref(var)), step
+    elif op in ('>', '>=') and step < 0:
+        distance, d = BinaryOp(var_ref(var), '-', copy_tree(limit)), -step
+    else:
+        return None
+    if op in ('<=', '>='):
+        return BinaryOp(BinaryOp(distance, 'div', Number(d)), '+', Number(1))
+    return BinaryOp(BinaryOp(distance, '+', Number(d - 1)), 'div', Number(d))
+
+#v := v * m^n por quadrados sucessivos:
+#  b := m; k := n; while k > 0 do begin if k mod 2 = 1 then v := v * b;
+#  b := b * b; k := k div 2 end
+def power_loop(var: SymbolEntry, factors: List[Expression], n: SymbolEntry,
+               b: SymbolEntry, k: SymbolEntry) -> List[Statement]:
+    m = copy_tree(factors[0])
+    for f in factors[1:]:
+        m = BinaryOp(m, '*', copy_tree(f))
+    half = BinaryOp(var_ref(k), 'div', Number(2))
+    odd = BinaryOp(BinaryOp(var_ref(k), '-', BinaryOp(half, '*', Number(2))), '=', Number(1))
+    body = CompoundStatement([
+        If(odd, Assignment(var_ref(var), BinaryOp(var_ref(var), '*', var_ref(b)))),
+        Assignment(var_ref(b), BinaryOp(var_ref(b), '*', var_ref(b))),
+        Assignment(var_ref(k), BinaryOp(var_ref(k), 'div', Number(2))),
+    ])
+    return [Assignment(var_ref(b), m), Assignment(var_ref(k), var_ref(n)),
+            While(BinaryOp(var_ref(k), '>', Number(0)), body)]
@@ -26,16 +26,22 @@ def p_declaracao_vars(p):
     '''declaracao_vars : lista_ids COLON tipo'''
     p[0] = VarDeclaration(p[1], p[3])
 
+#As listas são estendidas in-place; copiar p[1] a cada redução custaria O(N²)
 def p_declaracao_vars_lista(p):
     '''declaracao_vars_lista : declaracao_vars_lista declaracao_vars SEMI
                              | declaracao_vars SEMI'''
-    p[0] = p[1] + [p[2]] if len(p) == 4 else [p[1]]
+    if len(p) == 4:
+        p[1].append(p[2])
+        p[0] = p[1]
+    else:
+        p[0] = [p[1]]
 
 def p_lista_ids(p):
     '''lista_ids : lista_ids COMMA ID
                  | ID'''
     if len(p) == 4:
-        p[0] = p[1] + [Var(p[3])]
+        p[1].append(Var(p[3]))
+        p[0] = p[1]
     else:
         p[0] = [Var(p[1])]
 
@@ -44,7 +50,8 @@ def p_secao_sub_opt(p):
                       | secao_sub_opt declaracao_func SEMI
                       | empty'''
     if len(p) == 4:
-        p[0] = p[1] + [p[2]]
+        p[1].append(p[2])
+        p[0] = p[1]
     else:
         p[0] = []
 
@@ -65,7 +72,8 @@ def p_declaracao_params_lista(p):
     '''declaracao_params_lista : declaracao_params_lista SEMI declaracao_vars
                                | declaracao_vars'''
     if len(p) == 4:
-        p[0] = p[1] + [p[3]]
+        p[1].append(p[3])
+        p[0] = p[1]
     else:
         p[0] = [p[1]]
 
@@ -86,7 +94,8 @@ def p_lista_comandos(p):
     '''lista_comandos : lista_comandos SEMI comando
                       | comando'''
     if len(p) == 4:
-        p[0] = p[1] + [p[3]]
+        p[1].append(p[3])
+        p[0] = p[1]
     else:
         p[0] = [p[1]]
 
@@ -150,7 +159,8 @@ def p_lista_exprs(p):
     '''lista_exprs : lista_exprs COMMA expressao
                    | expressao'''
     if len(p) == 4:
-        p[0] = p[1] + [p[3]]
+        p[1].append(p[3])
+        p[0] = p[1]
     else:
         p[0] = [p[1]]
 
@@ -220,8 +230,11 @@ def p_empty(p):
     '''empty :'''
     pass
 
+SYNTACTIC_ERROR = False
+
 def p_error(p):
     global SYNTACTIC_ERROR
+    SYNTACTIC_ERROR = True
     if p:
         print(f"SINTAXE: Erro em '{p.value}' linha {p.lineno}")
     else:
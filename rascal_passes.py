@@ -0,0 +1,138 @@
+import time
+from typing import Callable, List, Optional, Tuple
+from mepa_code import Instr, Label
+from rascal_ast import *
+
+#Níveis de otimização (-O0, -O1, -O2); sem -O, só a geração de código
+MAX_OPT_LEVEL = 2
+DEFAULT_OPT_LEVEL = 0
+
+#Violação de invariante detectada entre duas passagens (erro do compilador)
+class InvariantError(Exception):
+    def __init__(self, pass_name: str, message: str):
+        super().__init__(f"{pass_name}: {message}")
+        self.pass_name = pass_name
+
+#Uma passagem registrada: 'ast' recebe e devolve a AST, 'codegen' recebe a
+#AST e devolve o código MEPA (lista de Instr), 'mepa' recebe e devolve código
+#e 'python' recebe a AST e devolve o programa compilado para bytecode Python
+class Pass:
+    def __init__(self, name: str, kind: str, run: Callable, level: int):
+        self.name = name
+        self.kind = kind
+        self.run = run
+        self.level = level
+
+#Executa as passagens registradas, na ordem de registro, que pertencem ao
+#nível de otimização escolhido. Opcionalmente mede o tempo de cada uma e o
+#número de instruções MEPA antes e depois, e verifica invariantes da AST e
+#do código entre uma passagem e a seguinte.
+class PassManager:
+    def __init__(self, opt_level: int = DEFAULT_OPT_LEVEL, check: bool = False,
+                 timing: bool = False, count_ast: Optional[Callable] = None):
+        self.opt_level = opt_level
+        self.check = check
+        self.timing = timing
+        self.count_ast = count_ast  # instruções MEPA que a AST geraria
+        self.passes: List[Pass] = []
+        # (nome, segundos, instruções antes, instruções depois)
+        self.records: List[Tuple[str, float, Optional[int], Optional[int]]] = []
+
+    def register(self, name: str, kind: str, run: Callable, level: int = 0):
+        self.passes.append(Pass(name, kind, run, level))
+
+    def enabled(self) -> List[Pass]:
+        return [p for p in self.passes if p.level <= self.opt_level]
+
+    #Fase que não é uma passagem (léxico, sintático...): só cronometrada
+    def phase(self, name: str, run: Callable, *args):
+        start = time.perf_counter()
+        result = run(*args)
+        self.records.append((name, time.perf_counter() - start, None, None))
+        return result
+
+    def size(self, value) -> Optional[int]:
+        if not self.timing:
+            return None
+        if isinstance(value, list):
+            return count_mepa(value)
+        if isinstance(value, Program) and self.count_ast:
+            return self.count_ast(value)
+        return None
+
+    def run(self, ast: Program):
+        value = ast
+        if self.check:
+            check_ast(value, "análise semântica")
+        for p in self.enabled():
+            before = self.size(value)
+            start = time.perf_counter()
+            value = p.run(value)
+            elapsed = time.perf_counter() - start
+            self.records.append((p.name, elapsed, before, self.size(value)))
+            if self.check:
+                if p.kind == 'ast':
+                    check_ast(value, p.name)
+                elif p.kind in ('codegen', 'mepa'):
+                    check_mepa(value, p.name)
+        return value
+
+    def report(self) -> str:
+        lines = ["--- Tempo por passagem ---",
+                 f"{'passagem':<28}{'tempo (ms)':>12}{'instr. antes':>14}{'depois':>10}"]
+        total = 0.0
+        for name, seconds, before, after in self.records:
+            total += seconds
+            b = "" if before is None else str(before)
+            a = "" if after is None else str(after)
+            lines.append(f"{name:<28}{seconds * 1000:>12.2f}{b:>14}{a:>10}".rstrip())
+        lines.append(f"{'total':<28}{total * 1000:>12.2f}")
+        return "\n".join(lines)
+
+#Instruções de um programa MEPA, sem contar rótulos sozinhos (NADA)
+def count_mepa(prog: List[Instr]) -> int:
+    return sum(1 for ins in prog if ins.op != "NADA")
+
+#Invariantes da AST anotada que toda passagem deve preservar:
+#listas de comandos só com comandos, nomes ligados à tabela de símbolos, chamadas
+#com o número certo de argumentos e variáveis locais dentro do registro de
+#ativação declarado (temporários criados por otimizações incluídos).
+def check_ast(ast: Program, pass_name: str):
+    owners = [(ast.block, 0)]
+    owners += [(d.block, d.entry.level) for d in walk(ast.block)
+               if isinstance(d, SubroutineDeclaration) and d.entry is not None]
+    for block, level in owners:
+        nvars = sum(len(d.identifiers) for d in block.var_declarations)
+        for n in walk(block.compound_statement):
+            if isinstance(n, CompoundStatement) and \
+                    any(s is not None and not isinstance(s, (Statement, CompoundStatement)) for s in n.statements):
+                raise InvariantError(pass_name, "nó que não é comando numa sequência de comandos")
+            if isinstance(n, (Var, ProcedureCall, FunctionCall)) and n.entry is None:
+                raise InvariantError(pass_name, f"'{n.name}' sem entrada na tabela de símbolos")
+            if isinstance(n, (ProcedureCall, FunctionCall)) and len(n.arguments) != len(n.entry.params or []):
+                raise InvariantError(pass_name, f"chamada de '{n.name}' com {len(n.arguments)} argumento(s)")
+            if isinstance(n, Var):
+                e = n.entry
+                if e.level > level:
+                    raise InvariantError(pass_name, f"'{n.name}' é de nível {e.level}, usada no nível {level}")
+                if e.level == level and e.category == 'var' and not e.offset < nvars:
+                    raise InvariantError(pass_name, f"'{n.name}' fora do registro de ativação ({e.offset} >= {nvars})")
+
+#Invariantes do código MEPA: rótulos únicos, todo desvio ou chamada para um
+#rótulo existente e programa começando em INPP
+def check_mepa(prog: List[Instr], pass_name: str):
+    labels, names = set(), set()
+    for ins in prog:
+        if ins.label is not None:
+            if ins.label.name in names:
+                raise InvariantError(pass_name, f"rótulo {ins.label} definido duas vezes")
+            labels.add(ins.label)
+            names.add(ins.label.name)
+    first = next((ins.op for ins in prog if ins.op != "NADA"), None)
+    if first != "INPP":
+        raise InvariantError(pass_name, "programa não começa com INPP")
+    for ins in prog:
+        if ins.op in ("DSVS", "DSVF", "CHPR", "CHPF") and ins.args:
+            target = ins.args[0]
+            if not isinstance(target, Label) or target not in labels:
+                raise InvariantError(pass_name, f"desvio para rótulo inexistente {target}")
@@ -0,0 +1,196 @@
+from typing import Dict, List, Optional, Union
+from rascal_ast import *
+from rascal_constfold import ARITH_OPS, REL_OPS, make_const
+from rascal_semantic import SymbolEntry, var_ref
+
+#Orçamento padrão de passos (nós visitados) da avaliação em tempo de compilação
+DEFAULT_PEVAL_STEPS = 100000
+
+#A execução não pode continuar em tempo de compilação: read, variável sem
+#valor conhecido, divisão por zero ou orçamento de passos esgotado
+class NotStatic(Exception):
+    pass
+
+#Registro de ativação do interpretador: nível léxico, elo estático e valores
+#por deslocamento (parâmetros e retorno negativos, locais a partir de 0).
+#Deslocamento ausente = valor desconhecido (memória não inicializada da MEPA).
+class Frame:
+    __slots__ = ("level", "link", "values")
+
+    def __init__(self, level: int, link: Optional['Frame']):
+        self.level = level
+        self.link = link
+        self.values: Dict[int, Union[int, bool]] = {}
+
+#Avaliação parcial: interpreta o programa principal em tempo de compilação,
+#comando a comando, enquanto ele não depende da entrada. O trecho inicial que
+#terminou é trocado pelo seu resultado: um write com os valores impressos e
+#atribuições constantes às variáveis globais que ele deixou definidas. Um
+#programa que termina sem read vira só o write (as sub-rotinas e variáveis
+#deixam de existir). A troca só é feita se o resultado é menor que o trecho
+#substituído e mais barato que executá-lo.
+class PartialEvaluator(NodeVisitor):
+    def __init__(self, max_steps: int = DEFAULT_PEVAL_STEPS):
+        self.max_steps = max_steps
+        self.steps = 0
+        self.decls: Dict[SymbolEntry, SubroutineDeclaration] = {}
+        self.frame: Optional[Frame] = None
+        self.output: List[Union[int, bool]] = []
+
+    #Cada nó visitado durante a execução gasta um passo do orçamento
+    def dispatch(self, node):
+        self.steps += 1
+        if self.steps > self.max_steps and self.frame is not None:
+            raise NotStatic()
+        return super().dispatch(node)
+
+    def visit_program(self, node: Program):
+        if self.max_steps <= 0:
+            return node
+        # só as declarações: não é preciso percorrer os comandos
+        blocks = [node.block]
+        while blocks:
+            for decl in blocks.pop().subroutine_declarations:
+                self.decls[decl.entry] = decl
+                blocks.append(decl.block)
+        block = node.block
+        statements = block.compound_statement.statements
+        main = self.frame = Frame(0, None)
+        # estado depois de cada comando que terminou: (globais, impressos, passos)
+        states = [({}, 0, 0)]
+        for stmt in statements:
+            try:
+                self.visit(stmt)
+            except NotStatic:
+                break
+            states.append((dict(main.values), len(self.output), self.steps))
+
+        if len(states) > len(statements):
+            # terminou sem ler nada: sobra só o que foi impresso
+            _, printed, steps = states[-1]
+            cost = printed + 1
+            if cost <= sum(1 for _ in walk(block)) and cost < steps:
+                block.var_declarations = []
+                block.subroutine_declarations = []
+                block.compound_statement.statements = self.residual(printed, {})
+                return node
+
+        # senão, o maior trecho inicial cujo resultado compensa
+        entries = {var.entry.offset: var.entry for d in block.var_declarations for var in d.identifiers}
+        region = 0
+        best = None
+        for k in range(1, len(states)):
+            region += sum(1 for _ in walk(statements[k - 1])) if statements[k - 1] else 0
+            values, printed, steps = states[k]
+            cost = (printed + 1 if printed else 0) + 3 * len(values)
+            if cost <= region and cost < steps:
+                best = k
+        if best is not None:
+            values, printed, _ = states[best]
+            residual = self.residual(printed, values, entries)
+            block.compound_statement.statements = residual + statements[best:]
+        return node
+
+    #Um write com os valores impressos e as atribuições às globais conhecidas
+    def residual(self, printed: int, values: Dict[int, Union[int, bool]],
+                 entries: Optional[Dict[int, SymbolEntry]] = None) -> List[Statement]:
+        out: List[Statement] = [Write([make_const(v) for v in self.output[:printed]])] if printed else []
+        out += [Assignment(var_ref(entries[offset]), make_const(v)) for offset, v in sorted(values.items())]
+        return out
+
+    def lookup(self, entry: SymbolEntry) -> Frame:
+        frame = self.frame
+        while frame.level != entry.level:
+            frame = frame.link
+        return frame
+
+    def visit_seq_comandos(self, node: CompoundStatement):
+        for stmt in node.statements:
+            yield stmt
+
+    def visit_cmd_atrib(self, node: Assignment):
+        value = yield node.expression
+        entry = node.variable.entry
+        self.lookup(entry).values[entry.offset] = value
+
+    def visit_cmd_condicional(self, node: If):
+        if (yield node.condition):
+            yield node.then_statement
+        elif node.else_statement:
+            yield node.else_statement
+
+    def visit_cmd_repeticao(self, node: While):
+        while (yield node.condition):
+            yield node.statement
+
+    def visit_read(self, node: Read):
+        raise NotStatic()
+
+    def visit_write(self, node: Write):
+        for expr in node.expressions:
+            self.output.append((yield expr))
+
+    def visit_proc_call(self, node: ProcedureCall):
+        yield self.call(node)
+
+    def visit_func_call(self, node: FunctionCall):
+        return (yield self.call(node))
+
+    #Argumentos avaliados do último para o primeiro, como no código gerado
+    def call(self, node: Union[ProcedureCall, FunctionCall]):
+        entry = node.entry
+        n = len(node.arguments)
+        args = [None] * n
+        for i in reversed(range(n)):
+            args[i] = yield node.arguments[i]
+        link = self.frame
+        while link.level != entry.level - 1:
+            link = link.link
+        frame = Frame(entry.level, link)
+        for i, value in enumerate(args):
+            frame.values[-5 - i] = value
+        caller, self.frame = self.frame, frame
+        yield self.decls[entry].block.compound_statement
+        self.frame = caller
+        if entry.category == 'func':
+            if -5 - n not in frame.values:
+                raise NotStatic()
+            return frame.values[-5 - n]
+
+    def visit_exp_var(self, node: Var):
+        entry = node.entry
+        values = self.lookup(entry).values
+        if entry.offset not in values:
+            raise NotStatic()
+        return values[entry.offset]
+
+    def visit_exp_num(self, node: Number):
+        return node.value
+
+    def visit_exp_logica(self, node: Boolean):
+        return node.value == 'true'
+
+    def visit_exp_unaria(self, node: UnaryOp):
+        value = yield node.operand
+        if node.op == 'not':
+            return not value
+        if node.op == '-':
+            return -value
+        return value
+
+    #and/or em curto-circuito. Quando o código gerado avalia os dois lados, o
+    #direito é puro, e deixar de avaliá-lo não muda nada
+    def visit_exp_binaria(self, node: BinaryOp):
+        left = yield node.left
+        if node.op == 'and' and not left:
+            return False
+        if node.op == 'or' and left:
+            return True
+        right = yield node.right
+        if node.op in ('and', 'or'):
+            return right
+        if node.op == 'div' and right == 0:
+            raise NotStatic()
+        if node.op in ARITH_OPS:
+            return ARITH_OPS[node.op](left, right)
+        return REL_OPS[node.op](left, right)
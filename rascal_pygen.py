@@ -0,0 +1,284 @@
+import sys
+from types import CodeType
+from typing import Dict, List, Set, TextIO, Tuple
+from rascal_ast import *
+from rascal_constfold import is_pure
+from rascal_semantic import SymbolEntry
+
+#Operadores binários: operador Python e sua precedência em Python
+#(or < and < not < comparação < soma < produto < menos unário < átomo)
+PY_BINARY = {
+    'or': ('or', 1), 'and': ('and', 2),
+    '=': ('==', 4), '<>': ('!=', 4), '<': ('<', 4), '<=': ('<=', 4), '>': ('>', 4), '>=': ('>=', 4),
+    '+': ('+', 5), '-': ('-', 5), '*': ('*', 6), 'div': ('//', 6),
+}
+PREC_NOT = 3
+PREC_CMP = 4
+PREC_NEG = 7
+PREC_ATOM = 8
+
+#Profundidade de recursão permitida ao programa (uma chamada Rascal = um
+#quadro Python)
+RECURSION_LIMIT = 100000
+
+#Resultados guardados por função memoizada (o padrão do --memosize da MEPA)
+MEMO_SIZE = 10000
+
+#Programa que o Python não consegue compilar (aninhamento além dos limites
+#do parser e do compilador do Python)
+class NestingError(Exception):
+    pass
+
+#Erro durante a execução do programa compilado para Python
+class ExecutionError(Exception):
+    pass
+
+#Expressão já traduzida: texto Python e precedência do operador externo
+PyExpr = Tuple[str, int]
+
+def wrap(expr: PyExpr, prec: int) -> str:
+    text, own = expr
+    return text if own >= prec else f"({text})"
+
+#Nome Python de uma variável pelo nível e deslocamento no registro de
+#ativação: locais v<nível>_<k>, parâmetros e retorno a<nível>_<i>. O nível no
+#nome torna cada variável única no programa, então o acesso a variáveis de
+#níveis externos é o de closures do Python, sem colisão com nomes internos.
+def var_name(entry: SymbolEntry) -> str:
+    if entry.offset >= 0:
+        return f"v{entry.level}_{entry.offset}"
+    return f"a{entry.level}_{-5 - entry.offset}"
+
+#Traduz a AST anotada para o código-fonte de uma função Python
+#'programa(read, write)'. Cada sub-rotina vira uma função aninhada na função
+#do bloco que a declara, variáveis de níveis externos são lidas pela closure
+#e escritas com nonlocal; if/while viram os comandos do Python; funções
+#memoizadas consultam e preenchem uma tabela própria (OrderedDict, menos
+#usado recentemente sai primeiro, como na MEPA). A ordem de avaliação é a
+#do código MEPA (argumentos do último para o primeiro, and/or em
+#curto-circuito quando o lado direito tem chamadas).
+class PythonGenerator(NodeVisitor):
+    def __init__(self):
+        self.lines: List[str] = []
+        self.indent = 0
+        self.level = 0
+        #Sub-rotina (entrada) -> nome da função Python
+        self.names: Dict[SymbolEntry, str] = {}
+        #Variáveis de níveis externos atribuídas na função atual
+        self.outer: Set[str] = set()
+
+    def line(self, text: str):
+        self.lines.append("    " * self.indent + text)
+
+    def visit_program(self, node: Program):
+        # nomes de todas as sub-rotinas antes do código: uma chamada pode vir
+        # antes da declaração (irmã declarada depois)
+        for n in walk(node.block):
+            if isinstance(n, SubroutineDeclaration):
+                self.names[n.entry] = f"r{len(self.names)}_{n.name}"
+        if any(entry.memo for entry in self.names):
+            self.lines.append("from collections import OrderedDict")
+        self.lines.append("def programa(read, write):")
+        yield self.suite(node.block)
+        return "\n".join(self.lines) + "\n"
+
+    #Corpo indentado; 'pass' se não gerou nenhum comando
+    def suite(self, node):
+        self.indent += 1
+        start = len(self.lines)
+        yield node
+        if len(self.lines) == start:
+            self.line("pass")
+        self.indent -= 1
+
+    def visit_block(self, node: Block):
+        names = [f"v{self.level}_{k}" for k in range(sum(len(d.identifiers) for d in node.var_declarations))]
+        if names:
+            self.line(" = ".join(names) + " = None")
+        for sub in node.subroutine_declarations:
+            yield sub
+        yield node.compound_statement
+
+    def visit_proc_declaration(self, node: ProcedureDeclaration):
+        yield self.subroutine(node, False)
+
+    def visit_func_declaration(self, node: FunctionDeclaration):
+        yield self.subroutine(node, True)
+
+    #O corpo é gerado à parte para saber quais variáveis externas ele altera
+    #(declaradas nonlocal no cabeçalho). A tabela de uma função memoizada é
+    #consultada com os argumentos na entrada e recebe o resultado no retorno;
+    #um decorador como lru_cache recursaria na pilha do C, que estoura antes
+    #do limite de recursão do Python.
+    def subroutine(self, node: SubroutineDeclaration, is_function: bool):
+        level = node.entry.level
+        nparams = sum(len(p.identifiers) for p in node.params)
+        params = [f"a{level}_{i}" for i in range(nparams)]
+        memo = f"memo_{self.names[node.entry]}"
+        saved = self.lines, self.outer, self.level
+        self.lines, self.outer, self.level = [], set(), level
+        self.indent += 1
+        if node.entry.memo:
+            self.line(f"chave = ({''.join(p + ', ' for p in params)})")
+            self.line(f"if chave in {memo}:")
+            self.line(f"    {memo}.move_to_end(chave)")
+            self.line(f"    return {memo}[chave]")
+        if is_function:
+            self.line(f"a{level}_{nparams} = None")
+        yield node.block
+        if is_function:
+            if node.entry.memo:
+                self.line(f"{memo}[chave] = a{level}_{nparams}")
+                self.line(f"if len({memo}) > {MEMO_SIZE}:")
+                self.line(f"    {memo}.popitem(last=False)")
+            self.line(f"return a{level}_{nparams}")
+        elif not self.lines:
+            self.line("pass")
+        body, outer = self.lines, self.outer
+        if outer:
+            body.insert(0, "    " * self.indent + "nonlocal " + ", ".join(sorted(outer)))
+        self.indent -= 1
+        self.lines, self.outer, self.level = saved
+        if node.entry.memo:
+            self.line(f"{memo} = OrderedDict()")
+        self.line(f"def {self.names[node.entry]}({', '.join(params)}):")
+        self.lines += body
+
+    def store(self, entry: SymbolEntry) -> str:
+        name = var_name(entry)
+        if entry.level < self.level:
+            self.outer.add(name)
+        return name
+
+    def visit_seq_comandos(self, node: CompoundStatement):
+        for stmt in node.statements:
+            yield stmt
+
+    def visit_cmd_atrib(self, node: Assignment):
+        value = yield node.expression
+        self.line(f"{self.store(node.variable.entry)} = {value[0]}")
+
+    #Cadeias else-if viram elif, sem aumentar a indentação
+    def visit_cmd_condicional(self, node: If):
+        keyword = "if"
+        while True:
+            cond = yield node.condition
+            self.line(f"{keyword} {cond[0]}:")
+            yield self.suite(node.then_statement)
+            node = node.else_statement
+            if not isinstance(node, If):
+                break
+            keyword = "elif"
+        if node:
+            self.line("else:")
+            yield self.suite(node)
+
+    def visit_cmd_repeticao(self, node: While):
+        cond = yield node.condition
+        self.line(f"while {cond[0]}:")
+        yield self.suite(node.statement)
+
+    def visit_read(self, node: Read):
+        for var in node.variables:
+            self.line(f"{self.store(var.entry)} = read()")
+
+    def visit_write(self, node: Write):
+        for expr in node.expressions:
+            value = yield expr
+            self.line(f"write({value[0]})")
+
+    def visit_proc_call(self, node: ProcedureCall):
+        call = yield self.call(node)
+        self.line(call[0])
+
+    def visit_func_call(self, node: FunctionCall):
+        return (yield self.call(node))
+
+    #Com algum argumento impuro, a tupla é montada de trás para frente e
+    #invertida, para avaliar os argumentos na ordem do código MEPA
+    def call(self, node):
+        args = []
+        for arg in node.arguments:
+            args.append((yield arg)[0])
+        name = self.names[node.entry]
+        if len(args) > 1 and not all(is_pure(a) for a in node.arguments):
+            return f"{name}(*({', '.join(reversed(args))})[::-1])", PREC_ATOM
+        return f"{name}({', '.join(args)})", PREC_ATOM
+
+    def visit_exp_var(self, node: Var):
+        return var_name(node.entry), PREC_ATOM
+
+    def visit_exp_num(self, node: Number):
+        return str(node.value), PREC_NEG if node.value < 0 else PREC_ATOM
+
+    def visit_exp_logica(self, node: Boolean):
+        return ("True" if node.value == 'true' else "False"), PREC_ATOM
+
+    def visit_exp_unaria(self, node: UnaryOp):
+        operand = yield node.operand
+        if node.op == 'not':
+            return f"not {wrap(operand, PREC_NOT)}", PREC_NOT
+        if node.op == '-':
+            return f"-{wrap(operand, PREC_NEG)}", PREC_NEG
+        return operand
+
+    #Parênteses só onde a precedência do Python exige; comparações sempre
+    #entre parênteses quando operandas, para o Python não encadeá-las
+    def visit_exp_binaria(self, node: BinaryOp):
+        left = yield node.left
+        right = yield node.right
+        op, prec = PY_BINARY[node.op]
+        if prec == PREC_CMP:
+            return f"{wrap(left, PREC_CMP + 1)} {op} {wrap(right, PREC_CMP + 1)}", prec
+        return f"{wrap(left, prec)} {op} {wrap(right, prec + 1)}", prec
+
+#Passagem de geração de código: fonte Python compilado para bytecode
+def generate_python(ast: Program) -> CodeType:
+    source = PythonGenerator().visit(ast)
+    try:
+        return compile(source, f"<rascal {ast.name}>", "exec")
+    except (SyntaxError, RecursionError, MemoryError) as e:
+        raise NestingError(str(e))
+
+#Leitura como a do interpretador MEPA: um inteiro por read, separados por
+#espaços ou quebras de linha
+def make_reader(infile: TextIO):
+    tokens: List[str] = []
+
+    def read() -> int:
+        while not tokens:
+            line = infile.readline()
+            if not line:
+                raise ExecutionError("Fim inesperado do arquivo de entrada")
+            tokens.extend(reversed(line.split()))
+        try:
+            return int(tokens.pop())
+        except ValueError:
+            raise ExecutionError("Valor de entrada inválido")
+    return read
+
+def make_writer(outfile: TextIO):
+    out = outfile.write
+
+    def write(value):
+        out("%d\n" % value)
+    return write
+
+#Executa o programa gerado por generate_python. Erros de execução (divisão
+#por zero, variável sem valor, entrada inválida, recursão profunda demais)
+#viram ExecutionError.
+def run_python(code: CodeType, infile: TextIO = sys.stdin, outfile: TextIO = sys.stdout):
+    namespace = {}
+    exec(code, namespace)
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, RECURSION_LIMIT))
+    try:
+        namespace["programa"](make_reader(infile), make_writer(outfile))
+    except ZeroDivisionError:
+        raise ExecutionError("divisão por zero")
+    except (NameError, TypeError):
+        raise ExecutionError("uso de variável sem valor")
+    except RecursionError:
+        raise ExecutionError("recursão profunda demais (estouro de pilha)")
+    finally:
+        sys.setrecursionlimit(limit)
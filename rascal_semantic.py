@@ -1,5 +1,6 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set
 from rascal_ast import *
+from rascal_callgraph import CallGraph
 
 #Armazenar informações de um identificador na tabela de símbolos
 class SymbolEntry:
@@ -11,42 +12,95 @@ class SymbolEntry:
         self.offset = offset
         self.params = params or []
         self.label = label
+        self.memo = False  #função com resultado memoizado (mark_memoized)
 
-#Gerenciar escopos e identificadores
+#Gerenciar escopos e identificadores.
+#Tabela única achatada: cada nome aponta para uma pilha de entradas, com a do
+#escopo mais interno no topo. Entrar num escopo empilha um novo quadro; sair
+#desempilha as entradas que ele definiu. A busca é O(1) em qualquer profundidade.
 class SymbolTable:
-    def __init__(self, parent: Optional['SymbolTable']=None, level: int=0):
-        self.symbols: Dict[str, SymbolEntry] = {}
-        self.parent = parent
-        self.level = level
-        self.offset_counter = 0
+    def __init__(self):
+        self.symbols: Dict[str, List[SymbolEntry]] = {}
+        self.scopes: List[Dict[str, SymbolEntry]] = [{}]
+        self.offset_counters: List[int] = [0]
+
+    #Nível léxico do escopo atual (0 = global)
+    @property
+    def level(self) -> int:
+        return len(self.scopes) - 1
+
+    def enter_scope(self):
+        self.scopes.append({})
+        self.offset_counters.append(0)
+
+    def exit_scope(self):
+        for name in self.scopes.pop():
+            stack = self.symbols[name]
+            stack.pop()
+            if not stack:
+                del self.symbols[name]
+        self.offset_counters.pop()
 
     #Insere um novo símbolo no escopo atual.
     def define(self, name: str, type_: Optional[str], category: str, params: Optional[List[str]]=None, force_offset: Optional[int]=None):
-        if name in self.symbols:
+        current = self.scopes[-1]
+        if name in current:
             return False, None # Erro: símbolo já existe neste escopo
         if force_offset is not None:
             final_offset = force_offset
         else: #Calcula automaticamente o offset se não for forçado
-            final_offset = self.offset_counter
+            final_offset = self.offset_counters[-1]
             if category == 'var':
-                self.offset_counter += 1
+                self.offset_counters[-1] += 1
         entry = SymbolEntry(name, type_, category, self.level, final_offset, params)
-        self.symbols[name] = entry
+        current[name] = entry
+        self.symbols.setdefault(name, []).append(entry)
         return True, entry
 
-    #Busca um símbolo no escopo atual ou nos pais
+    #Busca o símbolo visível mais interno (escopo atual ou envolventes)
     def resolve(self, name: str) -> Optional[SymbolEntry]:
-        e = self.symbols.get(name)
-        if e:
-            return e
-        if self.parent:
-            return self.parent.resolve(name)
+        stack = self.symbols.get(name)
+        if stack:
+            return stack[-1]
         return None
 
+#Declara uma variável local nova (temporária) num bloco já analisado, usada
+#pelas otimizações que precisam de armazenamento extra no quadro da rotina.
+#O prefixo @ (como o do retorno de função) evita colisão com nomes do usuário.
+def declare_temp(block: Block, level: int, type_name: str) -> SymbolEntry:
+    offset = sum(len(d.identifiers) for d in block.var_declarations)
+    var = Var(f"@t{offset}")
+    var.entry = SymbolEntry(var.name, type_name, 'var', level, offset)
+    block.var_declarations.append(VarDeclaration([var], Type(type_name)))
+    return var.entry
+
+#Nó de uso de variável já ligado à sua entrada
+def var_ref(entry: SymbolEntry) -> Var:
+    var = Var(entry.name)
+    var.entry = entry
+    return var
+
+#Funções puras: sem read/write e sem ler ou alterar variáveis não locais,
+#nem diretamente nem pelas sub-rotinas que chamam (efeitos transitivos do
+#grafo de chamadas). O resultado depende só dos argumentos.
+def pure_functions(program: Program, graph: Optional[CallGraph] = None) -> Set[SymbolEntry]:
+    graph = graph or CallGraph(program)
+    return {entry for entry, decl in graph.decls.items()
+            if isinstance(decl, FunctionDeclaration) and entry is not None
+            and not graph.io[entry] and not graph.reads[entry] and not graph.writes[entry]}
+
+#Marca as funções puras recursivas para terem o resultado guardado numa
+#tabela indexada pelos argumentos (--memoize)
+def mark_memoized(program: Program) -> Program:
+    graph = CallGraph(program)
+    for entry in pure_functions(program, graph):
+        entry.memo = graph.is_recursive(entry)
+    return program
+
 #Visitor que percorre a AST e realiza análise semântica
-class SemanticAnalyzer:
+class SemanticAnalyzer(NodeVisitor):
     def __init__(self):
-        self.scope = SymbolTable(level=0)
+        self.scope = SymbolTable()
         self.has_error = False
         self.current_func_name: Optional[str] = None
         self.return_assigned = False
@@ -56,31 +110,24 @@ class SemanticAnalyzer:
         print(f"ERRO SEMÂNTICO: {msg}")
         self.has_error = True
 
-    #Padrão Visitor manual
-    def visit(self, node: Node):
-        if not node:
-            return None
-        method = getattr(self, f'visit_{node.type}', self.generic_visit)
-        return method(node)
-
     def generic_visit(self, node: Node):
         for attr, value in node.__dict__.items():
             if isinstance(value, list):
                 for item in value:
                     if isinstance(item, Node):
-                        self.visit(item)
+                        yield item
             elif isinstance(value, Node):
-                self.visit(value)
+                yield value
 
     #Cria escopo global e visita o bloco principal
     def visit_program(self, node: Program):
         self.scope.define(node.name, None, 'program') # Registra programa no escopo
-        self.visit(node.block)
+        yield node.block
 
     #Gerencia declarações de variáveis e sub-rotinas antes de visitar o corpo
     def visit_block(self, node: Block):
         for decl in node.var_declarations:
-            self.visit(decl)
+            yield decl
 
         for sub in node.subroutine_declarations:
             cat = 'proc' if isinstance(sub, ProcedureDeclaration) else 'func'
@@ -98,9 +145,9 @@ class SemanticAnalyzer:
             sub.entry = entry
 
         for sub in node.subroutine_declarations:
-            self.visit(sub)
+            yield sub
 
-        self.visit(node.compound_statement)
+        yield node.compound_statement
 
     def visit_var_declaration(self, node: VarDeclaration):
         type_name = node.var_type.name
@@ -111,8 +158,8 @@ class SemanticAnalyzer:
             var.entry = entry
 
     def visit_proc_declaration(self, node: ProcedureDeclaration):
-        parent_scope = self.scope
-        self.scope = SymbolTable(parent=parent_scope, level=parent_scope.level + 1)
+        proc_sym = self.scope.resolve(node.name)
+        self.scope.enter_scope()
 
         all_params = []
         param_types = []
@@ -128,22 +175,21 @@ class SemanticAnalyzer:
             success, entry = self.scope.define(var_node.name, t_name, 'param', force_offset=offset)
             var_node.entry = entry
 
-        proc_sym = parent_scope.resolve(node.name)
         if proc_sym:
             proc_sym.params = param_types
 
-        self.visit(node.block)
+        yield node.block
 
-        self.scope = parent_scope
+        self.scope.exit_scope()
 
     #Parecido com procedimento, mas gerencia variável de retorno
     def visit_func_declaration(self, node: FunctionDeclaration):
-        parent_scope = self.scope
+        func_sym = self.scope.resolve(node.name)
         old_func = self.current_func_name
         self.current_func_name = node.name
         self.return_assigned = False
 
-        self.scope = SymbolTable(parent=parent_scope, level=parent_scope.level + 1)
+        self.scope.enter_scope()
 
         all_params = []
         param_types = []
@@ -162,7 +208,6 @@ class SemanticAnalyzer:
         ret_offset = -5 - total
 
         # declara @func
-        func_sym = parent_scope.resolve(node.name)
         ret_type = func_sym.type if func_sym else node.return_type.name
         ret_var_name = f"@{node.name}"
         _, ret_entry = self.scope.define(ret_var_name, ret_type, 'var', force_offset=ret_offset)
@@ -175,13 +220,13 @@ class SemanticAnalyzer:
         if func_sym:
             func_sym.params = param_types
 
-        self.visit(node.block)
+        yield node.block
 
         if not self.return_assigned:
             self.error(f"Função '{node.name}' não possui atribuição ao valor de retorno.")
 
         self.current_func_name = old_func
-        self.scope = parent_scope
+        self.scope.exit_scope()
 
 
 
@@ -202,7 +247,7 @@ class SemanticAnalyzer:
             return
 
         node.variable.entry = entry
-        expr_type = self.visit(node.expression)
+        expr_type = yield node.expression
         if expr_type != entry.type:
             self.error(f"Atribuição incompatível para '{node.variable.name}'. Esperado {entry.type}, encontrado {expr_type}.")
 
@@ -239,7 +284,7 @@ class SemanticAnalyzer:
             return
         node.entry = sym
         for i, arg in enumerate(node.arguments):
-            arg_type = self.visit(arg)
+            arg_type = yield arg
             expected = sym.params[i]
             if arg_type != expected:
                 self.error(f"Argumento {i+1} de '{node.name}' incompatível. Esperado {expected}, encontrado {arg_type}.")
@@ -255,15 +300,15 @@ class SemanticAnalyzer:
             return sym.type
         node.entry = sym
         for i, arg in enumerate(node.arguments):
-            arg_type = self.visit(arg)
+            arg_type = yield arg
             expected = sym.params[i]
             if arg_type != expected:
                 self.error(f"Argumento {i+1} de '{node.name}' incompatível. Esperado {expected}, encontrado {arg_type}.")
         return sym.type
 
     def visit_exp_binaria(self, node: BinaryOp):
-        l_type = self.visit(node.left)
-        r_type = self.visit(node.right)
+        l_type = yield node.left
+        r_type = yield node.right
         if node.op in ['+', '-', '*', 'div']:
             if l_type != 'integer' or r_type != 'integer':
                 self.error(f"Operação '{node.op}' requer inteiros. Encontrado {l_type}, {r_type}.")
@@ -282,7 +327,7 @@ class SemanticAnalyzer:
         return 'integer'
 
     def visit_exp_unaria(self, node: UnaryOp):
-        t = self.visit(node.operand)
+        t = yield node.operand
         if node.op == 'not':
             if t != 'boolean': self.error(f"'not' requer booleano.")
             return 'boolean'
@@ -299,24 +344,24 @@ class SemanticAnalyzer:
 
     def visit_write(self, node: Write):
         for e in node.expressions:
-            t = self.visit(e)
+            t = yield e
             if t not in ['integer', 'boolean']:
                 self.error(f"Write não suporta tipo {t}")
 
     def visit_cmd_condicional(self, node: If):
-        t = self.visit(node.condition)
+        t = yield node.condition
         if t != 'boolean':
             self.error("Condição do IF deve ser booleana.")
-        self.visit(node.then_statement)
+        yield node.then_statement
         if node.else_statement:
-            self.visit(node.else_statement)
+            yield node.else_statement
 
     def visit_cmd_repeticao(self, node: While):
-        t = self.visit(node.condition)
+        t = yield node.condition
         if t != 'boolean':
             self.error("Condição do WHILE deve ser booleana.")
-        self.visit(node.statement)
+        yield node.statement
 
     def visit_seq_comandos(self, node: CompoundStatement):
         for s in node.statements:
-            self.visit(s)
\ No newline at end of file
+            yield s
\ No newline at end of file
@@ -0,0 +1,165 @@
+import copy
+from typing import Dict, List, Optional, Set, Tuple, Union
+from rascal_ast import *
+from rascal_callgraph import CallGraph
+from rascal_constfold import ConstantFolder, const_value, make_const
+from rascal_inline import subtree_size
+from rascal_semantic import SymbolEntry, var_ref
+from rascal_unroll import Substitution
+
+#Crescimento máximo do programa (em nós da AST) com as cópias especializadas
+DEFAULT_SPECIALIZE_SIZE = 200
+
+#Sub-rotina e os argumentos constantes de uma chamada: (posição, valor)
+Key = Tuple[SymbolEntry, Tuple[Tuple[int, Union[int, bool]], ...]]
+
+#Propagação interprocedural de constantes com especialização.
+#Uma chamada com argumentos literais para parâmetros que a sub-rotina nunca
+#altera passa a chamar uma cópia da sub-rotina sem esses parâmetros, com
+#cada leitura deles trocada pelo valor e as expressões dobradas. A cópia só
+#é criada se a dobra encurta o corpo ou deixa condição de if/while
+#constante (a eliminação de código morto remove o ramo que não executa);
+#chamadas com os mesmos valores compartilham a cópia, inclusive as
+#recursivas dentro dela. A cópia é declarada logo depois da original, no
+#mesmo bloco, com entradas novas para a sub-rotina, parâmetros e variáveis
+#locais. Cada cópia conta no orçamento o tamanho da sub-rotina, a não ser
+#que todas as chamadas externas à original tenham os mesmos valores (a
+#original fica inalcançável). Sub-rotinas com sub-rotinas aninhadas não são
+#copiadas: as internas acessam os parâmetros pelo deslocamento.
+class Specializer(NodeVisitor):
+    def __init__(self, max_size: int = DEFAULT_SPECIALIZE_SIZE):
+        self.max_size = max_size
+
+    def visit_program(self, node: Program):
+        if self.max_size <= 0:
+            return node
+        graph = CallGraph(node)
+        self.decls = graph.decls
+        #Bloco que declara cada sub-rotina
+        self.owner: Dict[SymbolEntry, Block] = {}
+        for n in walk(node.block):
+            if isinstance(n, Block):
+                for sub in n.subroutine_declarations:
+                    self.owner[sub.entry] = n
+        #Chamadas de fora do corpo de cada sub-rotina
+        self.sites: Dict[SymbolEntry, List[Node]] = {}
+        for owner, calls in graph.call_sites.items():
+            for call in calls:
+                if call.entry is not owner:
+                    self.sites.setdefault(call.entry, []).append(call)
+        self.clones: Dict[Key, Optional[SubroutineDeclaration]] = {}
+        self.count: Dict[SymbolEntry, int] = {}
+        self.fixed: Dict[SymbolEntry, Set[int]] = {}
+        self.budget = self.max_size
+
+        work = [n for n in walk(node.block) if isinstance(n, (ProcedureCall, FunctionCall))]
+        for call in work:
+            key = self.key(call)
+            if key is None:
+                continue
+            if key not in self.clones:
+                clone = self.specialize(key)
+                self.clones[key] = clone
+                if clone is not None:
+                    work += [n for n in walk(clone.block) if isinstance(n, (ProcedureCall, FunctionCall))]
+            clone = self.clones[key]
+            if clone is not None:
+                positions = {i for i, _ in key[1]}
+                call.entry = clone.entry
+                call.name = clone.name
+                call.arguments = [a for i, a in enumerate(call.arguments) if i not in positions]
+        return node
+
+    #Argumentos literais da chamada para parâmetros nunca alterados, ou None
+    def key(self, call) -> Optional[Key]:
+        if call.entry not in self.fixed:
+            self.fixed[call.entry] = self.fixed_params(call.entry)
+        fixed = self.fixed[call.entry]
+        consts = tuple((i, const_value(a)) for i, a in enumerate(call.arguments)
+                       if i in fixed and const_value(a) is not None)
+        return (call.entry, consts) if consts else None
+
+    #Posições dos parâmetros que o corpo nunca altera (nenhuma se a
+    #sub-rotina tem sub-rotinas aninhadas)
+    def fixed_params(self, entry: SymbolEntry) -> Set[int]:
+        decl = self.decls.get(entry)
+        if decl is None or any(isinstance(n, SubroutineDeclaration) for n in walk(decl.block)):
+            return set()
+        assigned = assigned_params(decl)
+        return {i for i, p in enumerate(parameters(decl)) if p not in assigned}
+
+    def specialize(self, key: Key) -> Optional[SubroutineDeclaration]:
+        entry, consts = key
+        decl = self.decls[entry]
+        clone = self.copy(decl, dict(consts))
+        before = [n for n in walk(decl.block) if isinstance(n, (If, While)) and const_value(n.condition) is not None]
+        after = [n for n in walk(clone.block) if isinstance(n, (If, While)) and const_value(n.condition) is not None]
+        if subtree_size(clone.block) >= subtree_size(decl.block) and len(after) <= len(before):
+            return None
+        sites = self.sites.get(entry, [])
+        cost = 0 if sites and all(self.key(c) == key for c in sites) else subtree_size(clone)
+        if cost > self.budget:
+            return None
+        self.budget -= cost
+        block = self.owner[entry]
+        block.subroutine_declarations.insert(block.subroutine_declarations.index(decl) + 1, clone)
+        self.owner[clone.entry] = block
+        self.decls[clone.entry] = clone
+        return clone
+
+    #Cópia de 'decl' sem os parâmetros de 'consts', trocados pelos valores
+    def copy(self, decl: SubroutineDeclaration, consts: Dict[int, Union[int, bool]]) -> SubroutineDeclaration:
+        entry = decl.entry
+        k = self.count[entry] = self.count.get(entry, 0) + 1
+        new_entry = copy.copy(entry)
+        new_entry.name = f"{decl.name}_{k}"
+        new_entry.label = f"{entry.label}_{k}"
+        params = parameters(decl)
+        kept = [i for i in range(len(params)) if i not in consts]
+        new_entry.params = [entry.params[i] for i in kept]
+        new_entry.memo = False
+
+        # entradas novas para parâmetros mantidos (deslocamentos renumerados),
+        # retorno e locais; as demais são compartilhadas
+        memo = {id(n.entry): n.entry for n in walk(decl) if n.entry is not None}
+        for e in list(memo.values()):
+            if e.level == entry.level and e.category in ('var', 'param'):
+                memo[id(e)] = copy.copy(e)
+        for j, i in enumerate(kept):
+            memo.setdefault(id(params[i]), copy.copy(params[i]))
+            memo[id(params[i])].offset = -5 - j
+        for e in memo.values():
+            if e.level == entry.level and e.name == f"@{decl.name}":
+                e.name = f"@{new_entry.name}"
+                e.offset = -5 - len(kept)
+
+        clone = copy.deepcopy(decl, memo)
+        clone.entry = new_entry
+        clone.name = new_entry.name
+        clone.params = [VarDeclaration([var_ref(memo[id(params[i])])], Type(entry.params[i])) for i in kept]
+        body = clone.block.compound_statement
+        for i, value in consts.items():
+            body = Substitution(memo.get(id(params[i]), params[i]), make_const(value)).visit(body)
+        clone.block.compound_statement = ConstantFolder().visit(body)
+        return clone
+
+#Entradas dos parâmetros na ordem da declaração (deslocamentos -5, -6, ...)
+def parameters(decl: SubroutineDeclaration) -> List[SymbolEntry]:
+    found = {}
+    for n in walk(decl.block):
+        if isinstance(n, Var) and n.entry is not None and n.entry.category == 'param' \
+                and n.entry.level == decl.entry.level:
+            found[-5 - n.entry.offset] = n.entry
+    count = len(decl.entry.params)
+    return [found.get(i, SymbolEntry(f"@p{i}", decl.entry.params[i], 'param', decl.entry.level, -5 - i))
+            for i in range(count)]
+
+#Parâmetros que o corpo altera (atribuição ou read)
+def assigned_params(decl: SubroutineDeclaration) -> Set[SymbolEntry]:
+    assigned: Set[SymbolEntry] = set()
+    for n in walk(decl.block):
+        if isinstance(n, Assignment):
+            assigned.add(n.variable.entry)
+        elif isinstance(n, Read):
+            assigned.update(v.entry for v in n.variables)
+    return assigned
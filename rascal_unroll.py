@@ -0,0 +1,182 @@
+import copy
+from typing import List, Optional
+from rascal_ast import *
+from rascal_callgraph import CallGraph
+from rascal_constfold import ConstantFolder, REL_OPS, const_value
+from rascal_inline import subtree_size
+from rascal_semantic import SymbolEntry, var_ref
+
+#Tamanho máximo (em nós da AST) do corpo de um laço depois de desenrolado
+DEFAULT_UNROLL_SIZE = 60
+
+#Fatores tentados no desenrolamento parcial, do maior para o menor
+UNROLL_FACTORS = (8, 4, 2)
+
+#Relação com os operandos trocados: 'n > i' é 'i < n'
+SWAPPED_REL = {'=': '=', '<>': '<>', '<': '>', '>': '<', '<=': '>=', '>=': '<='}
+
+#Número de iterações de 'while i op limite do ... i := i + passo' com i
+#começando em 'start', ou None se o laço não termina
+def trip_count(op: str, start: int, limit: int, step: int) -> Optional[int]:
+    if not REL_OPS[op](start, limit):
+        return 0
+    if op == '=':
+        return 1 if step != 0 else None
+    if op == '<>':
+        if step == 0 or (limit - start) % step != 0 or (limit - start) // step < 0:
+            return None
+        return (limit - start) // step
+    if op in ('<', '<=') and step > 0:
+        last = limit if op == '<=' else limit - 1
+        return (last - start) // step + 1
+    if op in ('>', '>=') and step < 0:
+        last = limit if op == '>=' else limit + 1
+        return (start - last) // -step + 1
+    return None
+
+#Troca as leituras de uma variável pelo valor dado (cada uso recebe sua cópia)
+class Substitution(NodeTransformer):
+    def __init__(self, var: SymbolEntry, value: Expression):
+        self.var = var
+        self.value = value
+
+    def visit_exp_var(self, node: Var):
+        if node.entry is self.var:
+            return copy_tree(self.value)
+        return node
+
+#Cópia de uma subárvore que compartilha as entradas da tabela de símbolos
+def copy_tree(node: Node) -> Node:
+    memo = {id(n.entry): n.entry for n in walk(node) if n.entry is not None}
+    return copy.deepcopy(node, memo)
+
+#Desenrolamento de laços contados.
+#Um while cuja condição compara uma variável inteira i com uma constante,
+#cujo corpo termina em 'i := i + passo' (passo constante) e não altera i em
+#nenhum outro ponto, nem pelas sub-rotinas que chama, e que é precedido na
+#mesma sequência de comandos por 'i := constante', tem número de iterações
+#conhecido. Se as cópias do corpo cabem no limite de tamanho, o laço vira
+#a sequência delas com i trocado pelo seu valor em cada iteração. Senão, o
+#corpo é repetido 8, 4 ou 2 vezes dentro do laço (i, i + passo, ...), com um
+#único incremento por volta, e as iterações que sobram vêm depois do laço.
+#Se alguma sub-rotina chamada no corpo lê i, as cópias mantêm o incremento.
+class LoopUnroller(NodeTransformer):
+    def __init__(self, max_size: int = DEFAULT_UNROLL_SIZE):
+        self.max_size = max_size
+
+    def visit_program(self, node: Program):
+        if self.max_size <= 0:
+            return node
+        self.graph = CallGraph(node)
+        for decl in self.graph.decls.values():
+            if any(isinstance(n, While) for n in walk(decl.block.compound_statement)):
+                decl.block.compound_statement = self.visit(decl.block.compound_statement)
+        if any(isinstance(n, While) for n in walk(node.block.compound_statement)):
+            node.block.compound_statement = self.visit(node.block.compound_statement)
+        return node
+
+    #Laços internos primeiro; o externo já vê o corpo desenrolado
+    def visit_seq_comandos(self, node: CompoundStatement):
+        node = yield from self.generic_visit(node)
+        statements: List[Statement] = []
+        for stmt in node.statements:
+            unrolled = self.unroll(stmt, statements) if isinstance(stmt, While) else None
+            statements.extend([stmt] if unrolled is None else unrolled)
+        node.statements = statements
+        return node
+
+    #Valor de i na entrada do laço: a última atribuição constante a i nos
+    #comandos anteriores da sequência, se nenhum comando depois dela altera i
+    def start_value(self, var: SymbolEntry, preceding: List[Statement]) -> Optional[int]:
+        for stmt in reversed(preceding):
+            if isinstance(stmt, Assignment) and stmt.variable.entry is var:
+                return int_value(stmt.expression)
+            if var in self.graph.assigned_in(stmt):
+                return None
+        return None
+
+    def unroll(self, loop: While, preceding: List[Statement]) -> Optional[List[Statement]]:
+        cond = loop.condition
+        if not isinstance(cond, BinaryOp) or cond.op not in REL_OPS:
+            return None
+        if isinstance(cond.left, Var) and int_value(cond.right) is not None:
+            var, op, limit = cond.left.entry, cond.op, int_value(cond.right)
+        elif isinstance(cond.right, Var) and int_value(cond.left) is not None:
+            var, op, limit = cond.right.entry, SWAPPED_REL[cond.op], int_value(cond.left)
+        else:
+            return None
+        body = loop.statement.statements if isinstance(loop.statement, CompoundStatement) else [loop.statement]
+        body = [s for s in body if s is not None]
+        if var.type != 'integer' or not body:
+            return None
+        step = increment(var, body[-1])
+        if step is None or any(var in self.graph.assigned_in(s) for s in body[:-1]):
+            return None
+        start = self.start_value(var, preceding)
+        if start is None:
+            return None
+        n = trip_count(op, start, limit, step)
+        if n is None:
+            return None
+        body = body[:-1]
+        size = sum(subtree_size(s) for s in body)
+        #Sub-rotinas do corpo que leem i precisam do valor na variável
+        keep = any(isinstance(c, (ProcedureCall, FunctionCall)) and var in self.graph.reads.get(c.entry, ())
+                   for s in body for c in walk(s))
+        end = [] if keep else [Assignment(var_ref(var), Number(start + n * step))]
+
+        #Laço só com o incremento: basta o valor final de i
+        if not body:
+            return end if n else []
+        if n * size <= self.max_size:
+            return self.copies(var, body, step, start, n, keep) + (end if n else [])
+        factor = next((f for f in UNROLL_FACTORS if f * size <= self.max_size and f < n), None)
+        if factor is None:
+            return None
+        rounds = n // factor
+        after = start + rounds * factor * step
+        inner = self.copies(var, body, step, None, factor, keep)
+        if not keep:
+            inner.append(Assignment(var_ref(var), BinaryOp(var_ref(var), '+', Number(factor * step))))
+        loop.condition = BinaryOp(var_ref(var), '<' if step > 0 else '>', Number(after))
+        loop.statement = CompoundStatement(inner)
+        rest = self.copies(var, body, step, after, n - rounds * factor, keep)
+        return [loop] + rest + (end if rest else [])
+
+    #'count' cópias do corpo para as iterações a partir de i = start (ou, com
+    #start None, a partir do valor de i na volta do laço). Com 'keep', cada
+    #cópia termina no incremento; senão i é trocado pelo seu valor.
+    def copies(self, var: SymbolEntry, body: List[Statement], step: int, start: Optional[int],
+               count: int, keep: bool) -> List[Statement]:
+        result: List[Statement] = []
+        for k in range(count):
+            if keep:
+                result += [copy_tree(s) for s in body]
+                result.append(Assignment(var_ref(var), BinaryOp(var_ref(var), '+', Number(step))))
+                continue
+            if start is not None:
+                value = Number(start + k * step)
+            else:
+                value = BinaryOp(var_ref(var), '+', Number(k * step))
+            for stmt in body:
+                stmt = Substitution(var, value).visit(copy_tree(stmt))
+                result.append(ConstantFolder().visit(stmt))
+        return result
+
+#Valor de um literal inteiro, ou None
+def int_value(node: Optional[Node]) -> Optional[int]:
+    value = const_value(node)
+    return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+#Passo de 'i := i + c', 'i := c + i' ou 'i := i - c', ou None
+def increment(var: SymbolEntry, stmt: Statement) -> Optional[int]:
+    if not isinstance(stmt, Assignment) or stmt.variable.entry is not var:
+        return None
+    e = stmt.expression
+    if not isinstance(e, BinaryOp) or e.op not in ('+', '-'):
+        return None
+    if isinstance(e.left, Var) and e.left.entry is var and int_value(e.right) is not None:
+        return int_value(e.right) if e.op == '+' else -int_value(e.right)
+    if e.op == '+' and isinstance(e.right, Var) and e.right.entry is var and int_value(e.left) is not None:
+        return int_value(e.left)
+    return None
@@ -0,0 +1,80 @@
+#Testes de regressão das otimizações. Cada programa correto de tests_rascal
+#é compilado e executado com -O0 (referência) e com as demais configurações
+#do compilador; a saída de todas deve ser igual à da referência, inclusive
+#quando a execução termina em erro. A entrada de 'nome.ras' vem de 'nome.in'
+#(se existir). Uma compilação ou execução que passa do tempo limite também
+#conta como falha.
+#
+#Uso: python tests_rascal/check_optimizations.py [programa.ras ...]
+import glob
+import os
+import re
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MAIN = os.path.join(HERE, '..', 'main.py')
+
+REFERENCE = ['-O0']
+CONFIGS = [
+    ['-O1'],
+    ['-O2'],
+    ['-O2', '--check-passes'],
+    ['-O0', '--ir'],
+    ['-O2', '--ir'],
+    ['-O2', '--memoize'],
+    ['-O2', '--backend', 'python'],
+    ['-O2', '--memoize', '--backend', 'python'],
+]
+
+#Entrada padrão dos programas sem arquivo .in
+DEFAULT_INPUT = "7 3 5 2\n"
+
+#Limite de instruções da MEPA (o padrão do interpretador é pequeno para os
+#laços executados sem otimização)
+LIMIT = 10000000
+
+TIMEOUT = 60
+
+#Valores impressos e, se a execução falhou, um marcador de erro (a mensagem
+#depende da posição da instrução e do back-end); um marcador próprio se a
+#compilação foi abortada
+def run(path: str, options, stdin: str):
+    try:
+        r = subprocess.run([sys.executable, MAIN, path, '--run', '--limit', str(LIMIT)] + options, input=stdin,
+                           capture_output=True, text=True, timeout=TIMEOUT)
+    except subprocess.TimeoutExpired:
+        return ['<tempo esgotado>']
+    if 'Compilação abortada' in r.stdout:
+        return ['<compilação abortada>']
+    values = [line.strip() for line in r.stdout.splitlines() if line.strip()]
+    messages = [line for line in r.stderr.splitlines()
+                if line.strip() and not re.fullmatch(r'\d+ instruções executadas', line.strip())]
+    if r.returncode != 0 or messages or not all(re.fullmatch(r'-?\d+', v) for v in values):
+        values = [v for v in values if re.fullmatch(r'-?\d+', v)] + ['<erro>']
+    return values
+
+def check(path: str) -> bool:
+    name = os.path.splitext(path)[0]
+    stdin = open(name + '.in').read() if os.path.exists(name + '.in') else DEFAULT_INPUT
+    expected = run(path, REFERENCE, stdin)
+    if expected == ['<compilação abortada>']:
+        print(f"FALHA {os.path.basename(path)} {' '.join(REFERENCE)}: compilação abortada")
+        return False
+    ok = True
+    for options in CONFIGS:
+        got = run(path, options, stdin)
+        if got != expected:
+            ok = False
+            print(f"FALHA {os.path.basename(path)} {' '.join(options)}: {got} (esperado {expected})")
+    return ok
+
+def main():
+    paths = sys.argv[1:] or sorted(glob.glob(os.path.join(HERE, 'correto*.ras')) +
+                                   glob.glob(os.path.join(HERE, 'regressao*.ras')))
+    failures = [p for p in paths if not check(p)]
+    print(f"{len(paths) - len(failures)}/{len(paths)} programas ok")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()